@@ -8,7 +8,6 @@ With all MQL5 original features: Trading hours, trailing stops, daily loss limit
 import warnings
 warnings.filterwarnings('ignore')
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -16,6 +15,12 @@ import seaborn as sns
 from datetime import datetime, timedelta, time
 from sklearn.preprocessing import StandardScaler
 import ta
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_sources import get_data_source
+from data_quality import format_quality_report
 
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
@@ -112,23 +117,46 @@ class StrategyConfig:
     SYMBOL = 'XRP-USD'
     PERIOD = '2y'
     INTERVAL = '1h'
+    CANDLE_STORE_DIR = 'candle_store'  # Local candle store (None = always download everything)
+    DATA_SOURCE = 'yfinance'           # 'yfinance', 'kraken', 'store', 'synthetic[:seed]', 'csv:path', 'parquet:path', 'binary:path'
+    VOLUME_SEED = 42                   # Seed for synthesized forex volume (None = random each run)
     COMMISSION = 0.0002            # 0.02%
 
 # ============================================================================
 # DATA ACQUISITION
 # ============================================================================
 
-def download_forex_data(symbol=None, period=None, interval=None):
-    """Download and synthesize forex data"""
+# Default for arguments where None is a meaningful value (store_dir=None disables the
+# store, volume_seed=None draws random volume)
+_FROM_CONFIG = object()
+
+def download_forex_data(symbol=None, period=None, interval=None, store_dir=_FROM_CONFIG, source=None,
+                        volume_seed=_FROM_CONFIG):
+    """
+    Download and synthesize forex data
+    
+    Args:
+        source: Data source spec (see data_sources.get_data_source), default yfinance
+        store_dir: Local candle store (yfinance only fetches new bars); default
+            StrategyConfig.CANDLE_STORE_DIR, None or '' = no store
+        volume_seed: Seed for the synthetic volume noise; default
+            StrategyConfig.VOLUME_SEED, None = random
+    """
     symbol = symbol or StrategyConfig.SYMBOL
     period = period or StrategyConfig.PERIOD
     interval = interval or StrategyConfig.INTERVAL
+    if store_dir is _FROM_CONFIG:
+        store_dir = StrategyConfig.CANDLE_STORE_DIR
+    source = source or StrategyConfig.DATA_SOURCE
+    if volume_seed is _FROM_CONFIG:
+        volume_seed = StrategyConfig.VOLUME_SEED
     
     print(f"📥 Downloading {symbol} data...")
-    print(f"   Period: {period}, Interval: {interval}")
+    print(f"   Period: {period}, Interval: {interval}, Source: {source}")
     
-    ticker = yf.Ticker(symbol)
-    df = ticker.history(period=period, interval=interval)
+    df = get_data_source(source, store_dir).load(symbol, interval, period=period)
+    print(f"   Dataset fingerprint: {df.attrs['fingerprint']}")
+    print(f"   Data quality: {format_quality_report(df.attrs['quality'])}")
     
     if df.empty:
         raise ValueError(f"No data downloaded for {symbol}")
@@ -151,7 +179,8 @@ def download_forex_data(symbol=None, period=None, interval=None):
         time_factor[(hour_of_day >= 13) & (hour_of_day < 17)] = 2.0
         time_factor[(hour_of_day >= 17) & (hour_of_day < 22)] = 1.3
         
-        noise = np.random.normal(1, 0.2, len(df))
+        rng = np.random.default_rng(volume_seed) if volume_seed is not None else np.random
+        noise = rng.normal(1, 0.2, len(df))
         noise = np.clip(noise, 0.5, 1.5)
         
         synthetic_volume = base_volume * time_factor * noise * 100000
@@ -822,7 +851,7 @@ def run_strategy(config=None):
     print()
     
     # Download and process
-    df = download_forex_data()
+    df = download_forex_data(source=getattr(config, 'DATA_SOURCE', None))
     
     print("\n📈 Calculating indicators...")
     df = calculate_volume_derivatives(df, config)
@@ -7,7 +7,6 @@ Prueba múltiples configuraciones y guarda las mejores por Sharpe ratio
 import warnings
 warnings.filterwarnings('ignore')
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -19,6 +18,30 @@ from itertools import product
 import json
 from tqdm import tqdm
 import os
+import math
+import sys
+import time as time_module
+import socket
+import pickle
+import secrets
+import ipaddress
+import copy
+import cProfile
+import pstats
+import tracemalloc
+import hashlib
+import threading
+import argparse
+import multiprocessing
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from multiprocessing.managers import BaseManager
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_sources import get_data_source
+from data_quality import format_quality_report
+from resampler import Resampler, rule_to_ns
 
 plt.style.use('seaborn-v0_8-darkgrid')
 sns.set_palette("husl")
@@ -85,6 +108,103 @@ class OptimizationConfig:
     MIN_TRADES_REQUIRED = 10              # Mínimo de trades para considerar válida una config
     OUTPUT_FILE = 'optimization_results.csv'
     BEST_CONFIGS_FILE = 'best_configs.json'
+    CANDLE_STORE_DIR = 'candle_store'     # Almacén local de velas (None = descargar siempre todo)
+    DATA_SOURCE = 'yfinance'              # 'yfinance', 'kraken', 'store', 'synthetic[:semilla]', 'csv:ruta', 'parquet:ruta', 'binary:ruta'
+    VOLUME_SEED = 42                      # Semilla del volumen sintético (None = distinto en cada descarga)
+
+    # Modo de búsqueda: 'grid' (todas las combinaciones) o 'tpe' (basada en modelo)
+    SEARCH_MODE = 'grid'
+    N_JOBS = 1                            # Procesos en paralelo (1 = secuencial)
+
+    # Búsqueda TPE (Tree-structured Parzen Estimator)
+    TPE_N_TRIALS = 200                    # Presupuesto de backtests
+    TPE_N_STARTUP = 20                    # Pruebas aleatorias antes de usar el modelo
+    TPE_GAMMA = 0.25                      # Fracción del historial considerada "buena"
+    TPE_N_CANDIDATES = 24                 # Candidatos muestreados por propuesta
+    TPE_BATCH_SIZE = 4                    # Propuestas por lote (para el pool de workers)
+    TPE_METRIC = 'sharpe_ratio'           # Métrica a maximizar
+    TPE_SEED = 42
+
+    # Successive halving sobre la longitud de datos (SEARCH_MODE = 'halving')
+    HALVING_MIN_FRACTION = 0.125          # Fracción del histórico en el primer peldaño
+    HALVING_ETA = 3                       # Se conserva 1/ETA de candidatos por peldaño
+    HALVING_METRIC = 'sharpe_ratio'
+    HALVING_COMPARE_GRID = False          # Ejecutar también el grid completo para comparar top-N
+
+    # Parada anticipada de backtests sin esperanza
+    USE_EARLY_STOP = True
+    EARLY_STOP_MAX_DRAWDOWN = 0.6         # Techo de drawdown (0.6 = 60%), None = desactivado
+    EARLY_STOP_MIN_TRADES = True          # Parar si ya no se alcanza MIN_TRADES_REQUIRED
+    EARLY_STOP_HEURISTIC_MIN_SHARPE = None  # Heurística: Sharpe mínimo en un escenario optimista, None = desactivado
+
+    # Walk-forward (SEARCH_MODE = 'walk_forward')
+    WF_N_FOLDS = 4                        # Número de ventanas out-of-sample
+    WF_OOS_FRACTION = 0.1                 # Tamaño de cada ventana OOS (fracción del histórico)
+    WF_ANCHORED = False                   # True = in-sample anclado al inicio, False = ventana móvil
+    WF_METRIC = 'sharpe_ratio'            # Métrica para elegir la config de cada fold
+    WF_REPORT_FILE = 'walk_forward_report.json'
+
+    # Optimización distribuida (SEARCH_MODE = 'distributed')
+    # Dirección donde escucha el coordinador: ('0.0.0.0', 50000) para workers en
+    # otras máquinas, y entonces OPTIMIZER_AUTHKEY es obligatoria (el protocolo es pickle)
+    DIST_ADDRESS = ('127.0.0.1', 50000)
+    DIST_AUTHKEY = os.getenv('OPTIMIZER_AUTHKEY')  # Sin valor por defecto
+    DIST_BATCH_SIZE = 20                  # Combinaciones por lote
+    DIST_LEASE_TIMEOUT = 60               # Segundos sin heartbeat antes de re-encolar un lote
+    DIST_HEARTBEAT = 5                    # Segundos entre heartbeats de cada worker
+    DIST_LOCAL_WORKERS = 0                # Workers a lanzar en esta misma máquina
+    DIST_CACHE_DIR = 'dataset_cache'      # Caché local de datasets en cada worker
+
+    # Barrido de reglas de salida sobre las entradas de la mejor config ([min, max, step])
+    RUN_EXIT_SWEEP = False
+    EXIT_SWEEP_PARAMS = {
+        'ATR_STOP_MULTIPLIER': [1.0, 2.5, 0.5],
+        'TP_POINTS': [100, 300, 50],
+        'TRAILING_START': [10, 40, 10],
+        'TRAILING_STEP': [5, 15, 5],
+        'PROFIT_CLOSE': [20, 50, 10],
+        'MAX_BARS_IN_TRADE': [2, 8, 2],
+    }
+    EXIT_SWEEP_FILE = 'exit_sweep_results.csv'
+
+    # Varios símbolos en un mismo pool (SEARCH_MODE = 'multi_symbol')
+    SYMBOLS = ['XRP-USD', 'ETH-USD', 'SOL-USD', 'ADA-USD']
+    MULTI_SYMBOL_METRIC = 'sharpe_ratio'
+    MULTI_SYMBOL_REPORT_FILE = 'multi_symbol_report.json'
+
+    # Varios timeframes derivados de una única descarga (SEARCH_MODE = 'multi_timeframe').
+    # FIXED_PARAMS['INTERVAL'] debe ser el timeframe más fino; el informe es el de multi_symbol
+    TIMEFRAMES = ['1h', '4h', '1d']
+    RESAMPLE_ALIGN = 'utc'                # 'utc' o 'session' (inicio de sesión en RESAMPLE_SESSION_TZ)
+    RESAMPLE_SESSION_TZ = 'America/New_York'
+    RESAMPLE_SESSION_START = '17:00'
+    RESAMPLE_CACHE_DIR = 'resample_cache' # None = caché solo en memoria
+
+    # Instrumentación por etapa (tiempo, llamadas y pico de memoria)
+    PROFILE_STAGES = True
+    PROFILE_MEMORY = False                # tracemalloc en todas las combinaciones (lento)
+    PROFILE_SAMPLE = False                # cProfile + tracemalloc de una combinación de muestra
+    PROFILE_TOP_N = 15                    # Filas del perfil de la muestra
+
+    # Re-optimización incremental: guardar el estado de cada backtest (grid / tpe).
+    # Los backtests con estado no se podan: la poda y MIN_TRADES_REQUIRED se aplican al ordenar
+    SAVE_BACKTEST_STATE = False
+    BACKTEST_STATE_FILE = 'backtest_states.pkl'
+    EXTEND_PERIOD = '1mo'                 # Histórico reciente a descargar con --extend
+
+    # Selección multiobjetivo (frente de Pareto): métrica -> 'max' o 'min'
+    PARETO_OBJECTIVES = {
+        'sharpe_ratio': 'max',
+        'max_drawdown': 'min',
+        'total_trades': 'max',
+        'profit_factor': 'max',
+    }
+
+    # Consultas con restricciones guardadas en best_configs.json:
+    # nombre -> (métrica a maximizar, restricción en sintaxis de DataFrame.query)
+    CONSTRAINED_QUERIES = {
+        'max_sharpe_dd_15': ('sharpe_ratio', 'max_drawdown < 15'),
+    }
 
 # ============================================================================
 # [CÓDIGO DEL BACKTESTER ORIGINAL - SE MANTIENE IGUAL]
@@ -94,14 +214,22 @@ class StrategyConfig:
     """Configuración base de la estrategia"""
     pass
 
-def download_forex_data(symbol=None, period=None, interval=None):
-    """Download and synthesize forex data"""
+def download_forex_data(symbol=None, period=None, interval=None, store_dir=None, source=None,
+                        volume_seed=None):
+    """
+    Download and synthesize forex data
+
+    Args:
+        source: Fuente de datos (ver data_sources.get_data_source); por defecto yfinance
+        store_dir: Almacén local de velas (yfinance solo descarga las velas nuevas)
+        volume_seed: Semilla del ruido del volumen sintético (None = aleatorio); fija
+            el dataset resultante para que las cachés por huella sigan siendo válidas
+    """
     symbol = symbol or 'GBPJPY=X'
     period = period or '2y'
     interval = interval or '1h'
 
-    ticker = yf.Ticker(symbol)
-    df = ticker.history(period=period, interval=interval)
+    df = get_data_source(source, store_dir).load(symbol, interval, period=period)
 
     if df.empty:
         raise ValueError(f"No data downloaded for {symbol}")
@@ -122,7 +250,8 @@ def download_forex_data(symbol=None, period=None, interval=None):
         time_factor[(hour_of_day >= 13) & (hour_of_day < 17)] = 2.0
         time_factor[(hour_of_day >= 17) & (hour_of_day < 22)] = 1.3
 
-        noise = np.random.normal(1, 0.2, len(df))
+        rng = np.random.default_rng(volume_seed) if volume_seed is not None else np.random
+        noise = rng.normal(1, 0.2, len(df))
         noise = np.clip(noise, 0.5, 1.5)
 
         synthetic_volume = base_volume * time_factor * noise * 100000
@@ -130,8 +259,46 @@ def download_forex_data(symbol=None, period=None, interval=None):
 
     return df
 
-def calculate_volume_derivatives(df, config):
-    """Calculate volume derivatives"""
+def describe_dataset(df):
+    """Fuente, huella y rango de un dataset cargado con download_forex_data"""
+    return {
+        'source': df.attrs.get('source'),
+        'fingerprint': df.attrs.get('fingerprint') or dataset_fingerprint(df),
+        'rows': len(df),
+        'start': str(df.index[0]),
+        'end': str(df.index[-1]),
+        'quality': df.attrs.get('quality')
+    }
+
+def get_volume_norm_stats(df):
+    """Media y desviación de las derivadas de volumen (normalización de calculate_volume_derivatives)"""
+    return {
+        'vol_1st_mean': df['Vol_1st_Der'].mean(),
+        'vol_1st_std': df['Vol_1st_Der'].std(),
+        'vol_2nd_mean': df['Vol_2nd_Der'].mean(),
+        'vol_2nd_std': df['Vol_2nd_Der'].std()
+    }
+
+def consecutive_accel(accel_positive, accel_negative, consec=0):
+    """Contador de barras consecutivas de aceleración (+) o desaceleración (-)"""
+    values = np.zeros(len(accel_positive), dtype=int)
+    for i in range(len(accel_positive)):
+        if accel_positive[i]:
+            consec = max(0, consec) + 1
+        elif accel_negative[i]:
+            consec = min(0, consec) - 1
+        else:
+            consec = 0
+        values[i] = consec
+    return values
+
+def calculate_volume_derivatives(df, config, norm_stats=None):
+    """
+    Calculate volume derivatives
+
+    norm_stats (de get_volume_norm_stats) fija la normalización; se usa al procesar
+    solo barras nuevas con las estadísticas del histórico ya optimizado.
+    """
     df = df.copy()
 
     df['Volume_Smoothed'] = df['Volume'].rolling(
@@ -142,8 +309,9 @@ def calculate_volume_derivatives(df, config):
     df['Vol_1st_Der'] = df['Volume_Smoothed'].diff()
     df['Vol_2nd_Der'] = df['Vol_1st_Der'].diff()
 
-    df['Vol_1st_Der_Norm'] = (df['Vol_1st_Der'] - df['Vol_1st_Der'].mean()) / (df['Vol_1st_Der'].std() + 1e-10)
-    df['Vol_2nd_Der_Norm'] = (df['Vol_2nd_Der'] - df['Vol_2nd_Der'].mean()) / (df['Vol_2nd_Der'].std() + 1e-10)
+    stats = norm_stats or get_volume_norm_stats(df)
+    df['Vol_1st_Der_Norm'] = (df['Vol_1st_Der'] - stats['vol_1st_mean']) / (stats['vol_1st_std'] + 1e-10)
+    df['Vol_2nd_Der_Norm'] = (df['Vol_2nd_Der'] - stats['vol_2nd_mean']) / (stats['vol_2nd_std'] + 1e-10)
 
     df['Accel_Positive'] = (
         (df['Vol_1st_Der_Norm'] > 0.1) &
@@ -156,15 +324,10 @@ def calculate_volume_derivatives(df, config):
     ).astype(int)
 
     df['Consecutive_Accel'] = 0
-    consec = 0
-    for i in range(1, len(df)):
-        if df['Accel_Positive'].iloc[i]:
-            consec = max(0, consec) + 1
-        elif df['Accel_Negative'].iloc[i]:
-            consec = min(0, consec) - 1
-        else:
-            consec = 0
-        df.loc[df.index[i], 'Consecutive_Accel'] = consec
+    if len(df) > 1:
+        df.iloc[1:, df.columns.get_loc('Consecutive_Accel')] = consecutive_accel(
+            df['Accel_Positive'].values[1:], df['Accel_Negative'].values[1:]
+        )
 
     return df
 
@@ -354,11 +517,193 @@ def can_trade(timestamp, config):
 
         return False
 
+# ============================================================================
+# INSTRUMENTACIÓN POR ETAPA
+# ============================================================================
+
+class StageProfiler:
+    """
+    Tiempo acumulado, llamadas y pico de memoria asignada por etapa.
+    Las etapas pueden anidarse: total_time incluye las subetapas y self_time no.
+    """
+
+    def __init__(self, enabled=True, track_memory=False):
+        self.enabled = enabled
+        self.track_memory = track_memory
+        self.stats = {}
+        self._stack = []
+
+    def start(self):
+        """Inicia tracemalloc si se mide memoria"""
+        if self.enabled and self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+
+        memory = self.track_memory and tracemalloc.is_tracing()
+        start_memory = 0
+        if memory:
+            # reset_peak es global: se conserva antes el pico de las etapas abiertas
+            start_memory, peak = tracemalloc.get_traced_memory()
+            for frame in self._stack:
+                frame['peak'] = max(frame['peak'], peak)
+            tracemalloc.reset_peak()
+
+        frame = {'child_time': 0.0, 'peak': 0}
+        self._stack.append(frame)
+        start = time_module.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time_module.perf_counter() - start
+            self._stack.pop()
+
+            stat = self.stats.setdefault(name, {'calls': 0, 'total_time': 0.0, 'self_time': 0.0, 'peak_memory': 0})
+            stat['calls'] += 1
+            stat['total_time'] += elapsed
+            stat['self_time'] += elapsed - frame['child_time']
+
+            if memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                stat['peak_memory'] = max(stat['peak_memory'], peak - start_memory)
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+
+            if self._stack:
+                self._stack[-1]['child_time'] += elapsed
+
+    def merge(self, stats):
+        """Acumula estadísticas de otro proceso"""
+        for name, other in stats.items():
+            stat = self.stats.setdefault(name, {'calls': 0, 'total_time': 0.0, 'self_time': 0.0, 'peak_memory': 0})
+            stat['calls'] += other['calls']
+            stat['total_time'] += other['total_time']
+            stat['self_time'] += other['self_time']
+            stat['peak_memory'] = max(stat['peak_memory'], other['peak_memory'])
+
+    def stop(self):
+        """Detiene tracemalloc si se estaba midiendo memoria"""
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def drain(self):
+        """Devuelve las estadísticas acumuladas y las reinicia"""
+        stats, self.stats = self.stats, {}
+        return stats
+
+# Resultado de un worker del pool con las estadísticas de etapa acumuladas desde la tarea anterior
+ProfiledResult = namedtuple('ProfiledResult', ['result', 'stage_stats'])
+
+# ============================================================================
+# REGLAS DE PARADA ANTICIPADA (PRUNING)
+# ============================================================================
+
+class EarlyStopRule:
+    """Regla base de parada anticipada para Backtester.run"""
+
+    reason = 'early_stop'
+
+    def prepare(self, backtester, df, start, stop):
+        """Se llama una vez antes de iterar las barras [start, stop)"""
+        pass
+
+    def should_stop(self, backtester, i):
+        """Devuelve True si la configuración ya no puede ser válida"""
+        return False
+
+class MaxDrawdownStop(EarlyStopRule):
+    """Detiene el backtest si el drawdown supera un techo (0.6 = 60%)"""
+
+    reason = 'max_drawdown'
+
+    def __init__(self, max_drawdown=0.6):
+        self.max_drawdown = max_drawdown
+
+    def should_stop(self, backtester, i):
+        return backtester.max_drawdown >= self.max_drawdown
+
+class MinTradesStop(EarlyStopRule):
+    """Detiene el backtest si ya no se puede alcanzar el mínimo de trades con las señales restantes"""
+
+    reason = 'min_trades_unreachable'
+
+    def __init__(self, min_trades):
+        self.min_trades = min_trades
+        self.remaining_signals = None
+
+    def prepare(self, backtester, df, start, stop):
+        # Señales desde cada barra hasta stop (las posteriores no se evalúan)
+        has_signal = (df['Signal_Final'].values[:stop] != 0).astype(int)
+        self.remaining_signals = np.cumsum(has_signal[::-1])[::-1]
+
+    def should_stop(self, backtester, i):
+        max_trades = len(backtester.trades) + len(backtester.positions) + self.remaining_signals[i]
+        return max_trades < self.min_trades
+
+class SharpeHeuristicStop(EarlyStopRule):
+    """
+    Heurística: detiene el backtest si en un escenario optimista no se alcanza el
+    Sharpe mínimo. El escenario supone que todas las barras restantes repiten el
+    mejor retorno observado; no es una cota (otra secuencia de retornos podría
+    dar más Sharpe), así que puede podar configuraciones válidas.
+    """
+
+    reason = 'sharpe_heuristic'
+
+    def __init__(self, min_sharpe, min_progress=0.25):
+        self.min_sharpe = min_sharpe
+        self.min_progress = min_progress
+
+    def prepare(self, backtester, df, start, stop):
+        self.start = start
+        self.stop = stop
+        self.consumed = 0
+        self.sum_r = 0.0
+        self.sum_r2 = 0.0
+        self.n_r = 0
+        self.best_r = 0.0
+
+    def _consume(self, equity_curve):
+        while self.consumed < len(equity_curve):
+            if self.consumed > 0:
+                prev = equity_curve[self.consumed - 1]['equity']
+                r = equity_curve[self.consumed]['equity'] / prev - 1 if prev else 0.0
+                self.sum_r += r
+                self.sum_r2 += r * r
+                self.n_r += 1
+                self.best_r = max(self.best_r, r)
+            self.consumed += 1
+
+    def should_stop(self, backtester, i):
+        self._consume(backtester.equity_curve)
+
+        progress = (i - self.start) / max(1, self.stop - self.start)
+        if progress < self.min_progress or self.n_r < 2:
+            return False
+
+        remaining = self.stop - i
+        n_total = self.n_r + remaining
+        mean = (self.sum_r + remaining * self.best_r) / n_total
+        variance = (self.sum_r2 + remaining * self.best_r ** 2 - n_total * mean ** 2) / (n_total - 1)
+
+        if variance <= 0:
+            return False
+
+        return (mean / np.sqrt(variance)) * np.sqrt(252) < self.min_sharpe
+
 class Backtester:
     """Complete backtesting engine"""
 
-    def __init__(self, config):
+    def __init__(self, config, early_stop_rules=None, profiler=None):
         self.config = config
+        self.early_stop_rules = early_stop_rules or []
+        self.profiler = profiler or StageProfiler(enabled=False)
+        self.stop_reason = None
+        self.bars_saved = 0
         self.initial_capital = config.INITIAL_CAPITAL
         self.capital = config.INITIAL_CAPITAL
         self.positions = []
@@ -369,10 +714,61 @@ class Backtester:
         self.current_day = None
         self.daily_profit = 0
         self.daily_loss_hit = False
+        self.equity_stats = {'count': 0, 'mean': 0.0, 'm2': 0.0, 'last': None}
+        self.resumed = False
+        self.state = None
+
+    STATE_FIELDS = [
+        'capital', 'positions', 'trades', 'max_drawdown', 'peak_capital',
+        'current_day', 'daily_profit', 'daily_loss_hit', 'equity_stats'
+    ]
 
-    def run(self, df):
-        """Run backtest"""
-        for i in range(100, len(df)):
+    def get_state(self):
+        """Copia del estado completo (capital, posiciones, trades, contadores diarios y de equity)"""
+        return copy.deepcopy({field: getattr(self, field) for field in self.STATE_FIELDS})
+
+    def resume(self, df, state, start, keep_state=False):
+        """
+        Continúa un backtest desde un estado de get_state
+
+        Args:
+            df: Datos procesados que incluyen las barras nuevas
+            state: Estado guardado tras la última barra ya procesada
+            start: Posición en df de la primera barra nueva
+            keep_state: Guardar en self.state el estado al final
+        """
+        for field, value in copy.deepcopy(state).items():
+            setattr(self, field, value)
+        self.resumed = True
+        return self.run(df, start=start, keep_state=keep_state)
+
+    def _track_equity(self, equity):
+        """Media y varianza acumuladas de los retornos de equity (Welford) para el Sharpe tras resume"""
+        stats = self.equity_stats
+        if stats['last'] is not None:
+            r = equity / stats['last'] - 1
+            stats['count'] += 1
+            delta = r - stats['mean']
+            stats['mean'] += delta / stats['count']
+            stats['m2'] += delta * (r - stats['mean'])
+        stats['last'] = equity
+
+    def run(self, df, start=100, stop=None, keep_state=False):
+        """
+        Run backtest
+
+        Args:
+            df: Datos procesados
+            start: Primera barra evaluada (100 = calentamiento de indicadores)
+            stop: Barra final exclusiva (por defecto len(df))
+            keep_state: Guardar en self.state el estado en stop, antes de cerrar las posiciones abiertas
+        """
+        stop = len(df) if stop is None else stop
+
+        for rule in self.early_stop_rules:
+            rule.prepare(self, df, start, stop)
+
+        for i in range(start, stop):
             timestamp = df.index[i]
             current_price = df['Close'].iloc[i]
             high = df['High'].iloc[i]
@@ -380,6 +776,14 @@ class Backtester:
             atr = df['ATR'].iloc[i]
             signal = df['Signal_Final'].iloc[i]
 
+            stop_rule = next((rule for rule in self.early_stop_rules if rule.should_stop(self, i)), None)
+            if stop_rule is not None:
+                self.stop_reason = stop_rule.reason
+                self.bars_saved = stop - i
+                self._close_all_positions(timestamp, current_price, 'pruned')
+                with self.profiler.stage('_get_results'):
+                    return self._get_results()
+
             current_day = timestamp.date()
             if self.current_day != current_day:
                 self.current_day = current_day
@@ -415,6 +819,7 @@ class Backtester:
 
             current_equity = self.capital + floating_pnl
             self.equity_curve.append({'timestamp': timestamp, 'equity': current_equity})
+            self._track_equity(current_equity)
 
             if current_equity > self.peak_capital:
                 self.peak_capital = current_equity
@@ -422,9 +827,13 @@ class Backtester:
             drawdown = (self.peak_capital - current_equity) / self.peak_capital
             self.max_drawdown = max(self.max_drawdown, drawdown)
 
-        self._close_all_positions(df.index[-1], df['Close'].iloc[-1], 'end')
+        if keep_state:
+            self.state = self.get_state()
+
+        self._close_all_positions(df.index[stop - 1], df['Close'].iloc[stop - 1], 'end')
 
-        return self._get_results()
+        with self.profiler.stage('_get_results'):
+            return self._get_results()
 
     def _open_position(self, timestamp, price, signal, atr):
         """Open position"""
@@ -564,6 +973,8 @@ class Backtester:
                 'max_drawdown': self.max_drawdown * 100,
                 'sharpe_ratio': 0,
                 'final_capital': self.capital,
+                'stop_reason': self.stop_reason,
+                'bars_saved': self.bars_saved,
                 'trades_df': pd.DataFrame(),
                 'equity_df': equity_df
             }
@@ -575,8 +986,14 @@ class Backtester:
         gross_profit = winning['pnl'].sum() if len(winning) > 0 else 0
         gross_loss = abs(losing['pnl'].sum()) if len(losing) > 0 else 1
 
-        equity_returns = equity_df['equity'].pct_change().dropna()
-        sharpe = (equity_returns.mean() / equity_returns.std()) * np.sqrt(252) if len(equity_returns) > 1 and equity_returns.std() > 0 else 0
+        if self.resumed:
+            # equity_df solo cubre las barras nuevas: el Sharpe sale de los acumuladores
+            stats = self.equity_stats
+            std = np.sqrt(stats['m2'] / (stats['count'] - 1)) if stats['count'] > 1 else 0
+            sharpe = (stats['mean'] / std) * np.sqrt(252) if std > 0 else 0
+        else:
+            equity_returns = equity_df['equity'].pct_change().dropna()
+            sharpe = (equity_returns.mean() / equity_returns.std()) * np.sqrt(252) if len(equity_returns) > 1 and equity_returns.std() > 0 else 0
 
         return {
             'total_return': ((self.capital - self.initial_capital) / self.initial_capital) * 100,
@@ -588,10 +1005,786 @@ class Backtester:
             'max_drawdown': self.max_drawdown * 100,
             'sharpe_ratio': sharpe,
             'final_capital': self.capital,
+            'stop_reason': self.stop_reason,
+            'bars_saved': self.bars_saved,
             'trades_df': trades_df,
             'equity_df': equity_df
         }
 
+# ============================================================================
+# BÚSQUEDA BASADA EN MODELO (TPE)
+# ============================================================================
+
+class TPESampler:
+    """
+    Tree-structured Parzen Estimator sobre el espacio discreto de parámetros.
+
+    Separa el historial en configuraciones buenas (top gamma) y malas, estima
+    una densidad por parámetro para cada grupo y propone los candidatos que
+    maximizan l(x)/g(x). Las propuestas pendientes se tratan como malas
+    ("constant liar") para que un lote no repita la misma zona.
+    """
+
+    def __init__(self, param_space, gamma=0.25, n_startup=20, n_candidates=24, seed=None):
+        self.param_space = param_space
+        self.names = list(param_space.keys())
+        self.sizes = [len(param_space[name]) for name in self.names]
+        self.gamma = gamma
+        self.n_startup = n_startup
+        self.n_candidates = n_candidates
+        self.rng = np.random.default_rng(seed)
+        self.history = []
+        self.pending = set()
+
+    @property
+    def space_size(self):
+        return int(np.prod(self.sizes))
+
+    def _is_ordinal(self, name):
+        values = self.param_space[name]
+        return len(values) > 2 and all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in values
+        )
+
+    def _to_indices(self, params):
+        return tuple(self.param_space[name].index(params[name]) for name in self.names)
+
+    def _to_params(self, indices):
+        return {name: self.param_space[name][i] for name, i in zip(self.names, indices)}
+
+    def _seen(self):
+        return {idx for idx, _ in self.history} | self.pending
+
+    def _random_unseen(self, seen, attempts=100):
+        for _ in range(attempts):
+            idx = tuple(int(self.rng.integers(size)) for size in self.sizes)
+            if idx not in seen:
+                return idx
+        # Espacio casi agotado: recorrer en orden
+        for idx in product(*[range(size) for size in self.sizes]):
+            if idx not in seen:
+                return idx
+        return None
+
+    def _density(self, observations, dim):
+        """Densidad discreta de un parámetro (kernel gaussiano o frecuencias)"""
+        size = self.sizes[dim]
+        weights = np.ones(size) / size  # Prior uniforme
+
+        if len(observations) == 0:
+            return weights
+
+        values = np.array([obs[dim] for obs in observations], dtype=float)
+        grid = np.arange(size, dtype=float)
+
+        if self._is_ordinal(self.names[dim]):
+            bandwidth = max(0.5, (size - 1) / (len(values) ** 0.5 + 1))
+            kernels = np.exp(-0.5 * ((grid[:, None] - values[None, :]) / bandwidth) ** 2)
+            kernels /= kernels.sum(axis=0, keepdims=True)
+            counts = kernels.sum(axis=1)
+        else:
+            counts = np.bincount(values.astype(int), minlength=size).astype(float)
+
+        density = weights + counts
+        return density / density.sum()
+
+    def _propose_one(self):
+        seen = self._seen()
+
+        if len(seen) >= self.space_size:
+            return None
+
+        if len(self.history) < self.n_startup:
+            return self._random_unseen(seen)
+
+        ranked = sorted(self.history, key=lambda item: item[1], reverse=True)
+        n_good = max(1, int(math.ceil(self.gamma * len(ranked))))
+        good = [idx for idx, _ in ranked[:n_good]]
+        bad = [idx for idx, _ in ranked[n_good:]] + list(self.pending)
+
+        l_densities = [self._density(good, d) for d in range(len(self.names))]
+        g_densities = [self._density(bad, d) for d in range(len(self.names))]
+
+        candidates = np.column_stack([
+            self.rng.choice(self.sizes[d], size=self.n_candidates, p=l_densities[d])
+            for d in range(len(self.names))
+        ])
+
+        scores = np.zeros(self.n_candidates)
+        for d in range(len(self.names)):
+            scores += np.log(l_densities[d][candidates[:, d]]) - np.log(g_densities[d][candidates[:, d]])
+
+        for c in np.argsort(-scores):
+            idx = tuple(int(v) for v in candidates[c])
+            if idx not in seen:
+                return idx
+
+        return self._random_unseen(seen)
+
+    def ask(self, n=1):
+        """Propone hasta n configuraciones nuevas"""
+        proposals = []
+        for _ in range(n):
+            idx = self._propose_one()
+            if idx is None:
+                break
+            self.pending.add(idx)
+            proposals.append(self._to_params(idx))
+        return proposals
+
+    def tell(self, params, score):
+        """Registra el resultado de una configuración (None = inválida)"""
+        idx = self._to_indices(params)
+        self.pending.discard(idx)
+        if score is None or not np.isfinite(score):
+            score = -np.inf
+        self.history.append((idx, float(score)))
+
+# ============================================================================
+# EJECUCIÓN PARALELA
+# ============================================================================
+
+_WORKER_STATE = {}
+
+def _init_worker(optimizer, df):
+    """Inicializa un worker con el optimizador y los datos compartidos"""
+    optimizer.profiler = StageProfiler(optimizer.profiler.enabled, optimizer.profiler.track_memory)
+    optimizer.profiler.start()
+    _WORKER_STATE['optimizer'] = optimizer
+    _WORKER_STATE['data'] = df
+
+def _profiled(result):
+    """Adjunta al resultado las estadísticas de etapa del worker (si la instrumentación está activa)"""
+    profiler = _WORKER_STATE['optimizer'].profiler
+    if not profiler.enabled:
+        return result
+    return ProfiledResult(result, profiler.drain())
+
+def _worker_run_backtest(params):
+    """Ejecuta un backtest dentro de un worker del pool"""
+    optimizer = _WORKER_STATE['optimizer']
+    return _profiled(optimizer.run_single_backtest(
+        params, _WORKER_STATE['data'], keep_state=optimizer.opt_config.SAVE_BACKTEST_STATE
+    ))
+
+def _worker_extend_result(task):
+    """Extiende un resultado guardado con las barras nuevas dentro de un worker del pool"""
+    params, state = task
+    return _profiled(_WORKER_STATE['optimizer'].extend_single_result(params, state, _WORKER_STATE['data']))
+
+def _worker_run_symbol(task):
+    """Ejecuta un backtest de un símbolo (los datos del worker son un dict símbolo -> datos con indicadores)"""
+    symbol, params = task
+    return _profiled(_WORKER_STATE['optimizer'].run_single_backtest(
+        params, _WORKER_STATE['data'][symbol], indicators_ready=True
+    ))
+
+def _worker_run_window(task):
+    """Ejecuta un backtest sobre una ventana de los datos (indicadores ya calculados)"""
+    params, start, end, min_trades = task
+    return _profiled(_WORKER_STATE['optimizer'].run_single_backtest(
+        params, _WORKER_STATE['data'].iloc[start:end],
+        indicators_ready=True, min_trades=min_trades
+    ))
+
+# ============================================================================
+# OPTIMIZACIÓN DISTRIBUIDA (COORDINADOR / WORKERS)
+# ============================================================================
+
+def dataset_fingerprint(df):
+    """Huella del dataset (índice + valores) para que los workers verifiquen su caché"""
+    hashed = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+def compact_result(result):
+    """Quita los DataFrames de un resultado para enviarlo por la red"""
+    if result is None:
+        return None
+    return {k: v for k, v in result.items() if k not in ('trades_df', 'equity_df')}
+
+class JobQueue:
+    """
+    Cola de lotes de combinaciones servida por el coordinador.
+    Cada lote entregado queda "alquilado" al worker; si el worker deja de
+    enviar heartbeats durante lease_timeout segundos el lote vuelve a la cola.
+    """
+
+    def __init__(self, job_info, dataset, batches, lease_timeout=60):
+        self.job_info = job_info
+        self.dataset_bytes = pickle.dumps(dataset, protocol=pickle.HIGHEST_PROTOCOL)
+        self.batches = dict(enumerate(batches))
+        self.pending = deque(self.batches.keys())
+        self.in_flight = {}
+        self.worker_seen = {}
+        self.results = {}
+        self.requeued = 0
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+
+    def get_job_info(self):
+        return self.job_info
+
+    def get_dataset(self):
+        return self.dataset_bytes
+
+    def heartbeat(self, worker_id):
+        with self.lock:
+            self.worker_seen[worker_id] = time_module.time()
+
+    def requeue_expired(self):
+        """Devuelve a la cola los lotes de workers sin heartbeat reciente"""
+        now = time_module.time()
+        with self.lock:
+            for batch_id, worker_id in list(self.in_flight.items()):
+                if now - self.worker_seen.get(worker_id, 0) > self.lease_timeout:
+                    del self.in_flight[batch_id]
+                    self.pending.appendleft(batch_id)
+                    self.requeued += 1
+
+    def get_batch(self, worker_id):
+        """Entrega el siguiente lote pendiente o None si no hay"""
+        self.requeue_expired()
+        with self.lock:
+            self.worker_seen[worker_id] = time_module.time()
+            while self.pending:
+                batch_id = self.pending.popleft()
+                if batch_id in self.results:
+                    continue
+                self.in_flight[batch_id] = worker_id
+                return batch_id, self.batches[batch_id]
+            return None
+
+    def submit_results(self, worker_id, batch_id, results):
+        with self.lock:
+            self.worker_seen[worker_id] = time_module.time()
+            self.in_flight.pop(batch_id, None)
+            # Un lote re-encolado puede llegar dos veces: se queda el primero
+            self.results.setdefault(batch_id, results)
+
+    def progress(self):
+        with self.lock:
+            return {
+                'completed': len(self.results),
+                'total': len(self.batches),
+                'in_flight': len(self.in_flight),
+                'requeued': self.requeued,
+                'workers': len(self.worker_seen)
+            }
+
+    def is_finished(self):
+        with self.lock:
+            return len(self.results) == len(self.batches)
+
+class OptimizationQueueManager(BaseManager):
+    """Manager TCP que expone la JobQueue del coordinador"""
+    pass
+
+def _is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def coordinator_authkey(authkey, host):
+    """
+    Clave del coordinador: la de OPTIMIZER_AUTHKEY, o una aleatoria de esta
+    ejecución si solo escucha en loopback (workers locales). El manager
+    intercambia pickle, así que escuchar en otra interfaz sin clave propia
+    permitiría ejecutar código en el coordinador y en los workers.
+    """
+    if authkey:
+        return authkey
+    if not _is_loopback(host):
+        raise ValueError(f"DIST_ADDRESS={host} no es loopback: define OPTIMIZER_AUTHKEY "
+                         f"(clave secreta compartida con los workers)")
+    return secrets.token_hex(32)
+
+def _load_worker_dataset(queue, fingerprint, cache_dir):
+    """Carga el dataset desde la caché local o lo descarga del coordinador"""
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_path = os.path.join(cache_dir, f"{fingerprint}.pkl")
+
+    if os.path.exists(cache_path):
+        df = pd.read_pickle(cache_path)
+        if dataset_fingerprint(df) == fingerprint:
+            return df
+
+    df = pickle.loads(queue.get_dataset())
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, cache_path)
+    return df
+
+def run_distributed_worker(address, authkey=None, cache_dir=None, worker_id=None):
+    """
+    Worker: procesa lotes del coordinador hasta que no queden
+
+    Args:
+        address: (host, puerto) del coordinador
+        authkey: Clave compartida (por defecto DIST_AUTHKEY, de OPTIMIZER_AUTHKEY)
+        cache_dir: Directorio de caché local de datasets
+        worker_id: Identificador del worker (por defecto host-pid)
+    """
+    authkey = authkey or OptimizationConfig.DIST_AUTHKEY
+    if not authkey:
+        raise ValueError("Falta OPTIMIZER_AUTHKEY: la clave del coordinador es obligatoria")
+    cache_dir = cache_dir or OptimizationConfig.DIST_CACHE_DIR
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+
+    OptimizationQueueManager.register('get_queue')
+    manager = OptimizationQueueManager(address=tuple(address), authkey=authkey.encode())
+    manager.connect()
+    queue = manager.get_queue()
+
+    job = queue.get_job_info()
+    df = _load_worker_dataset(queue, job['fingerprint'], cache_dir)
+
+    opt_config = OptimizationConfig()
+    for key, value in job['config'].items():
+        setattr(opt_config, key, value)
+    optimizer = StrategyOptimizer(opt_config)
+
+    stop_event = threading.Event()
+
+    def heartbeat_loop():
+        while not stop_event.wait(opt_config.DIST_HEARTBEAT):
+            try:
+                queue.heartbeat(worker_id)
+            except Exception:
+                return
+
+    heartbeat_thread = threading.Thread(target=heartbeat_loop, daemon=True)
+    heartbeat_thread.start()
+
+    processed = 0
+    try:
+        while True:
+            batch = queue.get_batch(worker_id)
+            if batch is None:
+                if queue.is_finished():
+                    break
+                time_module.sleep(0.5)
+                continue
+
+            batch_id, param_batch = batch
+            results = [
+                compact_result(optimizer.run_single_backtest(params, df, indicators_ready=True))
+                for params in param_batch
+            ]
+            queue.submit_results(worker_id, batch_id, results)
+            processed += len(param_batch)
+    except (EOFError, ConnectionError):
+        pass  # Coordinador cerrado
+    finally:
+        stop_event.set()
+
+    print(f"   👷 Worker {worker_id}: {processed:,} backtests procesados")
+    return processed
+
+# ============================================================================
+# BARRIDO DE REGLAS DE SALIDA SOBRE ENTRADAS FIJAS
+# ============================================================================
+
+EXIT_REASONS = np.array(['profit_target', 'stop_loss', 'take_profit', 'time_limit', 'end'])
+
+class ExitRuleSweep:
+    """
+    Evalúa muchas reglas de salida sobre las mismas entradas.
+
+    Las entradas (Signal_Final) no dependen de los parámetros de salida, así que
+    las ventanas de precio posteriores a cada entrada se extraen una sola vez en
+    matrices (entradas × barras operables). Cada configuración de salida se
+    resuelve en dos pasadas:
+
+    1. Vectorizada sobre la matriz: barra, precio y motivo de salida de cada
+       entrada candidata (PROFIT_CLOSE, trailing, SL/TP, MAX_BARS_IN_TRADE).
+    2. Secuencial sobre las entradas: tamaño según el capital, bloqueo por
+       MAX_POSITIONS / SAME_DIRECTION_ONLY y límite de pérdida diaria.
+
+    Reproduce la lógica de Backtester barra a barra, por lo que los resultados
+    coinciden con Backtester.run para la misma configuración.
+    """
+
+    EXIT_PARAMS = [
+        'ATR_STOP_MULTIPLIER', 'TP_POINTS', 'TRAILING_START', 'TRAILING_STEP',
+        'PROFIT_CLOSE', 'MAX_BARS_IN_TRADE', 'USE_TRAILING_STOP'
+    ]
+
+    def __init__(self, df_processed, config, max_hold=None, warmup=100):
+        """
+        Args:
+            df_processed: Datos con ATR y Signal_Final
+            config: Configuración de estrategia (parámetros de entrada y fijos)
+            max_hold: Barras operables máximas por trade (por defecto MAX_BARS_IN_TRADE)
+            warmup: Barras iniciales que Backtester no evalúa
+        """
+        self.config = config
+        self.max_hold = max(1, int(max_hold or config.MAX_BARS_IN_TRADE))
+        self.index = df_processed.index
+        self.n_bars = len(df_processed)
+
+        self.close = df_processed['Close'].values.astype(float)
+        high = df_processed['High'].values.astype(float)
+        low = df_processed['Low'].values.astype(float)
+        atr = df_processed['ATR'].values.astype(float)
+        signal = df_processed['Signal_Final'].values
+
+        # Barras en las que Backtester actualiza posiciones y registra equity
+        self.tradeable = np.array([can_trade(ts, config) for ts in self.index], dtype=bool)
+        self.tradeable[:warmup] = False
+        self.tradeable_idx = np.flatnonzero(self.tradeable)
+        self.day = pd.factorize(np.asarray(self.index.date))[0]
+        day_end = np.flatnonzero(np.r_[self.day[1:] != self.day[:-1], True])
+        self.day_last_bar = day_end[self.day]
+
+        # Entradas candidatas: señal en barra operable
+        self.entries = np.flatnonzero(self.tradeable & (signal != 0))
+        self.direction = np.where(signal[self.entries] > 0, 1, -1)
+        self.entry_price = self.close[self.entries]
+        self.entry_atr = atr[self.entries]
+
+        # Ventanas hacia adelante: siguientes max_hold barras operables de cada entrada
+        self.entry_pos = np.searchsorted(self.tradeable_idx, self.entries, side='right')
+        offsets = self.entry_pos[:, None] + np.arange(self.max_hold)[None, :]
+        self.valid = offsets < len(self.tradeable_idx)
+        last = max(len(self.tradeable_idx) - 1, 0)
+        self.fwd_bars = (self.tradeable_idx[np.minimum(offsets, last)] if len(self.tradeable_idx)
+                         else np.zeros_like(offsets))
+        self.fwd_close = self.close[self.fwd_bars]
+        self.fwd_high = high[self.fwd_bars]
+        self.fwd_low = low[self.fwd_bars]
+
+    def _exit_config(self, exit_params):
+        """Combina la configuración base con los parámetros de salida"""
+        values = {name: getattr(self.config, name) for name in self.EXIT_PARAMS}
+        values.update(exit_params or {})
+        if values['MAX_BARS_IN_TRADE'] > self.max_hold:
+            raise ValueError(f"MAX_BARS_IN_TRADE={values['MAX_BARS_IN_TRADE']} supera max_hold={self.max_hold}")
+        return values
+
+    def evaluate_exits(self, exit_params=None):
+        """
+        Primera pasada (vectorizada): salida de cada entrada candidata.
+
+        Returns:
+            dict con arrays por entrada: exit_bar (n_bars = cierre al final),
+            exit_price, reason (índice en EXIT_REASONS)
+        """
+        p = self._exit_config(exit_params)
+        point = 0.0001
+        n_entries = len(self.entries)
+        hold = max(1, int(p['MAX_BARS_IN_TRADE']))
+
+        is_long = (self.direction > 0)[:, None]
+        entry = self.entry_price[:, None]
+        close = self.fwd_close[:, :hold]
+        high = self.fwd_high[:, :hold]
+        low = self.fwd_low[:, :hold]
+        valid = self.valid[:, :hold]
+
+        profit_points = np.where(is_long, (close - entry) / point, (entry - close) / point)
+
+        stop_distance = p['ATR_STOP_MULTIPLIER'] * self.entry_atr
+        stop_loss = np.where(is_long[:, 0], self.entry_price - stop_distance, self.entry_price + stop_distance)
+        take_profit = np.where(is_long[:, 0], self.entry_price + p['TP_POINTS'] * point,
+                               self.entry_price - p['TP_POINTS'] * point)
+        stop_loss = np.broadcast_to(stop_loss[:, None], close.shape)
+
+        if p['USE_TRAILING_STOP']:
+            # El trailing se activa en la primera barra con beneficio >= TRAILING_START y
+            # el stop solo se mueve con nuevos máximos posteriores a esa barra
+            reached = (profit_points >= p['TRAILING_START']) & valid
+            activated = np.logical_or.accumulate(reached, axis=1)
+            first_profit = profit_points[np.arange(n_entries), reached.argmax(axis=1)][:, None]
+            highest = np.maximum.accumulate(np.where(activated, profit_points, -np.inf), axis=1)
+            trail_level = highest - p['TRAILING_STEP']
+            trail_sl = np.where(is_long, entry + trail_level * point, entry - trail_level * point)
+            improves = np.where(is_long, trail_sl > stop_loss, trail_sl < stop_loss)
+            stop_loss = np.where(activated & (highest > first_profit) & improves, trail_sl, stop_loss)
+
+        hit_profit = profit_points >= p['PROFIT_CLOSE']
+        hit_sl = np.where(is_long, low <= stop_loss, high >= stop_loss)
+        hit_tp = np.where(is_long, high >= take_profit[:, None], low <= take_profit[:, None])
+        hit_time = np.broadcast_to(np.arange(1, hold + 1) >= p['MAX_BARS_IN_TRADE'], close.shape)
+
+        hit_any = (hit_profit | hit_sl | hit_tp | hit_time) & valid
+        has_exit = hit_any.any(axis=1)
+        k = hit_any.argmax(axis=1)
+        rows = np.arange(n_entries)
+
+        # Mismo orden de prioridad que Backtester._update_positions
+        reason = np.select(
+            [hit_profit[rows, k], hit_sl[rows, k], hit_tp[rows, k]], [0, 1, 2], default=3
+        )
+        price = np.select(
+            [reason == 1, reason == 2],
+            [stop_loss[rows, k], take_profit],
+            default=close[rows, k]
+        )
+
+        reason = np.where(has_exit, reason, 4)
+        exit_bar = np.where(has_exit, self.fwd_bars[rows, k], self.n_bars)
+        price = np.where(has_exit, price, self.close[-1] if self.n_bars else np.nan)
+
+        return {'exit_bar': exit_bar, 'exit_price': price, 'reason': reason}
+
+    def simulate(self, exit_params=None):
+        """
+        Segunda pasada: recorre las entradas aplicando capital, bloqueo de posiciones
+        y pérdida diaria. Devuelve el mismo diccionario que Backtester._get_results.
+        """
+        p = self._exit_config(exit_params)
+        cfg = self.config
+        n = self.n_bars
+        default_equity = pd.DataFrame({'timestamp': [datetime.now()], 'equity': [cfg.INITIAL_CAPITAL]})
+
+        # Con un límite diario >= 0 Backtester bloquea todos los días desde la primera barra
+        if cfg.MAX_DAILY_LOSS >= 0:
+            return self._get_results([], float(cfg.INITIAL_CAPITAL), 0.0, default_equity)
+
+        exits = self.evaluate_exits(exit_params)
+
+        capital = float(cfg.INITIAL_CAPITAL)
+        capital_delta = np.zeros(n + 1)
+        floating = np.zeros(n)
+        unrecorded = np.zeros(n + 1, dtype=int)   # +1/-1 para marcar rangos sin registro de equity
+        skipped_bars = []
+        open_trades = []
+        trades = []
+        state = {'day': None, 'daily_profit': 0.0, 'capital': capital}
+
+        def close_trade(t, bar, price, reason, updates_at_bar):
+            if t['direction'] > 0:
+                pnl = (price - t['entry_price']) * t['size']
+            else:
+                pnl = (t['entry_price'] - price) * t['size']
+            net_pnl = pnl - t['size'] * price * cfg.COMMISSION
+
+            if state['day'] != self.day[min(bar, n - 1)]:
+                state['day'] = self.day[min(bar, n - 1)]
+                state['daily_profit'] = 0.0
+            state['capital'] += net_pnl
+            state['daily_profit'] += net_pnl
+            capital_delta[bar] += net_pnl
+
+            side = 'right' if updates_at_bar else 'left'
+            bars_held = (np.searchsorted(self.tradeable_idx, bar, side=side) if bar < n
+                         else len(self.tradeable_idx)) - t['pos']
+            start = t['bar'] + 1
+            floating[start:bar] += (
+                (self.close[start:bar] - t['entry_price']) * t['size'] if t['direction'] > 0
+                else (t['entry_price'] - self.close[start:bar]) * t['size']
+            )
+
+            trades.append({
+                'entry_time': self.index[t['bar']],
+                'exit_time': self.index[min(bar, n - 1)],
+                'entry_price': t['entry_price'],
+                'exit_price': price,
+                'direction': 'long' if t['direction'] > 0 else 'short',
+                'pnl': net_pnl,
+                'bars_held': bars_held,
+                'exit_reason': reason
+            })
+            open_trades.remove(t)
+
+        pending = {'bar': None}       # barra en la que se dispara el límite diario
+        blocked = {'from': n, 'to': -1}
+
+        def next_exit():
+            exits_left = [t['exit_bar'] for t in open_trades if t['exit_bar'] < n]
+            return min(exits_left) if exits_left else n
+
+        def advance(bar):
+            """Procesa en orden cronológico los cierres hasta la barra bar (incluida)"""
+            while True:
+                x = next_exit()
+
+                # Límite diario: al inicio de la barra se cierra todo y se bloquea el resto del día
+                trigger = pending['bar']
+                if trigger is not None and trigger <= bar and trigger <= x:
+                    for other in list(open_trades):
+                        close_trade(other, trigger, self.close[trigger], 'daily_loss', False)
+                    blocked['from'], blocked['to'] = trigger, self.day_last_bar[trigger]
+                    unrecorded[trigger] += 1
+                    unrecorded[blocked['to'] + 1] -= 1
+                    pending['bar'] = None
+                    continue
+
+                if x > bar:
+                    break
+
+                t = next(o for o in open_trades if o['exit_bar'] == x)
+                close_trade(t, x, t['exit_price'], EXIT_REASONS[t['reason']], True)
+
+                if (next_exit() != x and state['daily_profit'] <= cfg.MAX_DAILY_LOSS
+                        and x + 1 < n and self.day[x + 1] == self.day[x]):
+                    pending['bar'] = x + 1
+
+        for j, bar in enumerate(self.entries):
+            advance(bar)
+            if blocked['from'] <= bar <= blocked['to']:
+                continue
+            if len(open_trades) >= cfg.MAX_POSITIONS:
+                continue
+            direction = self.direction[j]
+            if cfg.SAME_DIRECTION_ONLY and open_trades and open_trades[0]['direction'] != direction:
+                skipped_bars.append(bar)
+                continue
+
+            price = self.entry_price[j]
+            size = state['capital'] * cfg.RISK_PER_TRADE / (p['ATR_STOP_MULTIPLIER'] * self.entry_atr[j])
+            size = min(size, 0.1 * 100000)
+            commission = size * price * cfg.COMMISSION
+            state['capital'] -= commission
+            capital_delta[bar] -= commission
+
+            open_trades.append({
+                'bar': bar, 'pos': self.entry_pos[j], 'direction': direction,
+                'entry_price': price, 'size': size,
+                'exit_bar': exits['exit_bar'][j], 'exit_price': exits['exit_price'][j],
+                'reason': exits['reason'][j]
+            })
+
+        advance(n - 1)
+        for t in sorted(open_trades, key=lambda o: o['bar']):
+            close_trade(t, n, self.close[-1], 'end', False)
+
+        # Curva de equity en las barras donde Backtester la registra
+        recorded = self.tradeable & (np.cumsum(unrecorded[:n]) == 0)
+        recorded[skipped_bars] = False
+        equity = float(cfg.INITIAL_CAPITAL) + np.cumsum(capital_delta[:n]) + floating
+        equity = equity[recorded]
+
+        peaks = np.maximum.accumulate(np.r_[float(cfg.INITIAL_CAPITAL), equity])[1:]
+        max_drawdown = max(0.0, ((peaks - equity) / peaks).max()) if len(equity) else 0.0
+
+        equity_df = pd.DataFrame({'timestamp': self.index[recorded], 'equity': equity}) if len(equity) else default_equity
+
+        return self._get_results(trades, state['capital'], max_drawdown, equity_df)
+
+    def _get_results(self, trades, capital, max_drawdown, equity_df):
+        """Métricas con el mismo formato que Backtester._get_results"""
+        initial = self.config.INITIAL_CAPITAL
+
+        if len(trades) == 0:
+            return {
+                'total_return': 0, 'total_trades': 0, 'win_rate': 0, 'avg_win': 0, 'avg_loss': 0,
+                'profit_factor': 0, 'max_drawdown': max_drawdown * 100, 'sharpe_ratio': 0,
+                'final_capital': capital, 'stop_reason': None, 'bars_saved': 0,
+                'trades_df': pd.DataFrame(), 'equity_df': equity_df
+            }
+
+        trades_df = pd.DataFrame(trades)
+        pnl = trades_df['pnl'].values
+        winning = pnl[pnl > 0]
+        losing = pnl[pnl <= 0]
+
+        gross_profit = winning.sum() if len(winning) > 0 else 0
+        gross_loss = abs(losing.sum()) if len(losing) > 0 else 1
+
+        equity_returns = equity_df['equity'].pct_change().dropna()
+        sharpe = (equity_returns.mean() / equity_returns.std()) * np.sqrt(252) if len(equity_returns) > 1 and equity_returns.std() > 0 else 0
+
+        return {
+            'total_return': ((capital - initial) / initial) * 100,
+            'total_trades': len(trades_df),
+            'win_rate': (len(winning) / len(trades_df)) * 100,
+            'avg_win': winning.mean() if len(winning) > 0 else 0,
+            'avg_loss': losing.mean() if len(losing) > 0 else 0,
+            'profit_factor': gross_profit / gross_loss,
+            'max_drawdown': max_drawdown * 100,
+            'sharpe_ratio': sharpe,
+            'final_capital': capital,
+            'stop_reason': None,
+            'bars_saved': 0,
+            'trades_df': trades_df,
+            'equity_df': equity_df
+        }
+
+# ============================================================================
+# SELECCIÓN MULTIOBJETIVO (FRENTE DE PARETO)
+# ============================================================================
+
+def _pareto_front_2d(values):
+    """Frente de dos objetivos en O(n log n): ordenar y recorrer con el máximo acumulado"""
+    a, b = values[:, 0], values[:, 1]
+    order = np.lexsort((-b, -a))
+    a, b = a[order], b[order]
+
+    group_start = np.r_[True, a[1:] != a[:-1]]
+    group_id = np.cumsum(group_start) - 1
+    group_best = b[group_start]                       # mejor b de cada grupo con igual a
+    best_before = np.r_[-np.inf, np.maximum.accumulate(group_best)[:-1]]
+
+    front_sorted = (b == group_best[group_id]) & (b > best_before[group_id])
+    mask = np.zeros(len(values), dtype=bool)
+    mask[order] = front_sorted
+    return mask
+
+def pareto_front_mask(values):
+    """
+    Máscara de puntos no dominados (todos los objetivos a maximizar).
+
+    Para k > 2 se recorren los puntos por suma descendente eliminando en bloque
+    los dominados por cada punto del frente: coste O(n · tamaño del frente).
+
+    Args:
+        values: Array (n, k); NaN se trata como el peor valor
+    """
+    values = np.where(np.isnan(values), -np.inf, np.asarray(values, dtype=float))
+    n, k = values.shape
+    if n == 0:
+        return np.zeros(0, dtype=bool)
+    if k == 1:
+        return values[:, 0] == values[:, 0].max()
+    if k == 2:
+        return _pareto_front_2d(values)
+
+    with np.errstate(invalid='ignore'):
+        sums = values.sum(axis=1)
+    order = np.argsort(-np.where(np.isnan(sums), -np.inf, sums), kind='stable')
+    points = values[order]
+    remaining = np.arange(n)
+
+    i = 0
+    while i < len(points):
+        dominated = np.all(points <= points[i], axis=1) & np.any(points < points[i], axis=1)
+        keep = ~dominated
+        points = points[keep]
+        remaining = remaining[keep]
+        i = np.count_nonzero(keep[:i]) + 1
+
+    mask = np.zeros(n, dtype=bool)
+    mask[order[remaining]] = True
+    return mask
+
+def non_dominated_sort(values, max_fronts=None):
+    """
+    Asigna a cada punto el índice de su frente (0 = frente de Pareto).
+    Los puntos fuera de los primeros max_fronts frentes quedan con -1.
+    """
+    values = np.asarray(values, dtype=float)
+    ranks = np.full(len(values), -1, dtype=int)
+    remaining = np.arange(len(values))
+
+    front = 0
+    while len(remaining) and (max_fronts is None or front < max_fronts):
+        mask = pareto_front_mask(values[remaining])
+        ranks[remaining[mask]] = front
+        remaining = remaining[~mask]
+        front += 1
+
+    return ranks
+
+def load_best_configs(filename):
+    """Lee el ranking de best_configs.json (formato actual o lista antigua)"""
+    with open(filename) as f:
+        data = json.load(f)
+    return data['ranking'] if isinstance(data, dict) else data
+
 # ============================================================================
 # SISTEMA DE OPTIMIZACIÓN
 # ============================================================================
@@ -603,38 +1796,65 @@ class StrategyOptimizer:
         self.opt_config = opt_config or OptimizationConfig()
         self.results = []
         self.data = None
+        self.dataset_info = None
+        self.halving_report = None
+        self.walk_forward_report = None
+        self.pruned_runs = []
+        self.state_results = []
+        self.exit_sweep_results = []
+        self.profiler = StageProfiler(self.opt_config.PROFILE_STAGES, self.opt_config.PROFILE_MEMORY)
+        self.sample_profile = None
+        self.symbol_data = {}
+        self.wall_time = None
+
+    def get_param_space(self):
+        """
+        Devuelve los valores posibles de cada parámetro (numéricos y booleanos)
+
+        Los valores repetidos (p.ej. [True, True] para fijar un booleano) se
+        quedan una vez, en su orden: el grid no repite combinaciones y TPE
+        no cuenta dos veces el mismo punto en el tamaño del espacio.
+        """
+        param_space = {}
 
-    def generate_param_combinations(self):
-        """Genera todas las combinaciones de parámetros"""
         # Parámetros numéricos
-        param_ranges = {}
         for param, (min_val, max_val, step) in self.opt_config.PARAMS_TO_OPTIMIZE.items():
-            if step == 0:
-                param_ranges[param] = [min_val]
-            else:
-                # Asegurar que incluimos el valor máximo
-                values = []
-                current = min_val
-                while current <= max_val:
-                    values.append(current)
-                    current += step
-                param_ranges[param] = values
+            param_space[param] = list(dict.fromkeys(self._expand_range(min_val, max_val, step)))
 
         # Parámetros booleanos
-        bool_ranges = {}
         for param, values in self.opt_config.BOOLEAN_PARAMS.items():
-            bool_ranges[param] = values
+            param_space[param] = list(dict.fromkeys(values))
+
+        return param_space
+
+    @staticmethod
+    def _expand_range(min_val, max_val, step):
+        """Convierte [min, max, step] en la lista de valores"""
+        if step == 0:
+            return [min_val]
+
+        # Asegurar que incluimos el valor máximo
+        values = []
+        current = min_val
+        while current <= max_val:
+            values.append(current)
+            current += step
+        return values
+
+    def generate_param_combinations(self):
+        """Genera todas las combinaciones de parámetros"""
+        param_space = self.get_param_space()
 
         # Combinar todos
-        all_param_names = list(param_ranges.keys()) + list(bool_ranges.keys())
-        all_param_values = list(param_ranges.values()) + list(bool_ranges.values())
+        all_param_names = list(param_space.keys())
+        all_param_values = list(param_space.values())
 
         # Generar combinaciones
         combinations = list(product(*all_param_values))
 
         print(f"\n🔬 Generando combinaciones de parámetros...")
-        print(f"   Parámetros numéricos: {len(param_ranges)}")
-        print(f"   Parámetros booleanos: {len(bool_ranges)}")
+        print(f"   Parámetros numéricos: {len(self.opt_config.PARAMS_TO_OPTIMIZE)}")
+        print(f"   Parámetros booleanos: {len(self.opt_config.BOOLEAN_PARAMS)}")
         print(f"   Total combinaciones: {len(combinations):,}")
 
         # Convertir a lista de diccionarios
@@ -659,25 +1879,238 @@ class StrategyOptimizer:
 
         return config
 
-    def run_single_backtest(self, params, df):
-        """Ejecuta un backtest con una configuración específica"""
+    def create_early_stop_rules(self, min_trades):
+        """Crea las reglas de parada anticipada según la configuración"""
+        cfg = self.opt_config
+        if not cfg.USE_EARLY_STOP:
+            return []
+
+        rules = []
+        if cfg.EARLY_STOP_MAX_DRAWDOWN is not None:
+            rules.append(MaxDrawdownStop(cfg.EARLY_STOP_MAX_DRAWDOWN))
+        if cfg.EARLY_STOP_MIN_TRADES and min_trades > 0:
+            rules.append(MinTradesStop(min_trades))
+        if cfg.EARLY_STOP_HEURISTIC_MIN_SHARPE is not None:
+            rules.append(SharpeHeuristicStop(cfg.EARLY_STOP_HEURISTIC_MIN_SHARPE))
+        return rules
+
+    def _ranking_stop_reason(self, result):
+        """
+        Equivalente de las reglas de parada anticipada sobre un resultado completo.
+        Para el drawdown y el mínimo de trades coincide con podar durante el backtest;
+        la heurística de Sharpe se reduce al Sharpe final (nunca poda de más).
+        """
+        cfg = self.opt_config
+        if not cfg.USE_EARLY_STOP:
+            return None
+        if cfg.EARLY_STOP_MAX_DRAWDOWN is not None and result['max_drawdown'] >= cfg.EARLY_STOP_MAX_DRAWDOWN * 100:
+            return MaxDrawdownStop.reason
+        if cfg.EARLY_STOP_MIN_TRADES and result['total_trades'] < cfg.MIN_TRADES_REQUIRED:
+            return MinTradesStop.reason
+        if cfg.EARLY_STOP_HEURISTIC_MIN_SHARPE is not None and result['sharpe_ratio'] < cfg.EARLY_STOP_HEURISTIC_MIN_SHARPE:
+            return SharpeHeuristicStop.reason
+        return None
+
+    def _filter_pruned(self, result):
+        """
+        Guarda los backtests podados aparte y devuelve None en su lugar.
+        Los resultados con 'backtest_state' se guardan todos en state_results y aquí se
+        les aplican la poda y el mínimo de trades (también tras extend_results).
+        """
+        if result is not None and 'backtest_state' in result:
+            self.state_results.append({k: v for k, v in result.items() if k not in ('trades_df', 'equity_df')})
+            reason = self._ranking_stop_reason(result)
+            if reason is not None:
+                result = {
+                    **{name: result[name] for name in self.get_param_space()},
+                    'stop_reason': reason,
+                    'bars_saved': 0,
+                    'total_trades': result['total_trades'],
+                    'max_drawdown': result['max_drawdown']
+                }
+            elif result['total_trades'] < self.opt_config.MIN_TRADES_REQUIRED:
+                return None
+        if result is not None and result.get('stop_reason') is not None:
+            self.pruned_runs.append(result)
+            return None
+        return result
+
+    def print_pruning_summary(self):
+        """Imprime cuántos backtests se podaron y cuántas barras se ahorraron"""
+        if not self.pruned_runs:
+            return
+
+        pruned_df = pd.DataFrame(self.pruned_runs)
+
+        print(f"\n✂️  Backtests podados: {len(pruned_df):,}")
+        for reason, count in pruned_df['stop_reason'].value_counts().items():
+            print(f"   {reason:.<30} {count:>8,}")
+        print(f"   Iteraciones de barras ahorradas: {int(pruned_df['bars_saved'].sum()):,}")
+
+    def _collect(self, item):
+        """Desempaqueta un resultado del pool acumulando sus estadísticas de etapa"""
+        if isinstance(item, ProfiledResult):
+            self.profiler.merge(item.stage_stats)
+            return item.result
+        return item
+
+    def print_stage_profile(self):
+        """Imprime tiempo, llamadas y pico de memoria por etapa (sumados entre procesos)"""
+        stats = self.profiler.stats
+        if not stats:
+            return
+
+        total_self = sum(stat['self_time'] for stat in stats.values()) or 1
+
+        print(f"\n⏱️  PERFIL POR ETAPA" + (f" (tiempo real {self.wall_time:.1f}s)" if self.wall_time else ""))
+        print(f"   {'Etapa':<30}{'Llamadas':>10}{'Total (s)':>12}{'Propio (s)':>12}{'%':>7}"
+              f"{'Media (ms)':>12}{'Pico (MB)':>11}")
+        for name, stat in sorted(stats.items(), key=lambda item: -item[1]['self_time']):
+            peak = f"{stat['peak_memory'] / 1e6:>11.1f}" if self.profiler.track_memory else f"{'-':>11}"
+            print(f"   {name:<30}{stat['calls']:>10,}{stat['total_time']:>12.2f}{stat['self_time']:>12.2f}"
+                  f"{stat['self_time'] / total_self * 100:>6.1f}%"
+                  f"{stat['total_time'] / stat['calls'] * 1000:>12.2f}{peak}")
+
+    def profile_sample_combination(self, params=None, df=None):
+        """
+        Perfil detallado (cProfile + tracemalloc) de una sola combinación
+
+        Args:
+            params: Combinación a perfilar (por defecto una al azar del espacio)
+            df: Datos con indicadores (por defecto self.data)
+        """
+        df = self.data if df is None else df
+        if params is None:
+            rng = np.random.default_rng(self.opt_config.TPE_SEED)
+            params = {name: values[rng.integers(len(values))] for name, values in self.get_param_space().items()}
+
+        top_n = self.opt_config.PROFILE_TOP_N
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        snapshot_before = tracemalloc.take_snapshot()
+
+        # La muestra no se suma al perfil por etapa
+        stage_profiler, self.profiler = self.profiler, StageProfiler(enabled=False)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+            self.run_single_backtest(params, df, indicators_ready=True, early_stop=False)
+        finally:
+            profile.disable()
+            self.profiler = stage_profiler
+
+        snapshot_after = tracemalloc.take_snapshot()
+        peak = tracemalloc.get_traced_memory()[1]
+        if not was_tracing:
+            tracemalloc.stop()
+
+        function_stats = pstats.Stats(profile).stats
+        top_functions = sorted(function_stats.items(), key=lambda item: -item[1][3])[:top_n]
+        allocations = snapshot_after.compare_to(snapshot_before, 'lineno')[:top_n]
+
+        self.sample_profile = {
+            'params': params,
+            'peak_memory': peak,
+            'functions': [
+                {'function': f"{os.path.basename(file)}:{line}({name})", 'calls': calls,
+                 'own_time': own, 'cumulative_time': cumulative}
+                for (file, line, name), (_, calls, own, cumulative, _) in top_functions
+            ],
+            'allocations': [
+                {'location': str(stat.traceback), 'size_diff': stat.size_diff, 'count_diff': stat.count_diff}
+                for stat in allocations
+            ]
+        }
+
+        print(f"\n🔍 PERFIL DE UNA COMBINACIÓN DE MUESTRA (pico {peak / 1e6:.1f} MB)")
+        print(f"   {'Función':<60}{'Llamadas':>10}{'Propio (s)':>12}{'Acum. (s)':>11}")
+        for entry in self.sample_profile['functions']:
+            print(f"   {entry['function'][:59]:<60}{entry['calls']:>10,}{entry['own_time']:>12.3f}"
+                  f"{entry['cumulative_time']:>11.3f}")
+        print(f"\n   {'Asignaciones (línea)':<60}{'KB':>10}{'Bloques':>12}")
+        for entry in self.sample_profile['allocations']:
+            print(f"   {entry['location'][-59:]:<60}{entry['size_diff'] / 1024:>10.1f}{entry['count_diff']:>12,}")
+
+        return self.sample_profile
+
+    def save_stage_profile(self, filename=None):
+        """Guarda el perfil por etapa (y el de la muestra, si existe) junto a OUTPUT_FILE"""
+        if not self.profiler.stats:
+            print("⚠️ No hay perfil por etapa para guardar.")
+            return
+
+        filename = filename or os.path.splitext(self.opt_config.OUTPUT_FILE)[0] + '_profile.json'
+        with open(filename, 'w') as f:
+            json.dump({
+                'wall_time': self.wall_time,
+                'track_memory': self.profiler.track_memory,
+                'stages': self.profiler.stats,
+                'sample': self.sample_profile
+            }, f, indent=4, default=str)
+
+        print(f"💾 Perfil por etapa guardado en: {filename}")
+
+    def run_single_backtest(self, params, df, indicators_ready=False, min_trades=None, early_stop=True,
+                            keep_state=False):
+        """
+        Ejecuta un backtest con una configuración específica
+
+        Args:
+            params: Parámetros a optimizar
+            df: Datos OHLCV
+            indicators_ready: Si df ya contiene los indicadores técnicos
+            min_trades: Mínimo de trades (por defecto MIN_TRADES_REQUIRED)
+            early_stop: Aplicar las reglas de parada anticipada
+            keep_state: Añadir 'backtest_state' al resultado para extenderlo con extend_results.
+                Se ejecuta sin parada anticipada y sin filtrar por min_trades: el estado se
+                guarda para toda combinación y _filter_pruned aplica ambos criterios al ordenar
+        """
+        if min_trades is None:
+            min_trades = self.opt_config.MIN_TRADES_REQUIRED
+
         try:
             # Crear configuración
             config = self.create_config_from_params(params)
 
             # Procesar datos
-            df_processed = calculate_volume_derivatives(df.copy(), config)
-            df_processed = add_technical_indicators(df_processed)
-            df_processed = generate_signals(df_processed, config)
+            profiler = self.profiler
+            with profiler.stage('calculate_volume_derivatives'):
+                df_processed = calculate_volume_derivatives(df.copy(), config)
+            if not indicators_ready:
+                with profiler.stage('add_technical_indicators'):
+                    df_processed = add_technical_indicators(df_processed)
+            with profiler.stage('generate_signals'):
+                df_processed = generate_signals(df_processed, config)
 
             # Ejecutar backtest
-            backtester = Backtester(config)
-            results = backtester.run(df_processed)
+            rules = self.create_early_stop_rules(min_trades) if early_stop and not keep_state else []
+            backtester = Backtester(config, rules, profiler=profiler)
+            with profiler.stage('Backtester.run'):
+                results = backtester.run(df_processed, keep_state=keep_state)
+
+            # Con estado: resultado completo aunque no llegue al mínimo (puede alcanzarlo al extender)
+            if keep_state:
+                del results['stop_reason'], results['bars_saved']
+                return {**params, **results,
+                        'backtest_state': self._make_backtest_state(backtester, df_processed)}
+
+            # Backtest podado: registro compacto con el motivo
+            if results['stop_reason'] is not None:
+                return {
+                    **params,
+                    'stop_reason': results['stop_reason'],
+                    'bars_saved': results['bars_saved'],
+                    'total_trades': results['total_trades'],
+                    'max_drawdown': results['max_drawdown']
+                }
 
             # Filtrar por número mínimo de trades
-            if results['total_trades'] < self.opt_config.MIN_TRADES_REQUIRED:
+            if results['total_trades'] < min_trades:
                 return None
 
+            del results['stop_reason'], results['bars_saved']
+
             # Añadir parámetros a resultados
             result = {**params, **results}
 
@@ -698,13 +2131,77 @@ class StrategyOptimizer:
         self.data = download_forex_data(
             self.opt_config.FIXED_PARAMS['SYMBOL'],
             self.opt_config.FIXED_PARAMS['PERIOD'],
-            self.opt_config.FIXED_PARAMS['INTERVAL']
+            self.opt_config.FIXED_PARAMS['INTERVAL'],
+            store_dir=self.opt_config.CANDLE_STORE_DIR,
+            source=self.opt_config.DATA_SOURCE,
+            volume_seed=self.opt_config.VOLUME_SEED
         )
+        self.dataset_info = describe_dataset(self.data)
+        print(f"   Fuente: {self.dataset_info['source']} | huella {self.dataset_info['fingerprint']} | "
+              f"{self.dataset_info['rows']:,} velas ({self.dataset_info['start']} → {self.dataset_info['end']})")
+        if self.dataset_info['quality']:
+            print(f"   Calidad: {format_quality_report(self.dataset_info['quality'])}")
+
+        self.profiler = StageProfiler(self.opt_config.PROFILE_STAGES, self.opt_config.PROFILE_MEMORY)
+        self.profiler.start()
+        start_time = time_module.perf_counter()
 
         # Procesar indicadores base
-        self.data = add_technical_indicators(self.data)
+        with self.profiler.stage('add_technical_indicators'):
+            self.data = add_technical_indicators(self.data)
+
+        self.pruned_runs = []
+        self.state_results = []
+
+        if self.opt_config.SEARCH_MODE == 'tpe':
+            self.results = self._optimize_tpe(self.data)
+        elif self.opt_config.SEARCH_MODE == 'halving':
+            self.results = self._optimize_halving(self.data)
+        elif self.opt_config.SEARCH_MODE == 'walk_forward':
+            self.results = self._optimize_walk_forward(self.data)
+        elif self.opt_config.SEARCH_MODE == 'distributed':
+            self.results = self._optimize_distributed(self.data)
+        elif self.opt_config.SEARCH_MODE == 'multi_symbol':
+            self.results = self._optimize_multi_symbol(self.data)
+        elif self.opt_config.SEARCH_MODE == 'multi_timeframe':
+            self.results = self._optimize_multi_timeframe(self.data)
+        else:
+            self.results = self._optimize_grid(self.data)
 
-        # Generar combinaciones
+        self.print_pruning_summary()
+
+        self.wall_time = time_module.perf_counter() - start_time
+        self.profiler.stop()
+        if self.opt_config.PROFILE_STAGES:
+            self.print_stage_profile()
+        if self.opt_config.PROFILE_SAMPLE:
+            self.profile_sample_combination()
+
+        return self.results
+
+    def _create_executor(self, df):
+        """Crea el pool de procesos si N_JOBS > 1"""
+        if self.opt_config.N_JOBS <= 1:
+            return None
+
+        return ProcessPoolExecutor(
+            max_workers=self.opt_config.N_JOBS,
+            initializer=_init_worker,
+            initargs=(self, df)
+        )
+
+    def _evaluate_batch(self, param_batch, df, executor=None):
+        """Evalúa un lote de configuraciones (en serie o en el pool)"""
+        if executor is None:
+            keep_state = self.opt_config.SAVE_BACKTEST_STATE
+            results = [self.run_single_backtest(params, df, keep_state=keep_state) for params in param_batch]
+        else:
+            results = list(map(self._collect, executor.map(_worker_run_backtest, param_batch)))
+
+        return [self._filter_pruned(result) for result in results]
+
+    def _optimize_grid(self, df):
+        """Búsqueda exhaustiva sobre todas las combinaciones"""
         param_combinations = self.generate_param_combinations()
 
         # Ejecutar backtests
@@ -712,23 +2209,857 @@ class StrategyOptimizer:
         print("   (Esto puede tomar varios minutos)")
 
         valid_results = []
+        executor = self._create_executor(df)
 
-        for i, params in enumerate(tqdm(param_combinations, desc="Progreso")):
-            result = self.run_single_backtest(params, self.data)
-
-            if result is not None:
-                valid_results.append(result)
-
-            # Mostrar progreso cada 100 iteraciones
-            if (i + 1) % 100 == 0:
-                print(f"\n   Completados: {i+1}/{len(param_combinations)} | Válidos: {len(valid_results)}")
-
-        self.results = valid_results
+        try:
+            if executor is None:
+                keep_state = self.opt_config.SAVE_BACKTEST_STATE
+                results_iter = (self.run_single_backtest(params, df, keep_state=keep_state)
+                                for params in param_combinations)
+            else:
+                chunksize = max(1, len(param_combinations) // (self.opt_config.N_JOBS * 8))
+                results_iter = map(self._collect, executor.map(_worker_run_backtest, param_combinations,
+                                                               chunksize=chunksize))
+
+            for i, result in enumerate(tqdm(results_iter, total=len(param_combinations), desc="Progreso")):
+                result = self._filter_pruned(result)
+                if result is not None:
+                    valid_results.append(result)
+
+                # Mostrar progreso cada 100 iteraciones
+                if (i + 1) % 100 == 0:
+                    print(f"\n   Completados: {i+1}/{len(param_combinations)} | Válidos: {len(valid_results)}")
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
         print(f"\n✅ Optimización completada!")
         print(f"   Total configuraciones probadas: {len(param_combinations):,}")
         print(f"   Configuraciones válidas (>{self.opt_config.MIN_TRADES_REQUIRED} trades): {len(valid_results)}")
 
+        return valid_results
+
+    def _optimize_tpe(self, df):
+        """Búsqueda secuencial basada en modelo (TPE) con presupuesto de evaluaciones"""
+        cfg = self.opt_config
+
+        sampler = TPESampler(
+            self.get_param_space(),
+            gamma=cfg.TPE_GAMMA,
+            n_startup=cfg.TPE_N_STARTUP,
+            n_candidates=cfg.TPE_N_CANDIDATES,
+            seed=cfg.TPE_SEED
+        )
+        budget = min(cfg.TPE_N_TRIALS, sampler.space_size)
+        batch_size = max(1, cfg.TPE_BATCH_SIZE)
+
+        print(f"\n🧠 Búsqueda TPE")
+        print(f"   Espacio total: {sampler.space_size:,} combinaciones")
+        print(f"   Presupuesto: {budget:,} backtests (lotes de {batch_size})")
+
+        valid_results = []
+        evaluated = 0
+        executor = self._create_executor(df)
+
+        try:
+            with tqdm(total=budget, desc="TPE") as pbar:
+                while evaluated < budget:
+                    batch = sampler.ask(min(batch_size, budget - evaluated))
+                    if not batch:
+                        break
+
+                    for params, result in zip(batch, self._evaluate_batch(batch, df, executor)):
+                        sampler.tell(params, result[cfg.TPE_METRIC] if result is not None else None)
+                        if result is not None:
+                            valid_results.append(result)
+
+                    evaluated += len(batch)
+                    pbar.update(len(batch))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best_score = max((score for _, score in sampler.history), default=-np.inf)
+
+        print(f"\n✅ Búsqueda TPE completada!")
+        print(f"   Configuraciones evaluadas: {evaluated:,} de {sampler.space_size:,}")
+        print(f"   Configuraciones válidas (>{cfg.MIN_TRADES_REQUIRED} trades): {len(valid_results)}")
+        if np.isfinite(best_score):
+            print(f"   Mejor {cfg.TPE_METRIC}: {best_score:.3f}")
+
+        return valid_results
+
+    def get_halving_rungs(self):
+        """Fracciones del histórico usadas en cada peldaño de successive halving"""
+        fractions = []
+        fraction = self.opt_config.HALVING_MIN_FRACTION
+        while fraction < 1.0:
+            fractions.append(fraction)
+            fraction *= self.opt_config.HALVING_ETA
+        fractions.append(1.0)
+        return fractions
+
+    def _optimize_halving(self, df):
+        """
+        Successive halving sobre la longitud de datos: todos los candidatos se
+        evalúan en una ventana reciente corta y solo el mejor 1/ETA pasa a
+        ventanas más largas, hasta el histórico completo.
+        """
+        cfg = self.opt_config
+        warmup = 100  # El Backtester empieza en la barra 100
+        usable_bars = len(df) - warmup
+        candidates = self.generate_param_combinations()
+        n_total = len(candidates)
+        fractions = self.get_halving_rungs()
+
+        print(f"\n🪜 Successive halving ({len(fractions)} peldaños, ETA={cfg.HALVING_ETA})")
+
+        bar_evaluations = 0
+        rung_stats = []
+        final_results = []
+        executor = self._create_executor(df)
+
+        try:
+            for rung, fraction in enumerate(fractions):
+                window = int(math.ceil(usable_bars * fraction))
+                start = max(0, len(df) - window - warmup)
+                min_trades = int(math.ceil(cfg.MIN_TRADES_REQUIRED * fraction))
+                tasks = [(params, start, None, min_trades) for params in candidates]
+
+                if executor is None:
+                    window_df = df.iloc[start:]
+                    rung_results = [
+                        self.run_single_backtest(params, window_df, indicators_ready=True, min_trades=min_trades)
+                        for params in candidates
+                    ]
+                else:
+                    rung_results = list(map(self._collect, executor.map(_worker_run_window, tasks)))
+                rung_results = [self._filter_pruned(result) for result in rung_results]
+
+                bar_evaluations += len(candidates) * (len(df) - start)
+
+                scored = [
+                    (result[cfg.HALVING_METRIC], params, result)
+                    for params, result in zip(candidates, rung_results)
+                    if result is not None
+                ]
+                scored.sort(key=lambda item: item[0], reverse=True)
+
+                rung_stats.append({
+                    'rung': rung,
+                    'fraction': fraction,
+                    'bars': len(df) - start,
+                    'candidates': len(candidates),
+                    'valid': len(scored)
+                })
+                print(f"   Peldaño {rung}: {len(candidates):,} candidatos × {len(df) - start:,} barras "
+                      f"({fraction:.0%}) | válidos: {len(scored):,}")
+
+                if fraction >= 1.0:
+                    final_results = [result for _, _, result in scored]
+                    break
+
+                n_keep = max(int(math.ceil(len(candidates) / cfg.HALVING_ETA)), cfg.TOP_N_RESULTS)
+                candidates = [params for _, params, _ in scored[:n_keep]]
+
+                if not candidates:
+                    break
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        full_grid_evaluations = n_total * len(df)
+        saved = 1 - bar_evaluations / full_grid_evaluations if full_grid_evaluations else 0
+
+        self.halving_report = {
+            'rungs': rung_stats,
+            'bar_evaluations': bar_evaluations,
+            'full_grid_bar_evaluations': full_grid_evaluations,
+            'compute_saved_pct': saved * 100,
+            'top_n_overlap': None
+        }
+
+        print(f"\n✅ Successive halving completado!")
+        print(f"   Barras evaluadas: {bar_evaluations:,} vs {full_grid_evaluations:,} del grid completo")
+        print(f"   Cómputo ahorrado: {saved:.1%}")
+        print(f"   Configuraciones válidas en histórico completo: {len(final_results)}")
+
+        if cfg.HALVING_COMPARE_GRID:
+            self._compare_halving_with_grid(df, final_results)
+
+        return final_results
+
+    def _compare_halving_with_grid(self, df, halving_results):
+        """Compara el top-N de successive halving con el de un grid exhaustivo"""
+        cfg = self.opt_config
+        param_names = list(self.get_param_space().keys())
+
+        def top_keys(results):
+            ranked = sorted(results, key=lambda r: r[cfg.HALVING_METRIC], reverse=True)
+            return {tuple(r[name] for name in param_names) for r in ranked[:cfg.TOP_N_RESULTS]}
+
+        print(f"\n🔍 Ejecutando grid completo para comparar...")
+        grid_results = self._optimize_grid(df)
+
+        halving_top = top_keys(halving_results)
+        grid_top = top_keys(grid_results)
+        overlap = len(halving_top & grid_top) / len(grid_top) if grid_top else 0
+
+        self.halving_report['top_n_overlap'] = overlap * 100
+        print(f"   Coincidencia top-{cfg.TOP_N_RESULTS} con grid completo: {overlap:.0%}")
+
+    def get_walk_forward_folds(self, n_bars, warmup=100):
+        """
+        Calcula los índices (is_start, is_end, oos_start, oos_end) de cada fold.
+        Las ventanas OOS son consecutivas y cubren el final del histórico.
+        """
+        cfg = self.opt_config
+        usable = n_bars - warmup
+        oos_bars = int(usable * cfg.WF_OOS_FRACTION)
+        is_bars = usable - cfg.WF_N_FOLDS * oos_bars
+
+        if oos_bars < 1 or is_bars < 1:
+            raise ValueError("Datos insuficientes para el walk-forward configurado")
+
+        folds = []
+        for k in range(cfg.WF_N_FOLDS):
+            oos_start = warmup + is_bars + k * oos_bars
+            is_start = warmup if cfg.WF_ANCHORED else warmup + k * oos_bars
+            folds.append((is_start, oos_start, oos_start, oos_start + oos_bars))
+
+        return folds
+
+    def _optimize_walk_forward(self, df):
+        """
+        Walk-forward: optimiza cada ventana in-sample y evalúa la mejor config
+        en la ventana out-of-sample siguiente. Los indicadores se calculan una
+        sola vez sobre todo el histórico y cada ventana es un slice.
+        """
+        cfg = self.opt_config
+        warmup = 100
+        param_combinations = self.generate_param_combinations()
+        folds = self.get_walk_forward_folds(len(df), warmup)
+
+        print(f"\n🚶 Walk-forward {'anclado' if cfg.WF_ANCHORED else 'móvil'}: "
+              f"{len(folds)} folds × {len(param_combinations):,} combinaciones")
+
+        # Todas las tareas in-sample de todos los folds van al mismo pool
+        tasks = []
+        for is_start, is_end, _, _ in folds:
+            min_trades = int(math.ceil(cfg.MIN_TRADES_REQUIRED * (is_end - is_start) / (len(df) - warmup)))
+            tasks.extend((params, is_start - warmup, is_end, min_trades) for params in param_combinations)
+
+        executor = self._create_executor(df)
+        try:
+            if executor is None:
+                is_results = [
+                    self.run_single_backtest(params, df.iloc[start:end], indicators_ready=True, min_trades=min_trades)
+                    for params, start, end, min_trades in tqdm(tasks, desc="In-sample")
+                ]
+            else:
+                chunksize = max(1, len(tasks) // (cfg.N_JOBS * 8))
+                is_results = list(tqdm(map(self._collect, executor.map(_worker_run_window, tasks, chunksize=chunksize)),
+                                       total=len(tasks), desc="In-sample"))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        is_results = [self._filter_pruned(result) for result in is_results]
+
+        param_names = list(self.get_param_space().keys())
+        oos_results = []
+        fold_rows = []
+        stitched = []
+        running_capital = cfg.FIXED_PARAMS['INITIAL_CAPITAL']
+
+        for k, (is_start, is_end, oos_start, oos_end) in enumerate(folds):
+            fold_is = [
+                r for r in is_results[k * len(param_combinations):(k + 1) * len(param_combinations)]
+                if r is not None
+            ]
+            if not fold_is:
+                print(f"   Fold {k}: sin configuraciones válidas in-sample")
+                continue
+
+            best = max(fold_is, key=lambda r: r[cfg.WF_METRIC])
+            params = {name: best[name] for name in param_names}
+
+            oos = self.run_single_backtest(
+                params, df.iloc[oos_start - warmup:oos_end],
+                indicators_ready=True, min_trades=0, early_stop=False
+            )
+            if oos is None:
+                continue
+
+            oos_equity = oos['equity_df'][['timestamp', 'equity']].copy()
+            oos_equity['equity'] = oos_equity['equity'] / cfg.FIXED_PARAMS['INITIAL_CAPITAL'] * running_capital
+            running_capital = oos_equity['equity'].iloc[-1]
+            stitched.append(oos_equity)
+
+            oos_results.append({**oos, 'fold': k})
+            fold_rows.append({
+                'fold': k,
+                'is_start': df.index[is_start],
+                'is_end': df.index[is_end - 1],
+                'oos_start': df.index[oos_start],
+                'oos_end': df.index[oos_end - 1],
+                f'is_{cfg.WF_METRIC}': best[cfg.WF_METRIC],
+                f'oos_{cfg.WF_METRIC}': oos[cfg.WF_METRIC],
+                'oos_return': oos['total_return'],
+                'oos_trades': oos['total_trades'],
+                **params
+            })
+
+            print(f"   Fold {k}: IS {cfg.WF_METRIC}={best[cfg.WF_METRIC]:.3f} | "
+                  f"OOS {cfg.WF_METRIC}={oos[cfg.WF_METRIC]:.3f} | OOS return={oos['total_return']:.2f}%")
+
+        folds_df = pd.DataFrame(fold_rows)
+        oos_equity_df = pd.concat(stitched, ignore_index=True) if stitched else pd.DataFrame(columns=['timestamp', 'equity'])
+
+        # Estabilidad de parámetros: fracción de folds que coinciden con el valor más frecuente
+        stability = {}
+        for name in param_names:
+            if name in folds_df:
+                values = folds_df[name]
+                stability[name] = {
+                    'unique_values': int(values.nunique()),
+                    'mode': values.mode().iloc[0],
+                    'agreement': float((values == values.mode().iloc[0]).mean())
+                }
+
+        oos_summary = {}
+        if len(oos_equity_df) > 1:
+            equity = oos_equity_df['equity']
+            returns = equity.pct_change().dropna()
+            oos_summary = {
+                'total_return': (equity.iloc[-1] / cfg.FIXED_PARAMS['INITIAL_CAPITAL'] - 1) * 100,
+                'max_drawdown': float((1 - equity / equity.cummax()).max() * 100),
+                'sharpe_ratio': float(returns.mean() / returns.std() * np.sqrt(252)) if returns.std() > 0 else 0
+            }
+
+        self.walk_forward_report = {
+            'folds': folds_df,
+            'oos_equity': oos_equity_df,
+            'param_stability': stability,
+            'oos_summary': oos_summary
+        }
+
+        print(f"\n✅ Walk-forward completado!")
+        if oos_summary:
+            print(f"   OOS encadenado: return={oos_summary['total_return']:.2f}% | "
+                  f"max DD={oos_summary['max_drawdown']:.2f}% | sharpe={oos_summary['sharpe_ratio']:.3f}")
+        for name, info in stability.items():
+            print(f"   {name:.<30} coincidencia {info['agreement']:>5.0%} ({info['unique_values']} valores)")
+
+        return oos_results
+
+    def save_walk_forward_report(self, filename=None):
+        """Guarda el reporte walk-forward (folds, estabilidad y equity OOS) en JSON"""
+        if not self.walk_forward_report:
+            print("⚠️ No hay reporte walk-forward para guardar.")
+            return
+
+        filename = filename or self.opt_config.WF_REPORT_FILE
+        report = self.walk_forward_report
+
+        with open(filename, 'w') as f:
+            json.dump({
+                'folds': report['folds'].to_dict('records'),
+                'param_stability': report['param_stability'],
+                'oos_summary': report['oos_summary'],
+                'oos_equity': report['oos_equity'].to_dict('records')
+            }, f, indent=4, default=str)
+
+        print(f"💾 Reporte walk-forward guardado en: {filename}")
+
+    def load_symbol_datasets(self, primary_df=None):
+        """
+        Descarga cada símbolo de SYMBOLS y calcula sus indicadores una sola vez (caché por símbolo)
+
+        Args:
+            primary_df: Datos ya procesados de FIXED_PARAMS['SYMBOL'], para no descargarlos de nuevo
+        """
+        cfg = self.opt_config
+        datasets = {}
+        fingerprints = {}
+
+        for symbol in cfg.SYMBOLS:
+            if symbol == cfg.FIXED_PARAMS['SYMBOL'] and primary_df is not None:
+                datasets[symbol] = primary_df
+                fingerprints[symbol] = (self.dataset_info or {}).get('fingerprint')
+                continue
+
+            try:
+                df = download_forex_data(symbol, cfg.FIXED_PARAMS['PERIOD'], cfg.FIXED_PARAMS['INTERVAL'],
+                                         store_dir=cfg.CANDLE_STORE_DIR, source=cfg.DATA_SOURCE,
+                                         volume_seed=cfg.VOLUME_SEED)
+                fingerprints[symbol] = describe_dataset(df)['fingerprint']
+                with self.profiler.stage('add_technical_indicators'):
+                    datasets[symbol] = add_technical_indicators(df)
+            except Exception as e:
+                print(f"   ⚠️ Error descargando {symbol}: {str(e)}")
+
+        for symbol, df in datasets.items():
+            print(f"   {symbol:.<20} {len(df):>8,} barras  (huella {fingerprints.get(symbol)})")
+
+        return datasets
+
+    def _optimize_multi_symbol(self, df):
+        """
+        Mismo grid sobre varios símbolos con un único pool de procesos.
+        Las tareas (símbolo, combinación) se ordenan con los datasets más largos primero
+        para que los trabajos más pesados no queden al final con cores ociosos.
+        """
+        cfg = self.opt_config
+
+        print(f"\n🌐 Optimización multi-símbolo: {', '.join(cfg.SYMBOLS)}")
+        self.symbol_data = self.load_symbol_datasets(primary_df=df)
+        if not self.symbol_data:
+            print("⚠️ No se pudo cargar ningún símbolo.")
+            return []
+
+        return self._optimize_datasets(self.symbol_data, 'símbolos')
+
+    def load_timeframe_datasets(self, df):
+        """
+        Deriva cada timeframe de TIMEFRAMES de las velas base (sin descargas adicionales)
+        y calcula sus indicadores. Las claves son 'SÍMBOLO@timeframe'.
+        """
+        cfg = self.opt_config
+        symbol = cfg.FIXED_PARAMS['SYMBOL']
+        base_interval = cfg.FIXED_PARAMS['INTERVAL']
+        resampler = Resampler(cfg.RESAMPLE_CACHE_DIR)
+        datasets = {}
+
+        for timeframe in cfg.TIMEFRAMES:
+            if rule_to_ns(timeframe) == rule_to_ns(base_interval):
+                datasets[f"{symbol}@{timeframe}"] = df
+                continue
+
+            if rule_to_ns(timeframe) % rule_to_ns(base_interval) != 0:
+                print(f"   ⚠️ {timeframe} no es múltiplo de {base_interval}, se omite")
+                continue
+
+            with self.profiler.stage('resample'):
+                bars = resampler.resample(df[['Open', 'High', 'Low', 'Close', 'Volume']], timeframe,
+                                          align=cfg.RESAMPLE_ALIGN,
+                                          session_tz=cfg.RESAMPLE_SESSION_TZ,
+                                          session_start=cfg.RESAMPLE_SESSION_START)
+            with self.profiler.stage('add_technical_indicators'):
+                datasets[f"{symbol}@{timeframe}"] = add_technical_indicators(bars)
+
+        for label, data in datasets.items():
+            print(f"   {label:.<20} {len(data):>8,} barras")
+
+        return datasets
+
+    def _optimize_multi_timeframe(self, df):
+        """Mismo grid sobre varios timeframes del símbolo, en el pool de multi_symbol"""
+        print(f"\n🕐 Optimización multi-timeframe: {', '.join(self.opt_config.TIMEFRAMES)} "
+              f"(desde {self.opt_config.FIXED_PARAMS['INTERVAL']})")
+        self.symbol_data = self.load_timeframe_datasets(df)
+        if not self.symbol_data:
+            print("⚠️ No se pudo derivar ningún timeframe.")
+            return []
+
+        return self._optimize_datasets(self.symbol_data, 'timeframes')
+
+    def _optimize_datasets(self, datasets, label):
+        """
+        Grid completo sobre cada dataset de `datasets` en un único pool.
+        Cada resultado se etiqueta con su clave en result['symbol'].
+        """
+        cfg = self.opt_config
+
+        param_combinations = self.generate_param_combinations()
+        symbols = sorted(datasets, key=lambda symbol: -len(datasets[symbol]))
+        tasks = [(symbol, params) for symbol in symbols for params in param_combinations]
+
+        print(f"\n🚀 Ejecutando {len(tasks):,} backtests ({len(symbols)} {label} × {len(param_combinations):,})...")
+
+        valid_results = []
+        executor = self._create_executor(datasets)
+
+        try:
+            if executor is None:
+                results_iter = (self.run_single_backtest(params, datasets[symbol], indicators_ready=True)
+                                for symbol, params in tasks)
+            else:
+                chunksize = max(1, len(tasks) // (cfg.N_JOBS * 8))
+                results_iter = map(self._collect, executor.map(_worker_run_symbol, tasks, chunksize=chunksize))
+
+            for (symbol, _), result in zip(tasks, tqdm(results_iter, total=len(tasks), desc="Progreso")):
+                if result is not None:
+                    result['symbol'] = symbol
+                result = self._filter_pruned(result)
+                if result is not None:
+                    valid_results.append(result)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        print(f"\n✅ Optimización por {label} completada!")
+        for symbol in symbols:
+            n_valid = sum(1 for result in valid_results if result['symbol'] == symbol)
+            print(f"   {symbol:.<20} {n_valid:>8,} configuraciones válidas")
+
+        return valid_results
+
+    def get_symbol_top_configs(self, metric=None, top_n=None):
+        """Mejores configuraciones de cada símbolo"""
+        metric = metric or self.opt_config.MULTI_SYMBOL_METRIC
+        top_n = top_n or self.opt_config.TOP_N_RESULTS
+
+        results_df = pd.DataFrame(self.results)
+        if results_df.empty or 'symbol' not in results_df:
+            return {}
+
+        return {
+            symbol: group.sort_values(metric, ascending=False).head(top_n)
+            for symbol, group in results_df.groupby('symbol')
+        }
+
+    def get_cross_symbol_ranking(self, metric=None, top_n=None):
+        """
+        Configuraciones válidas en todos los símbolos, ordenadas por el percentil medio
+        de su ranking en cada símbolo (y por el peor percentil en caso de empate)
+        """
+        metric = metric or self.opt_config.MULTI_SYMBOL_METRIC
+        top_n = top_n or self.opt_config.TOP_N_RESULTS
+
+        results_df = pd.DataFrame(self.results)
+        if results_df.empty or 'symbol' not in results_df:
+            return pd.DataFrame()
+
+        param_names = [name for name in self.get_param_space() if name in results_df]
+        n_symbols = results_df['symbol'].nunique()
+        results_df['rank_pct'] = results_df.groupby('symbol')[metric].rank(pct=True)
+
+        ranking = results_df.groupby(param_names).agg(
+            symbols=('symbol', 'nunique'),
+            mean_rank_pct=('rank_pct', 'mean'),
+            worst_rank_pct=('rank_pct', 'min'),
+            **{f'mean_{metric}': (metric, 'mean'), f'worst_{metric}': (metric, 'min')}
+        ).reset_index()
+
+        ranking = ranking[ranking['symbols'] == n_symbols]
+        return ranking.sort_values(['mean_rank_pct', 'worst_rank_pct'], ascending=False).head(top_n)
+
+    def print_multi_symbol_report(self, top_n=5):
+        """Imprime el top de cada símbolo y las configuraciones robustas entre símbolos"""
+        metric = self.opt_config.MULTI_SYMBOL_METRIC
+        per_symbol = self.get_symbol_top_configs(top_n=top_n)
+        if not per_symbol:
+            return
+
+        print(f"\n" + "="*80)
+        print(f"  TOP {top_n} POR SÍMBOLO (ordenadas por {metric.upper()})")
+        print("="*80)
+        for symbol, top in per_symbol.items():
+            print(f"\n💱 {symbol}")
+            for _, row in top.iterrows():
+                print(f"   Sharpe {row['sharpe_ratio']:>7.3f} | Return {row['total_return']:>8.2f}% | "
+                      f"DD {row['max_drawdown']:>6.2f}% | Trades {row['total_trades']:>5.0f}")
+
+        cross = self.get_cross_symbol_ranking(top_n=top_n)
+        print(f"\n🌐 CONFIGURACIONES ROBUSTAS EN TODOS LOS SÍMBOLOS")
+        if cross.empty:
+            print("   Ninguna configuración es válida en todos los símbolos")
+        for idx, (_, row) in enumerate(cross.iterrows(), 1):
+            params = ", ".join(f"{name}={row[name]}" for name in self.get_param_space() if name in row)
+            print(f"   #{idx} percentil medio {row['mean_rank_pct']:.2f} (peor {row['worst_rank_pct']:.2f}) | "
+                  f"{metric} medio {row[f'mean_{metric}']:.3f}")
+            print(f"      {params}")
+
+        print("\n" + "="*80)
+
+    def save_multi_symbol_report(self, filename=None):
+        """Guarda el top por símbolo y el ranking entre símbolos en JSON"""
+        per_symbol = self.get_symbol_top_configs()
+        if not per_symbol:
+            print("⚠️ No hay resultados multi-símbolo para guardar.")
+            return
+
+        filename = filename or self.opt_config.MULTI_SYMBOL_REPORT_FILE
+        with open(filename, 'w') as f:
+            json.dump({
+                'metric': self.opt_config.MULTI_SYMBOL_METRIC,
+                'bars': {symbol: len(df) for symbol, df in self.symbol_data.items()},
+                'per_symbol': {symbol: self._to_records(top) for symbol, top in per_symbol.items()},
+                'cross_symbol': self.get_cross_symbol_ranking().to_dict('records')
+            }, f, indent=4, default=str)
+
+        print(f"💾 Reporte multi-símbolo guardado en: {filename}")
+
+    def _optimize_distributed(self, df):
+        """
+        Coordinador: publica lotes de combinaciones y la huella del dataset en una
+        cola TCP; los workers (locales o en otras máquinas) devuelven resultados compactos.
+        """
+        cfg = self.opt_config
+        param_combinations = self.generate_param_combinations()
+        batches = [
+            param_combinations[i:i + cfg.DIST_BATCH_SIZE]
+            for i in range(0, len(param_combinations), cfg.DIST_BATCH_SIZE)
+        ]
+
+        fingerprint = dataset_fingerprint(df)
+        job_info = {
+            'fingerprint': fingerprint,
+            'config': {k: getattr(cfg, k) for k in dir(cfg) if k.isupper() and k != 'DIST_AUTHKEY'}
+        }
+        queue = JobQueue(job_info, df, batches, lease_timeout=cfg.DIST_LEASE_TIMEOUT)
+
+        authkey = coordinator_authkey(cfg.DIST_AUTHKEY, cfg.DIST_ADDRESS[0])
+        OptimizationQueueManager.register('get_queue', callable=lambda: queue)
+        manager = OptimizationQueueManager(address=tuple(cfg.DIST_ADDRESS), authkey=authkey.encode())
+        server = manager.get_server()
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        host, port = server.address
+
+        print(f"\n🛰️  Coordinador escuchando en {host}:{port}")
+        print(f"   Dataset: {fingerprint} ({len(df):,} barras)")
+        print(f"   Lotes: {len(batches):,} de hasta {cfg.DIST_BATCH_SIZE} combinaciones")
+        if _is_loopback(host):
+            print(f"   Workers: solo locales (DIST_ADDRESS en loopback)")
+        else:
+            print(f"   Workers: OPTIMIZER_AUTHKEY=<clave> python Optimizing.py --worker <host>:{port}")
+
+        local_workers = []
+        for n in range(cfg.DIST_LOCAL_WORKERS):
+            worker = multiprocessing.Process(
+                target=run_distributed_worker,
+                args=(('127.0.0.1', port), authkey, cfg.DIST_CACHE_DIR, f"local-{n}")
+            )
+            worker.start()
+            local_workers.append(worker)
+
+        try:
+            with tqdm(total=len(batches), desc="Lotes") as pbar:
+                while not queue.is_finished():
+                    time_module.sleep(0.5)
+                    queue.requeue_expired()
+                    pbar.update(queue.progress()['completed'] - pbar.n)
+        finally:
+            for worker in local_workers:
+                worker.join(timeout=10)
+                if worker.is_alive():
+                    worker.terminate()
+            server.stop_event.set()
+            server.listener.close()
+
+        valid_results = []
+        for batch_id in sorted(queue.results):
+            for result in queue.results[batch_id]:
+                result = self._filter_pruned(result)
+                if result is not None:
+                    valid_results.append(result)
+
+        progress = queue.progress()
+        print(f"\n✅ Optimización distribuida completada!")
+        print(f"   Workers participantes: {progress['workers']}")
+        print(f"   Lotes re-encolados: {progress['requeued']}")
+        print(f"   Configuraciones válidas (>{cfg.MIN_TRADES_REQUIRED} trades): {len(valid_results)}")
+
+        return valid_results
+
+    def sweep_exit_rules(self, entry_params, df=None, exit_param_space=None, min_trades=None):
+        """
+        Barre reglas de salida manteniendo fijas las entradas de entry_params.
+        Las señales se calculan una sola vez y cada regla de salida se evalúa con
+        ExitRuleSweep en lugar de repetir el pipeline completo.
+
+        Args:
+            entry_params: Parámetros de la config base (los de salida se sustituyen)
+            df: Datos con indicadores (por defecto self.data)
+            exit_param_space: {param: [min, max, step]} (por defecto EXIT_SWEEP_PARAMS)
+            min_trades: Mínimo de trades (por defecto MIN_TRADES_REQUIRED)
+        """
+        df = self.data if df is None else df
+        if min_trades is None:
+            min_trades = self.opt_config.MIN_TRADES_REQUIRED
+
+        space = exit_param_space or self.opt_config.EXIT_SWEEP_PARAMS
+        exit_space = {name: self._expand_range(*bounds) for name, bounds in space.items()}
+        names = list(exit_space.keys())
+        exit_combos = [dict(zip(names, values)) for values in product(*exit_space.values())]
+
+        config = self.create_config_from_params(entry_params)
+        df_processed = calculate_volume_derivatives(df.copy(), config)
+        df_processed = generate_signals(df_processed, config)
+
+        max_hold = max(combo.get('MAX_BARS_IN_TRADE', config.MAX_BARS_IN_TRADE) for combo in exit_combos)
+        sweep = ExitRuleSweep(df_processed, config, max_hold=max_hold)
+
+        print(f"\n🚪 Barrido de reglas de salida: {len(exit_combos):,} configuraciones "
+              f"sobre {len(sweep.entries):,} entradas candidatas")
+
+        start = time_module.perf_counter()
+        results = []
+        for exit_params in tqdm(exit_combos, desc="Salidas"):
+            try:
+                metrics = sweep.simulate(exit_params)
+            except Exception as e:
+                print(f"   ⚠️ Error en barrido de salida: {str(e)}")
+                continue
+
+            if metrics['total_trades'] < min_trades:
+                continue
+
+            del metrics['stop_reason'], metrics['bars_saved']
+            results.append({**entry_params, **exit_params, **metrics})
+
+        elapsed = time_module.perf_counter() - start
+        print(f"   ✅ {len(results):,} configuraciones válidas en {elapsed:.1f}s "
+              f"({elapsed / max(1, len(exit_combos)) * 1000:.1f} ms/config)")
+
+        self.exit_sweep_results = results
+        return results
+
+    def save_exit_sweep_results(self, filename=None):
+        """Guarda el barrido de salidas a CSV"""
+        if not self.exit_sweep_results:
+            print("⚠️ No hay resultados de barrido de salidas para guardar.")
+            return
+
+        filename = filename or self.opt_config.EXIT_SWEEP_FILE
+        sweep_df = pd.DataFrame(self.exit_sweep_results).drop(columns=['trades_df', 'equity_df'])
+        sweep_df = sweep_df.sort_values('sharpe_ratio', ascending=False)
+        sweep_df.to_csv(filename, index=False)
+        print(f"💾 Barrido de salidas guardado en: {filename}")
+
+    def _make_backtest_state(self, backtester, df_processed):
+        """Estado necesario para extender un resultado: backtester, normalización de volumen y contador"""
+        return {
+            'backtester': backtester.state,
+            'norm_stats': get_volume_norm_stats(df_processed),
+            'consec': int(df_processed['Consecutive_Accel'].iloc[-1]),
+            'n_bars': len(df_processed),
+            'last_timestamp': df_processed.index[-1]
+        }
+
+    def extend_single_result(self, params, state, df):
+        """
+        Continúa el backtest de una combinación con las barras de df posteriores a su estado.
+        Solo se recalculan derivadas de volumen y señales de la cola (más un pequeño margen).
+
+        Args:
+            params: Parámetros de la combinación
+            state: 'backtest_state' del resultado guardado
+            df: Histórico completo (anterior + nuevo) con indicadores técnicos
+        """
+        try:
+            n_old = state['n_bars']
+            if df.index[n_old - 1] != state['last_timestamp']:
+                raise ValueError("las barras nuevas no continúan el histórico del estado guardado")
+
+            config = self.create_config_from_params(params)
+
+            # Margen para el suavizado y las dos diferencias de volumen
+            lookback = min(n_old, config.VOLUME_SMOOTH_PERIODS + 2)
+            tail = calculate_volume_derivatives(df.iloc[n_old - lookback:], config, state['norm_stats'])
+            tail.iloc[lookback:, tail.columns.get_loc('Consecutive_Accel')] = consecutive_accel(
+                tail['Accel_Positive'].values[lookback:],
+                tail['Accel_Negative'].values[lookback:],
+                state['consec']
+            )
+            tail = generate_signals(tail, config)
+
+            backtester = Backtester(config)
+            results = backtester.resume(tail, state['backtester'], start=lookback, keep_state=True)
+            del results['stop_reason'], results['bars_saved']
+
+            new_state = self._make_backtest_state(backtester, tail)
+            new_state['norm_stats'] = state['norm_stats']
+            new_state['n_bars'] = len(df)
+
+            return {**params, **results, 'backtest_state': new_state}
+
+        except Exception as e:
+            print(f"   ⚠️ Error extendiendo backtest: {str(e)}")
+            return None
+
+    def extend_results(self, new_bars):
+        """
+        Extiende todas las combinaciones evaluadas con velas nuevas en lugar de repetir la optimización.
+        Las barras nuevas se normalizan con las estadísticas de volumen del histórico original.
+        La poda y el mínimo de trades se aplican después de extender, así que entra en el
+        ranking una combinación que alcanza MIN_TRADES_REQUIRED con las barras nuevas.
+
+        Args:
+            new_bars: Velas OHLCV; se ignoran las anteriores o iguales a la última barra procesada
+        """
+        states = self.state_results
+        if not states:
+            print("⚠️ No hay combinaciones con estado guardado (SAVE_BACKTEST_STATE = True).")
+            return self.results
+
+        ohlcv = self.data[['Open', 'High', 'Low', 'Close', 'Volume']]
+        new_bars = new_bars.loc[new_bars.index > ohlcv.index[-1], ohlcv.columns]
+        if new_bars.empty:
+            print("ℹ️ No hay barras nuevas.")
+            return self.results
+
+        print(f"\n➕ Extendiendo {len(states):,} combinaciones con {len(new_bars):,} barras nuevas "
+              f"({new_bars.index[0]} → {new_bars.index[-1]})")
+        start_time = time_module.perf_counter()
+
+        self.data = add_technical_indicators(pd.concat([ohlcv, new_bars]))
+        param_names = list(self.get_param_space().keys())
+        tasks = [({name: r[name] for name in param_names}, r['backtest_state']) for r in states]
+
+        executor = self._create_executor(self.data)
+        try:
+            if executor is None:
+                results_iter = (self.extend_single_result(params, state, self.data) for params, state in tasks)
+            else:
+                chunksize = max(1, len(tasks) // (self.opt_config.N_JOBS * 8))
+                results_iter = map(self._collect, executor.map(_worker_extend_result, tasks, chunksize=chunksize))
+
+            extended = [r for r in tqdm(results_iter, total=len(tasks), desc="Extendiendo") if r is not None]
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        elapsed = time_module.perf_counter() - start_time
+
+        self.state_results = []
+        self.pruned_runs = []
+        self.results = [r for r in map(self._filter_pruned, extended) if r is not None]
+
+        print(f"   ✅ {len(extended):,} combinaciones actualizadas en {elapsed:.1f}s | "
+              f"válidas (>{self.opt_config.MIN_TRADES_REQUIRED} trades): {len(self.results):,}")
+        self.print_pruning_summary()
+        return self.results
+
+    def save_backtest_states(self, filename=None):
+        """Guarda datos OHLCV y el estado de todas las combinaciones evaluadas para extenderlas más adelante"""
+        if not self.state_results:
+            print("⚠️ No hay estados de backtest para guardar.")
+            return
+
+        filename = filename or self.opt_config.BACKTEST_STATE_FILE
+        with open(filename, 'wb') as f:
+            pickle.dump({
+                'data': self.data[['Open', 'High', 'Low', 'Close', 'Volume']],
+                'results': self.state_results
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        print(f"💾 Estados de backtest guardados en: {filename}")
+
+    def load_backtest_states(self, filename=None):
+        """Carga datos y resultados guardados con save_backtest_states"""
+        filename = filename or self.opt_config.BACKTEST_STATE_FILE
+        with open(filename, 'rb') as f:
+            saved = pickle.load(f)
+
+        self.data = saved['data']
+        self.state_results = []
+        self.pruned_runs = []
+        self.results = [r for r in map(self._filter_pruned, saved['results']) if r is not None]
+        print(f"📂 {len(self.state_results):,} combinaciones con estado cargadas "
+              f"({len(self.results):,} válidas, hasta {self.data.index[-1]}) desde: {filename}")
         return self.results
 
     def get_top_configs(self, metric='sharpe_ratio', top_n=None):
@@ -758,14 +3089,83 @@ class StrategyOptimizer:
 
         filename = filename or self.opt_config.OUTPUT_FILE
 
-        results_df = pd.DataFrame(self.results)
+        results_df = pd.DataFrame(self.results).drop(columns=['backtest_state'], errors='ignore')
         results_df = results_df.sort_values('sharpe_ratio', ascending=False)
 
         results_df.to_csv(filename, index=False)
         print(f"\n💾 Resultados guardados en: {filename}")
 
+    def get_pareto_front(self, objectives=None, results_df=None):
+        """
+        Configuraciones no dominadas según los objetivos
+
+        Args:
+            objectives: {métrica: 'max' | 'min'} (por defecto PARETO_OBJECTIVES)
+            results_df: Resultados a filtrar (por defecto self.results)
+        """
+        objectives = objectives or self.opt_config.PARETO_OBJECTIVES
+        if results_df is None:
+            if not self.results:
+                print("⚠️ No hay resultados. Ejecuta optimize() primero.")
+                return pd.DataFrame()
+            results_df = pd.DataFrame(self.results)
+
+        # Todos los objetivos se convierten a maximización
+        values = np.column_stack([
+            results_df[metric].astype(float).values * (1 if sense == 'max' else -1)
+            for metric, sense in objectives.items()
+        ])
+        front = results_df[pareto_front_mask(values)]
+
+        first_metric = next(iter(objectives))
+        return front.sort_values(first_metric, ascending=objectives[first_metric] == 'min')
+
+    def query_best_configs(self, metric='sharpe_ratio', constraints=None, top_n=1, ascending=False):
+        """
+        Mejores configuraciones por una métrica entre las que cumplen una restricción
+
+        Args:
+            metric: Métrica de ordenación
+            constraints: Expresión de DataFrame.query, p.ej. "max_drawdown < 15 and total_trades >= 30"
+            top_n: Número de configuraciones a devolver
+            ascending: True para minimizar la métrica
+        """
+        if not self.results:
+            print("⚠️ No hay resultados. Ejecuta optimize() primero.")
+            return pd.DataFrame()
+
+        results_df = pd.DataFrame(self.results)
+        if constraints:
+            results_df = results_df.query(constraints)
+
+        return results_df.sort_values(metric, ascending=ascending).head(top_n)
+
+    def print_pareto_front(self, objectives=None, max_rows=20):
+        """Imprime el frente de Pareto"""
+        objectives = objectives or self.opt_config.PARETO_OBJECTIVES
+        front = self.get_pareto_front(objectives)
+        if front.empty:
+            return
+
+        print(f"\n" + "="*80)
+        print(f"  FRENTE DE PARETO ({len(front)} de {len(self.results):,} configuraciones)")
+        print("="*80)
+
+        print("   " + "".join(f"{f'{m} ({s})':>22}" for m, s in objectives.items()))
+        for _, row in front.head(max_rows).iterrows():
+            print("   " + "".join(f"{row[m]:>22.3f}" for m in objectives))
+        if len(front) > max_rows:
+            print(f"   ... {len(front) - max_rows} más")
+
+        print("\n" + "="*80)
+
+    @staticmethod
+    def _to_records(df):
+        """Filas de resultados sin los DataFrames de trades/equity"""
+        return df.drop(columns=['trades_df', 'equity_df', 'backtest_state'], errors='ignore').to_dict('records')
+
     def save_best_configs(self, filename=None, top_n=None):
-        """Guarda las mejores configuraciones en JSON"""
+        """Guarda el ranking por Sharpe, el frente de Pareto y las consultas con restricciones en JSON"""
         filename = filename or self.opt_config.BEST_CONFIGS_FILE
         top_n = top_n or self.opt_config.TOP_N_RESULTS
 
@@ -775,14 +3175,29 @@ class StrategyOptimizer:
             print("⚠️ No hay configuraciones para guardar.")
             return
 
-        # Convertir a lista de diccionarios
-        configs_list = top_configs.to_dict('records')
+        constrained = {}
+        for name, (metric, constraints) in self.opt_config.CONSTRAINED_QUERIES.items():
+            best = self.query_best_configs(metric, constraints)
+            constrained[name] = {
+                'metric': metric,
+                'constraints': constraints,
+                'config': self._to_records(best)[0] if not best.empty else None
+            }
+
+        output = {
+            'dataset': self.dataset_info,
+            'ranking': self._to_records(top_configs),
+            'pareto_objectives': self.opt_config.PARETO_OBJECTIVES,
+            'pareto_front': self._to_records(self.get_pareto_front()),
+            'constrained': constrained
+        }
 
         # Guardar en JSON
         with open(filename, 'w') as f:
-            json.dump(configs_list, f, indent=4, default=str)
+            json.dump(output, f, indent=4, default=str)
 
-        print(f"💾 Top {top_n} configuraciones guardadas en: {filename}")
+        print(f"💾 Top {top_n} configuraciones y frente de Pareto ({len(output['pareto_front'])}) "
+              f"guardados en: {filename}")
 
     def print_top_configs(self, top_n=None, metric='sharpe_ratio'):
         """Imprime las mejores configuraciones"""
@@ -799,7 +3214,7 @@ class StrategyOptimizer:
         print("="*80)
 
         for idx, (i, row) in enumerate(top_configs.iterrows(), 1):
-            print(f"\n🏆 RANK #{idx}")
+            print(f"\n🏆 RANK #{idx}" + (f" ({row['symbol']})" if 'symbol' in row else ""))
             print(f"   {'━'*70}")
 
             # Métricas principales
@@ -905,21 +3320,64 @@ class StrategyOptimizer:
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Optimización de estrategia")
+    parser.add_argument('--worker', metavar='HOST:PORT',
+                        help="Ejecutar como worker de un coordinador distribuido")
+    parser.add_argument('--cache-dir', default=None, help="Caché local de datasets del worker")
+    parser.add_argument('--extend', action='store_true',
+                        help="Extender los resultados guardados con las velas nuevas en lugar de re-optimizar")
+    args = parser.parse_args()
+
+    if args.worker:
+        host, port = args.worker.rsplit(':', 1)
+        run_distributed_worker((host, int(port)), cache_dir=args.cache_dir)
+        sys.exit(0)
+
     # Configurar optimización
     opt_config = OptimizationConfig()
 
     # Crear optimizador
     optimizer = StrategyOptimizer(opt_config)
 
-    # Ejecutar optimización
-    results = optimizer.optimize()
+    # Ejecutar optimización (o extender la anterior con las velas nuevas)
+    if args.extend:
+        optimizer.load_backtest_states()
+        new_bars = download_forex_data(
+            opt_config.FIXED_PARAMS['SYMBOL'],
+            opt_config.EXTEND_PERIOD,
+            opt_config.FIXED_PARAMS['INTERVAL'],
+            store_dir=opt_config.CANDLE_STORE_DIR,
+            source=opt_config.DATA_SOURCE,
+            volume_seed=opt_config.VOLUME_SEED
+        )
+        results = optimizer.extend_results(new_bars)
+    else:
+        results = optimizer.optimize()
+
+    if opt_config.SAVE_BACKTEST_STATE or args.extend:
+        optimizer.save_backtest_states()
 
     # Mostrar mejores configuraciones
     optimizer.print_top_configs(top_n=10)
+    optimizer.print_pareto_front()
 
     # Guardar resultados
     optimizer.save_results()
+    if opt_config.PROFILE_STAGES and not args.extend:
+        optimizer.save_stage_profile()
     optimizer.save_best_configs()
+    if opt_config.SEARCH_MODE == 'walk_forward':
+        optimizer.save_walk_forward_report()
+    if opt_config.SEARCH_MODE in ('multi_symbol', 'multi_timeframe'):
+        optimizer.print_multi_symbol_report()
+        optimizer.save_multi_symbol_report()
+
+    # Barrido de salidas sobre las entradas de la mejor configuración
+    if opt_config.RUN_EXIT_SWEEP and optimizer.results:
+        best = optimizer.get_top_configs(top_n=1).iloc[0]
+        entry_params = {name: best[name] for name in optimizer.get_param_space().keys()}
+        optimizer.sweep_exit_rules(entry_params)
+        optimizer.save_exit_sweep_results()
 
     # Visualizar
     optimizer.plot_optimization_results()
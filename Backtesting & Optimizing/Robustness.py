@@ -0,0 +1,330 @@
+#!pip install yfinance>=0.2.28 pandas>=2.0.0 numpy>=1.24.0 matplotlib>=3.7.0 seaborn>=0.12.0 scikit-learn>=1.3.0 ta>=0.11.0
+"""
+ANÁLISIS DE ROBUSTEZ (MONTE CARLO Y PERMUTACIONES)
+Mide la fragilidad de una configuración: bandas de confianza de Sharpe,
+drawdown y retorno bajo remuestreo de trades y una distribución nula con
+señales barajadas
+"""
+
+import warnings
+warnings.filterwarnings('ignore')
+
+import json
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+from Optimizing import (
+    OptimizationConfig,
+    StrategyOptimizer,
+    Backtester,
+    download_forex_data,
+    calculate_volume_derivatives,
+    add_technical_indicators,
+    generate_signals,
+    load_best_configs,
+)
+
+# ============================================================================
+# CONFIGURACIÓN
+# ============================================================================
+
+class RobustnessConfig:
+    """Parámetros del análisis de robustez"""
+
+    N_SIMULATIONS = 10000                 # Remuestreos Monte Carlo (bootstrap y reshuffle)
+    N_PERMUTATIONS = 200                  # Backtests con Signal_Final barajado
+    N_JOBS = 4                            # Procesos para los backtests de permutación
+    CHUNK_SIZE = 2000                     # Filas por bloque de simulación (limita memoria)
+    PERCENTILES = [5, 25, 50, 75, 95]     # Bandas de confianza
+    SEED = 42
+    REPORT_FILE = 'robustness_report.json'
+
+# ============================================================================
+# MONTE CARLO VECTORIZADO
+# ============================================================================
+
+def simulate_equity_paths(pnl_matrix, initial_capital):
+    """
+    Calcula métricas de cada camino de equity (una fila por simulación).
+    Los caminos solo tienen un punto por trade, así que el Sharpe sale en
+    'trade_sharpe': media/desviación de los retornos por trade, sin anualizar.
+    No es comparable con el sharpe_ratio de Backtester (por barra, × √252).
+
+    Args:
+        pnl_matrix: Array 2-D (simulaciones × trades) de P&L neto por trade
+        initial_capital: Capital inicial
+
+    Returns:
+        dict con arrays 1-D: total_return, max_drawdown, trade_sharpe, final_capital
+    """
+    equity = initial_capital + np.cumsum(pnl_matrix, axis=1)
+    equity = np.hstack([np.full((len(equity), 1), float(initial_capital)), equity])
+
+    peaks = np.maximum.accumulate(equity, axis=1)
+    drawdowns = (peaks - equity) / peaks
+
+    returns = np.diff(equity, axis=1) / equity[:, :-1]
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(returns))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, returns.mean(axis=1) / std, 0.0)
+
+    return {
+        'total_return': (equity[:, -1] - initial_capital) / initial_capital * 100,
+        'max_drawdown': drawdowns.max(axis=1) * 100,
+        'trade_sharpe': sharpe,
+        'final_capital': equity[:, -1]
+    }
+
+def _run_in_chunks(pnls, n_simulations, chunk_size, sampler, initial_capital):
+    """Genera y evalúa las simulaciones por bloques para acotar la memoria"""
+    metrics = {}
+    done = 0
+    while done < n_simulations:
+        rows = min(chunk_size, n_simulations - done)
+        chunk = simulate_equity_paths(sampler(rows), initial_capital)
+        for key, values in chunk.items():
+            metrics.setdefault(key, []).append(values)
+        done += rows
+    return {key: np.concatenate(values) for key, values in metrics.items()}
+
+def bootstrap_trades(pnls, initial_capital, n_simulations=10000, chunk_size=2000, rng=None):
+    """Remuestreo con reemplazo de los trades (misma cantidad de trades por camino)"""
+    rng = rng or np.random.default_rng()
+    pnls = np.asarray(pnls, dtype=float)
+    return _run_in_chunks(
+        pnls, n_simulations, chunk_size,
+        lambda rows: pnls[rng.integers(0, len(pnls), size=(rows, len(pnls)))],
+        initial_capital
+    )
+
+def reshuffle_trades(pnls, initial_capital, n_simulations=10000, chunk_size=2000, rng=None):
+    """Permuta el orden de los trades (mismo P&L total, distinto camino)"""
+    rng = rng or np.random.default_rng()
+    pnls = np.asarray(pnls, dtype=float)
+    return _run_in_chunks(
+        pnls, n_simulations, chunk_size,
+        lambda rows: rng.permuted(np.broadcast_to(pnls, (rows, len(pnls))), axis=1),
+        initial_capital
+    )
+
+# ============================================================================
+# PERMUTACIÓN DE SEÑALES (POOL DE PROCESOS)
+# ============================================================================
+
+_PERMUTATION_STATE = {}
+
+def _init_permutation_worker(config, df):
+    """Inicializa un worker con la configuración y los datos procesados"""
+    _PERMUTATION_STATE['config'] = config
+    _PERMUTATION_STATE['data'] = df
+
+def _run_permutation(seed):
+    """Backtest con Signal_Final barajado (a partir de la barra 100, donde empieza el Backtester)"""
+    df = _PERMUTATION_STATE['data'].copy()
+    signals = df['Signal_Final'].values.copy()
+    np.random.default_rng(seed).shuffle(signals[100:])
+    df['Signal_Final'] = signals
+
+    results = Backtester(_PERMUTATION_STATE['config']).run(df)
+    return {
+        'total_return': results['total_return'],
+        'max_drawdown': results['max_drawdown'],
+        'sharpe_ratio': results['sharpe_ratio'],
+        'total_trades': results['total_trades']
+    }
+
+# ============================================================================
+# ANALIZADOR
+# ============================================================================
+
+class RobustnessAnalyzer:
+    """Análisis de robustez de un resultado de Backtester"""
+
+    def __init__(self, config, df_processed, results, rob_config=None):
+        """
+        Args:
+            config: Configuración de estrategia usada en el backtest
+            df_processed: Datos con indicadores y Signal_Final
+            results: Resultados de Backtester.run
+            rob_config: RobustnessConfig
+        """
+        self.config = config
+        self.df = df_processed
+        self.results = results
+        self.rob_config = rob_config or RobustnessConfig()
+        self.rng = np.random.default_rng(self.rob_config.SEED)
+        self.distributions = {}
+        self.permutation_pvalues = {}
+
+    def _trade_pnls(self):
+        trades_df = self.results['trades_df']
+        if len(trades_df) < 2:
+            raise ValueError("Se necesitan al menos 2 trades para el análisis de robustez")
+        return trades_df['pnl'].values
+
+    def backtest_trade_sharpe(self):
+        """Sharpe por trade del backtest real (mismo cálculo que las bandas de remuestreo)"""
+        pnls = self._trade_pnls()
+        return float(simulate_equity_paths(pnls[np.newaxis, :], self.config.INITIAL_CAPITAL)['trade_sharpe'][0])
+
+    def run_bootstrap(self):
+        """Bootstrap de trades"""
+        cfg = self.rob_config
+        self.distributions['bootstrap'] = bootstrap_trades(
+            self._trade_pnls(), self.config.INITIAL_CAPITAL,
+            cfg.N_SIMULATIONS, cfg.CHUNK_SIZE, self.rng
+        )
+        return self.distributions['bootstrap']
+
+    def run_reshuffle(self):
+        """Reordenación de trades"""
+        cfg = self.rob_config
+        self.distributions['reshuffle'] = reshuffle_trades(
+            self._trade_pnls(), self.config.INITIAL_CAPITAL,
+            cfg.N_SIMULATIONS, cfg.CHUNK_SIZE, self.rng
+        )
+        return self.distributions['reshuffle']
+
+    def run_permutation_test(self):
+        """Distribución nula con Signal_Final barajado, ejecutada en un pool de procesos"""
+        cfg = self.rob_config
+        seeds = self.rng.integers(0, 2**32 - 1, size=cfg.N_PERMUTATIONS)
+
+        if cfg.N_JOBS <= 1:
+            _init_permutation_worker(self.config, self.df)
+            null_results = [_run_permutation(seed) for seed in seeds]
+        else:
+            with ProcessPoolExecutor(max_workers=cfg.N_JOBS,
+                                     initializer=_init_permutation_worker,
+                                     initargs=(self.config, self.df)) as executor:
+                chunksize = max(1, len(seeds) // (cfg.N_JOBS * 4))
+                null_results = list(executor.map(_run_permutation, seeds, chunksize=chunksize))
+
+        null_df = pd.DataFrame(null_results)
+        self.distributions['permutation'] = {col: null_df[col].values for col in null_df.columns}
+
+        # p-valor: fracción de estrategias aleatorias iguales o mejores que la real
+        self.permutation_pvalues = {
+            'sharpe_ratio': float((null_df['sharpe_ratio'] >= self.results['sharpe_ratio']).mean()),
+            'total_return': float((null_df['total_return'] >= self.results['total_return']).mean()),
+            'max_drawdown': float((null_df['max_drawdown'] <= self.results['max_drawdown']).mean())
+        }
+        return self.distributions['permutation']
+
+    def get_confidence_bands(self):
+        """Percentiles de cada métrica para cada método"""
+        bands = {}
+        for method, metrics in self.distributions.items():
+            bands[method] = {
+                metric: dict(zip(
+                    [f"p{p}" for p in self.rob_config.PERCENTILES],
+                    np.percentile(values, self.rob_config.PERCENTILES).tolist()
+                ))
+                for metric, values in metrics.items()
+                if metric in ('sharpe_ratio', 'trade_sharpe', 'max_drawdown', 'total_return')
+            }
+        return bands
+
+    def run(self, permutations=True):
+        """Ejecuta todo el análisis y devuelve las bandas de confianza"""
+        timings = {}
+
+        start = time.perf_counter()
+        self.run_bootstrap()
+        timings['bootstrap'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.run_reshuffle()
+        timings['reshuffle'] = time.perf_counter() - start
+
+        if permutations:
+            start = time.perf_counter()
+            self.run_permutation_test()
+            timings['permutation'] = time.perf_counter() - start
+
+        self.timings = timings
+        return self.get_confidence_bands()
+
+    def print_report(self):
+        """Imprime las bandas de confianza"""
+        bands = self.get_confidence_bands()
+        labels = {'sharpe_ratio': 'Sharpe por barra', 'trade_sharpe': 'Sharpe por trade',
+                  'max_drawdown': 'Max Drawdown (%)', 'total_return': 'Total Return (%)'}
+
+        print("\n" + "="*80)
+        print("  ANÁLISIS DE ROBUSTEZ")
+        print("="*80)
+        print(f"   Backtest real: Sharpe por barra={self.results['sharpe_ratio']:.3f} | "
+              f"Sharpe por trade={self.backtest_trade_sharpe():.3f} | "
+              f"Return={self.results['total_return']:.2f}% | DD={self.results['max_drawdown']:.2f}%")
+
+        for method, metrics in bands.items():
+            elapsed = getattr(self, 'timings', {}).get(method)
+            n = len(next(iter(self.distributions[method].values())))
+            print(f"\n🎲 {method.upper()} ({n:,} simulaciones" + (f", {elapsed:.2f}s)" if elapsed else ")"))
+            header = "".join(f"{p:>10}" for p in bands[method][next(iter(metrics))].keys())
+            print(f"   {'':<20}{header}")
+            for metric, values in metrics.items():
+                row = "".join(f"{v:>10.2f}" for v in values.values())
+                print(f"   {labels[metric]:<20}{row}")
+
+        if self.permutation_pvalues:
+            print(f"\n📉 p-valores frente a señales aleatorias:")
+            for metric, pvalue in self.permutation_pvalues.items():
+                print(f"   {labels[metric]:.<30} {pvalue:>8.3f}")
+
+        print("\n" + "="*80)
+
+    def save_report(self, filename=None):
+        """Guarda bandas, p-valores y tiempos en JSON"""
+        filename = filename or self.rob_config.REPORT_FILE
+        with open(filename, 'w') as f:
+            json.dump({
+                'backtest': {
+                    'sharpe_ratio': self.results['sharpe_ratio'],
+                    'trade_sharpe': self.backtest_trade_sharpe(),
+                    'total_return': self.results['total_return'],
+                    'max_drawdown': self.results['max_drawdown']
+                },
+                'bands': self.get_confidence_bands(),
+                'permutation_pvalues': self.permutation_pvalues,
+                'timings': getattr(self, 'timings', {})
+            }, f, indent=4, default=str)
+        print(f"💾 Reporte de robustez guardado en: {filename}")
+
+# ============================================================================
+# EJECUCIÓN PRINCIPAL
+# ============================================================================
+
+if __name__ == "__main__":
+
+    opt_config = OptimizationConfig()
+    optimizer = StrategyOptimizer(opt_config)
+
+    # Mejor configuración de la última optimización
+    best = load_best_configs(opt_config.BEST_CONFIGS_FILE)[0]
+
+    params = {name: best[name] for name in optimizer.get_param_space().keys()}
+    config = optimizer.create_config_from_params(params)
+
+    print("\n📥 Descargando datos...")
+    df = download_forex_data(
+        opt_config.FIXED_PARAMS['SYMBOL'],
+        opt_config.FIXED_PARAMS['PERIOD'],
+        opt_config.FIXED_PARAMS['INTERVAL'],
+        store_dir=opt_config.CANDLE_STORE_DIR,
+        source=opt_config.DATA_SOURCE,
+        volume_seed=opt_config.VOLUME_SEED
+    )
+    df = calculate_volume_derivatives(df, config)
+    df = add_technical_indicators(df)
+    df = generate_signals(df, config)
+
+    results = Backtester(config).run(df)
+
+    analyzer = RobustnessAnalyzer(config, df, results)
+    analyzer.run()
+    analyzer.print_report()
+    analyzer.save_report()
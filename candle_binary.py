@@ -0,0 +1,308 @@
+"""
+Candle Binary Module
+Formato binario de velas de registro fijo, abierto con np.memmap
+
+Estructura del fichero:
+    Cabecera (64 bytes): magic 'CNDL', versión, símbolo, intervalo,
+                         timestamp inicial y número de registros
+    Registros (48 bytes): ts (int64, segundos UTC), open, high, low,
+                          close, volume (float64)
+"""
+
+import os
+import sys
+import time
+import struct
+import logging
+import subprocess
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_ohlcv
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'CNDL'
+VERSION = 1
+# magic, versión, símbolo, intervalo, ts inicial, número de registros
+HEADER_FORMAT = '<4sH2x32s8sqq'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+RECORD_DTYPE = np.dtype([
+    ('ts', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+# Columnas del DataFrame (convención del backtester) ↔ campos del registro
+FRAME_COLUMNS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+
+def _pack_header(symbol, interval, start_ts, count):
+    """Serializar la cabecera"""
+    return struct.pack(HEADER_FORMAT, MAGIC, VERSION, str(symbol).encode()[:32],
+                       str(interval).encode()[:8], int(start_ts), int(count))
+
+
+def _to_records(df):
+    """
+    Convertir un DataFrame OHLCV (índice temporal) en registros
+
+    Acepta columnas en mayúsculas (Open, ...) o minúsculas (open, ...).
+    """
+    index = df.index
+    if index.tz is None:
+        index = index.tz_localize('UTC')
+
+    records = np.empty(len(df), dtype=RECORD_DTYPE)
+    records['ts'] = (index.tz_convert('UTC') - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+    for column, field in FRAME_COLUMNS.items():
+        source = column if column in df.columns else field
+        records[field] = df[source].to_numpy(dtype=float) if source in df.columns else np.nan
+    return records
+
+
+class BinaryCandleFile:
+    """
+    Fichero de velas de registro fijo
+
+    Los rangos se devuelven como vistas del memmap (sin copia); solo
+    to_dataframe() materializa los datos.
+    """
+
+    def __init__(self, path, mode='r'):
+        """
+        Abrir un fichero existente
+
+        Args:
+            path: Ruta del fichero
+            mode: 'r' (solo lectura) o 'r+' (permite append)
+        """
+        self.path = path
+        self.mode = mode
+        self._read_header()
+        self._map()
+
+    def _read_header(self):
+        with open(self.path, 'rb') as f:
+            raw = f.read(HEADER_SIZE)
+
+        if len(raw) < HEADER_SIZE:
+            raise ValueError(f"Fichero de velas truncado: {self.path}")
+
+        magic, version, symbol, interval, start_ts, count = struct.unpack(HEADER_FORMAT, raw)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Formato de velas no reconocido: {self.path}")
+
+        self.symbol = symbol.rstrip(b'\0').decode()
+        self.interval = interval.rstrip(b'\0').decode()
+        self.start_ts = start_ts
+        self.count = count
+
+    def _map(self):
+        if self.count:
+            self.records = np.memmap(self.path, dtype=RECORD_DTYPE, mode='r',
+                                     offset=HEADER_SIZE, shape=(self.count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD_DTYPE)
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def create(cls, path, symbol, interval, df=None):
+        """
+        Crear un fichero nuevo (sobrescribe si existe)
+
+        Args:
+            path: Ruta del fichero
+            symbol: Símbolo (máx. 32 bytes)
+            interval: Intervalo ('1m', '1h', '60', máx. 8 bytes)
+            df: DataFrame OHLCV inicial (opcional)
+        """
+        records = _to_records(df) if df is not None else np.empty(0, dtype=RECORD_DTYPE)
+        if len(records) > 1 and not (np.diff(records['ts']) > 0).all():
+            raise ValueError("Los timestamps deben ser estrictamente crecientes")
+
+        start_ts = records['ts'][0] if len(records) else 0
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(_pack_header(symbol, interval, start_ts, len(records)))
+            records.tofile(f)
+        os.replace(tmp_path, path)
+
+        return cls(path, mode='r+')
+
+    def append(self, df):
+        """
+        Añadir velas al final
+
+        Las velas anteriores a la última guardada se descartan; una vela con
+        el mismo timestamp que la última la sustituye (vela en formación).
+
+        Returns:
+            Número de velas nuevas
+        """
+        if self.mode != 'r+':
+            raise ValueError("Fichero abierto en solo lectura")
+
+        records = _to_records(df)
+        if not len(records):
+            return 0
+
+        last_ts = self.records['ts'][-1] if self.count else None
+        with open(self.path, 'r+b') as f:
+            if last_ts is not None:
+                same = records['ts'] == last_ts
+                if same.any():
+                    f.seek(HEADER_SIZE + (self.count - 1) * RECORD_DTYPE.itemsize)
+                    records[same][-1:].tofile(f)
+                records = records[records['ts'] > last_ts]
+
+            if len(records) > 1 and not (np.diff(records['ts']) > 0).all():
+                raise ValueError("Los timestamps deben ser estrictamente crecientes")
+
+            # Primero los datos y después la cabecera: un corte deja el fichero válido
+            f.seek(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+            records.tofile(f)
+            f.flush()
+
+            if self.count == 0 and len(records):
+                self.start_ts = records['ts'][0]
+            self.count += len(records)
+            f.seek(0)
+            f.write(_pack_header(self.symbol, self.interval, self.start_ts, self.count))
+
+        self._map()
+        return len(records)
+
+    def slice(self, start=None, end=None):
+        """
+        Registros entre start y end (inclusivos), como vista sin copia
+
+        Args:
+            start: Inicio (datetime/str/epoch; UTC si no tiene zona)
+            end: Fin
+        """
+        ts = self.records['ts']
+        lo = np.searchsorted(ts, self._to_epoch(start), side='left') if start is not None else 0
+        hi = np.searchsorted(ts, self._to_epoch(end), side='right') if end is not None else self.count
+        return self.records[lo:hi]
+
+    def to_dataframe(self, start=None, end=None):
+        """Rango de velas como DataFrame (Open/High/Low/Close/Volume, índice UTC)"""
+        records = self.slice(start, end)
+        df = pd.DataFrame({column: np.asarray(records[field]) for column, field in FRAME_COLUMNS.items()},
+                          index=pd.to_datetime(np.asarray(records['ts']), unit='s', utc=True))
+        df.index.name = 'timestamp'
+        return df
+
+    @staticmethod
+    def _to_epoch(value):
+        if isinstance(value, (int, np.integer)):
+            return int(value)
+        ts = pd.Timestamp(value)
+        ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+        return ts.value // 10**9
+
+
+def dataframe_to_binary(df, path, symbol, interval):
+    """Convertir un DataFrame OHLCV existente al formato binario"""
+    return BinaryCandleFile.create(path, symbol, interval, df)
+
+# ============================================================================
+# BENCHMARK (CSV vs PARQUET vs BINARIO)
+# ============================================================================
+
+def _current_rss_mb():
+    """RSS actual del proceso en MB (Linux: /proc; resto: pico de getrusage)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024**2
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _load_and_measure(fmt, path):
+    """
+    Cargar un fichero y recorrer Close
+
+    La RSS se mide con los datos cargados aún vivos (en el binario, las
+    páginas del memmap tocadas al recorrer Close).
+
+    Returns:
+        (segundos, MB de RSS añadidos, checksum)
+    """
+    rss_before = _current_rss_mb()
+    start = time.perf_counter()
+
+    if fmt == 'csv':
+        data = pd.read_csv(path, index_col=0, parse_dates=True)
+        close = data['Close'].to_numpy()
+    elif fmt == 'parquet':
+        data = pd.read_parquet(path)
+        close = data['Close'].to_numpy()
+    else:
+        data = BinaryCandleFile(path).slice()
+        close = data['close']
+
+    checksum = float(np.nansum(close))
+    elapsed = time.perf_counter() - start
+    return elapsed, _current_rss_mb() - rss_before, checksum
+
+
+def benchmark_formats(sizes=(1_000_000, 10_000_000), workdir='candle_benchmark'):
+    """
+    Comparar tiempo de carga y RSS de CSV, Parquet y binario
+
+    Cada carga se ejecuta en un subproceso limpio para que las medidas de
+    memoria no se contaminen entre formatos.
+
+    Returns:
+        DataFrame con bars, format, size_mb, load_s, rss_mb
+    """
+    os.makedirs(workdir, exist_ok=True)
+    rows = []
+
+    for n_bars in sizes:
+        print(f"\n📦 Generando {n_bars:,} velas...")
+        df = generate_ohlcv(n_bars, '1m', seed=42)
+        paths = {
+            'csv': os.path.join(workdir, f"bench_{n_bars}.csv"),
+            'parquet': os.path.join(workdir, f"bench_{n_bars}.parquet"),
+            'binary': os.path.join(workdir, f"bench_{n_bars}.bin"),
+        }
+        df.to_csv(paths['csv'])
+        df.to_parquet(paths['parquet'])
+        dataframe_to_binary(df, paths['binary'], 'BENCH', '1m')
+        del df
+
+        for fmt, path in paths.items():
+            out = subprocess.run(
+                [sys.executable, '-c',
+                 f"import candle_binary as cb; print(*cb._load_and_measure({fmt!r}, {os.path.abspath(path)!r}))"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                capture_output=True, text=True, check=True
+            )
+            elapsed, rss_mb, _ = map(float, out.stdout.split())
+            rows.append({
+                'bars': n_bars,
+                'format': fmt,
+                'size_mb': os.path.getsize(path) / 1024**2,
+                'load_s': elapsed,
+                'rss_mb': rss_mb
+            })
+            print(f"   {fmt:<8} {rows[-1]['size_mb']:>9.1f} MB  carga {elapsed:>8.3f}s  RSS +{rss_mb:>8.1f} MB")
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    sizes = tuple(int(n) for n in sys.argv[1:]) or (1_000_000, 10_000_000)
+    results = benchmark_formats(sizes)
+    print("\n" + results.to_string(index=False))
@@ -0,0 +1,152 @@
+"""
+Candle Buffer Module
+Buffer circular de velas en arrays NumPy preasignados para el bot en vivo
+"""
+
+import numpy as np
+import pandas as pd
+
+# Mismos campos que el endpoint OHLC de Kraken (kraken_trader.OHLC_COLUMNS)
+CANDLE_DTYPES = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'vwap': np.float64,
+    'volume': np.float64,
+    'count': np.int64,
+}
+
+
+class CandleRingBuffer:
+    """
+    Últimas `capacity` velas en arrays de tamaño fijo
+
+    Cada vela se escribe dos veces (posición i e i + capacity), así que
+    cualquier ventana de las últimas n velas es un tramo contiguo de los
+    arrays y window() devuelve vistas sin copiar. Añadir una vela es O(1);
+    una vela con el mismo timestamp que la última la sustituye en el sitio
+    (vela en formación), y una vela anterior que sigue en el buffer se
+    actualiza en su posición.
+    """
+
+    def __init__(self, capacity=720):
+        """
+        Args:
+            capacity: Velas a conservar
+        """
+        self.capacity = capacity
+        self._data = {name: np.zeros(2 * capacity, dtype=dtype) for name, dtype in CANDLE_DTYPES.items()}
+        self._head = -1   # Posición (0..capacity-1) de la última vela
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def last_time(self):
+        """Timestamp (segundos) de la última vela, o None si está vacío"""
+        return int(self._data['time'][self._head]) if self._size else None
+
+    def append(self, bar):
+        """
+        Añadir una vela (dict con los campos de CANDLE_DTYPES) o actualizar la última
+
+        Returns:
+            True si es una vela nueva, False si actualizó una existente o era
+            anterior a las guardadas
+        """
+        ts = int(bar['time'])
+        last = self.last_time
+        if last is not None and ts < last:
+            position = self._positions_of(np.array([ts]))[0]
+            if position >= 0:
+                self._write(position, bar)
+            return False
+
+        new = last is None or ts > last
+        if new:
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+        self._write(self._head, bar)
+        return new
+
+    def _write(self, position, bar):
+        for name, column in self._data.items():
+            value = bar.get(name, 0)
+            column[position] = value
+            column[position + self.capacity] = value
+
+    def _positions_of(self, times):
+        """Posición circular de cada timestamp si está en el buffer (-1 si no)"""
+        stored = self.window()['time']
+        idx = np.searchsorted(stored, times)
+        found = (idx < len(stored)) & (stored[np.minimum(idx, len(stored) - 1)] == times)
+        oldest = self._head - self._size + 1
+        return np.where(found, (oldest + idx) % self.capacity, -1)
+
+    def extend(self, ohlc):
+        """
+        Añadir velas de un DataFrame (columnas de CANDLE_DTYPES) en orden cronológico
+
+        Returns:
+            Número de velas nuevas
+        """
+        times = ohlc['time'].to_numpy(dtype=np.int64)
+        last = self.last_time
+        if last is not None:
+            # Velas anteriores a la última guardada: actualizan su posición si siguen en el buffer
+            start = np.searchsorted(times, last, side='left')
+            if start:
+                positions = self._positions_of(times[:start])
+                found = positions >= 0
+                for name, column in self._data.items():
+                    if name in ohlc:
+                        values = ohlc[name].to_numpy(dtype=column.dtype)[:start][found]
+                        column[positions[found]] = values
+                        column[positions[found] + self.capacity] = values
+            # La primera vela que coincide con la última guardada la actualiza
+            ohlc, times = ohlc.iloc[start:], times[start:]
+        if not len(times):
+            return 0
+
+        replace = last is not None and times[0] == last
+        n_new = len(times) - replace
+        if n_new > self.capacity:
+            skip = n_new - self.capacity
+            ohlc, times, n_new, replace = ohlc.iloc[skip + replace:], times[skip + replace:], self.capacity, False
+
+        # Posiciones destino (circulares) de las velas, todas en una asignación vectorizada
+        first = self._head if replace else self._head + 1
+        positions = (first + np.arange(len(times))) % self.capacity
+        for name, column in self._data.items():
+            values = ohlc[name].to_numpy(dtype=column.dtype) if name in ohlc else 0
+            column[positions] = values
+            column[positions + self.capacity] = values
+
+        self._head = int(positions[-1])
+        self._size = min(self._size + n_new, self.capacity)
+        return n_new
+
+    def window(self, n=None):
+        """
+        Vistas (sin copia) de las últimas n velas, en orden cronológico
+
+        Las vistas se sobrescriben con las velas siguientes: copiar si hay que
+        conservarlas.
+
+        Returns:
+            Dict campo → array de longitud min(n, len(self))
+        """
+        n = self._size if n is None else min(n, self._size)
+        end = self._head + self.capacity + 1
+        return {name: column[end - n:end] for name, column in self._data.items()}
+
+    def to_dataframe(self, n=None):
+        """Últimas n velas como DataFrame (copia), con el formato de get_ohlc_data"""
+        df = pd.DataFrame({name: values.copy() for name, values in self.window(n).items()})
+        df.index = pd.to_datetime(df['time'], unit='s')
+        df.index.name = 'dtime'
+        return df
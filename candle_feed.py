@@ -0,0 +1,245 @@
+"""
+Candle Feed Module
+Velas OHLC en tiempo real por WebSocket (Kraken v2, canal ohlc) con aviso
+al cierre de cada vela, reconexión y relleno de huecos por REST
+"""
+
+import json
+import asyncio
+import logging
+import pandas as pd
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from candle_buffer import CandleRingBuffer
+
+logger = logging.getLogger(__name__)
+
+WS_URL = 'wss://ws.kraken.com/v2'
+# Mismas columnas que el endpoint REST OHLC (kraken_trader.OHLC_COLUMNS)
+BAR_FIELDS = ['time', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+
+
+def parse_ws_bar(item):
+    """Vela del canal ohlc v2 → dict con los campos de BAR_FIELDS (time en segundos UTC)"""
+    return {
+        'time': int(pd.Timestamp(item['interval_begin']).timestamp()),
+        'open': float(item['open']),
+        'high': float(item['high']),
+        'low': float(item['low']),
+        'close': float(item['close']),
+        'vwap': float(item['vwap']),
+        'volume': float(item['volume']),
+        'count': int(item['trades']),
+    }
+
+
+class KrakenCandleFeed:
+    """
+    Feed de velas por WebSocket
+
+    Mantiene en memoria la vela en formación y las últimas velas cerradas.
+    Una vela se considera cerrada cuando llega la primera actualización de
+    la siguiente; en ese momento se llama a on_bar_close(vela, backfilled).
+    Tras una reconexión, las velas cerradas perdidas se piden por REST
+    (KrakenTrader._fetch_ohlc con since) y se notifican en orden: todas con
+    backfilled=True salvo la más reciente, para que solo esa dispare un
+    ciclo de trading.
+    """
+
+    def __init__(self, symbol, interval, on_bar_close=None, url=WS_URL, rest_trader=None,
+                 rest_pair=None, max_bars=720, reconnect_delay=1.0, max_reconnect_delay=60.0):
+        """
+        Args:
+            symbol: Símbolo WebSocket ('XRP/USD')
+            interval: Intervalo en minutos
+            on_bar_close: Callback (vela cerrada dict, backfilled bool); se ejecuta en un hilo
+            url: URL del WebSocket (kraken_mock.KrakenWSMockServer en pruebas)
+            rest_trader: KrakenTrader para rellenar huecos (None = sin relleno)
+            rest_pair: Par REST ('XXRPZUSD')
+            max_bars: Velas cerradas a conservar
+            reconnect_delay: Espera inicial antes de reconectar (se duplica hasta max_reconnect_delay)
+        """
+        self.symbol = symbol
+        self.interval = interval
+        self.on_bar_close = on_bar_close
+        self.url = url
+        self.rest_trader = rest_trader
+        self.rest_pair = rest_pair
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.current = None
+        self.closed = CandleRingBuffer(max_bars)
+        self.stats = {'connections': 0, 'messages': 0, 'closed_bars': 0, 'backfilled_bars': 0}
+        self._stopping = False
+
+    # ------------------------------------------------------------------
+    # Estado de las velas
+    # ------------------------------------------------------------------
+
+    @property
+    def last_closed_time(self):
+        return self.closed.last_time
+
+    def seed(self, ohlc):
+        """
+        Cargar histórico (DataFrame de get_ohlc_data); la última fila se toma como
+        vela en formación
+        """
+        if ohlc.empty:
+            return
+        self.closed.extend(ohlc.iloc[:-1])
+        self.current = ohlc.reset_index(drop=True)[BAR_FIELDS].iloc[-1].to_dict()
+
+    def to_dataframe(self, include_forming=False):
+        """Velas cerradas (y opcionalmente la que está en formación) como en get_ohlc_data"""
+        df = self.closed.to_dataframe()
+        if include_forming and self.current:
+            forming = pd.DataFrame([self.current], columns=BAR_FIELDS)
+            forming.index = pd.to_datetime(forming['time'], unit='s')
+            df = pd.concat([df, forming])
+        df.index.name = 'dtime'
+        return df
+
+    async def _apply(self, bars):
+        """
+        Aplicar las velas de un mensaje (actualizaciones de la actual o aperturas de
+        nuevas) y cerrar las que hayan terminado, rellenando huecos por REST
+        """
+        pending = []
+        for bar in bars:
+            if self.current is None or bar['time'] == self.current['time']:
+                self.current = bar
+            elif bar['time'] > self.current['time']:
+                # Empieza una vela nueva: la actual está cerrada
+                pending.append(self.current)
+                self.current = bar
+            # Si no, actualización atrasada de una vela ya cerrada
+
+        # Hueco entre la última vela cerrada conocida y la actual (reconexión o
+        # velas sin operaciones): las que falten se piden por REST
+        known = [self.last_closed_time] if self.last_closed_time is not None else []
+        times = known + [closed['time'] for closed in pending] + [self.current['time']]
+        if any(b - a > self.interval * 60 for a, b in zip(times, times[1:])):
+            missing = await self._missing_bars(since=times[0], until=self.current['time'])
+            # La versión REST es la definitiva (la vela abierta al desconectar pudo perder actualizaciones)
+            by_time = {closed['time']: closed for closed in pending}
+            rest_times = {filled['time'] for filled in missing} - set(by_time)
+            by_time.update({filled['time']: filled for filled in missing})
+            filled = await self._close_bars([by_time[ts] for ts in sorted(by_time)], rest_times)
+            if filled:
+                self.stats['backfilled_bars'] += filled
+                logger.info(f"Hueco de {filled} velas rellenado por REST")
+        else:
+            await self._close_bars(pending)
+
+    async def _close_bars(self, bars, rest_times=()):
+        """
+        Registrar velas cerradas en orden; solo la más reciente se notifica como
+        vela en vivo, las anteriores van con backfilled=True (no abren ciclos
+        de trading con precios atrasados)
+
+        Returns:
+            Velas nuevas que venían de REST
+        """
+        last = self.last_closed_time
+        bars = [bar for bar in bars if last is None or bar['time'] > last]
+        for i, bar in enumerate(bars):
+            await self._close_bar(bar, backfilled=i < len(bars) - 1)
+        return sum(bar['time'] in rest_times for bar in bars)
+
+    async def _close_bar(self, bar, backfilled=False):
+        """Registrar una vela cerrada y avisar"""
+        self.closed.append(bar)
+        self.stats['closed_bars'] += 1
+        if self.on_bar_close is not None:
+            try:
+                # En un hilo: el callback hace llamadas REST bloqueantes y el
+                # bucle tiene que seguir atendiendo los pings del WebSocket
+                await asyncio.to_thread(self.on_bar_close, dict(bar), backfilled)
+            except Exception as e:
+                logger.error(f"Error en callback de cierre de vela: {e}", exc_info=True)
+
+    async def _missing_bars(self, since, until):
+        """Velas cerradas entre `since` y `until` (exclusivos) pedidas por REST"""
+        if self.rest_trader is None or since is None:
+            return []
+
+        try:
+            ohlc, _ = await asyncio.to_thread(self.rest_trader._fetch_ohlc, self.rest_pair,
+                                              self.interval, since)
+        except Exception as e:
+            logger.warning(f"No se pudo rellenar el hueco por REST: {e}")
+            return []
+
+        return [bar for bar in ohlc.reset_index(drop=True)[BAR_FIELDS].to_dict('records')
+                if since < bar['time'] < until]
+
+    # ------------------------------------------------------------------
+    # Conexión
+    # ------------------------------------------------------------------
+
+    def run(self):
+        """Conectar y procesar velas hasta stop() (bloqueante)"""
+        asyncio.run(self.run_async())
+
+    def stop(self):
+        self._stopping = True
+
+    async def run_async(self):
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with connect(self.url, ping_interval=20, ping_timeout=20) as ws:
+                    self.stats['connections'] += 1
+                    await self._subscribe(ws)
+                    delay = self.reconnect_delay
+                    await self._consume(ws)
+                reason = 'cerrado por el servidor'
+            except (ConnectionClosed, OSError, asyncio.TimeoutError) as e:
+                reason = e
+
+            if self._stopping:
+                break
+            logger.warning(f"WebSocket desconectado ({reason}), reconectando en {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _subscribe(self, ws):
+        await ws.send(json.dumps({
+            'method': 'subscribe',
+            'params': {'channel': 'ohlc', 'symbol': [self.symbol], 'interval': self.interval, 'snapshot': True}
+        }))
+        logger.info(f"Suscrito a ohlc {self.symbol}/{self.interval}m en {self.url}")
+
+    async def _consume(self, ws):
+        first = True
+        async for raw in ws:
+            if self._stopping:
+                await ws.close()
+                return
+
+            msg = json.loads(raw)
+            if msg.get('method') == 'subscribe' and not msg.get('success', True):
+                raise ValueError(f"Suscripción rechazada: {msg.get('error')}")
+            if msg.get('channel') != 'ohlc':
+                continue
+
+            self.stats['messages'] += 1
+            bars = sorted((parse_ws_bar(item) for item in msg.get('data', [])
+                           if item.get('symbol') == self.symbol), key=lambda bar: bar['time'])
+            if not bars:
+                continue
+
+            if first and self.current is None:
+                # Primera conexión sin histórico: el snapshot es el histórico (sin avisos)
+                first = False
+                for bar in bars[:-1]:
+                    self.closed.append(bar)
+                self.current = bars[-1]
+                continue
+            # Tras (re)conectar, el hueco desde la última vela cerrada se rellena en _apply
+            first = False
+            await self._apply(bars)
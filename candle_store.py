@@ -0,0 +1,258 @@
+"""
+Candle Store Module
+Almacén local de velas OHLCV en Parquet con actualización incremental
+"""
+
+import os
+import re
+import json
+import logging
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Unidades de los periodos estilo yfinance ('2y', '1mo', '5d', '1wk')
+PERIOD_UNITS = {'d': 1, 'wk': 7, 'mo': 30, 'y': 365}
+
+
+def period_to_timedelta(period):
+    """
+    Convertir un periodo estilo yfinance en Timedelta
+
+    Args:
+        period: Periodo ('2y', '1mo', '5d', '1wk', 'max')
+
+    Returns:
+        pd.Timedelta o None para 'max' (todo el histórico)
+    """
+    if period is None or period == 'max':
+        return None
+
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', str(period))
+    if not match:
+        raise ValueError(f"Periodo no soportado: {period}")
+
+    return pd.Timedelta(days=int(match.group(1)) * PERIOD_UNITS[match.group(2)])
+
+
+class CandleStore:
+    """
+    Almacén de velas por fuente/símbolo/intervalo
+
+    Cada serie es un Parquet con una columna 'timestamp' (UTC) ordenada y sin
+    duplicados. La zona horaria y el nombre del índice originales se guardan
+    en los metadatos del fichero y se restauran al leer.
+    """
+
+    def __init__(self, root='candle_store'):
+        """
+        Inicializar almacén
+
+        Args:
+            root: Directorio raíz del almacén
+        """
+        self.root = root
+
+    def path(self, source, symbol, interval):
+        """Ruta del Parquet de una serie"""
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', str(symbol))
+        return os.path.join(self.root, source, safe_symbol, f"{interval}.parquet")
+
+    def exists(self, source, symbol, interval):
+        """Indica si la serie tiene datos guardados"""
+        return os.path.exists(self.path(source, symbol, interval))
+
+    def get_metadata(self, source, symbol, interval):
+        """Metadatos de la serie (tz, index_name, covered_from)"""
+        path = self.path(source, symbol, interval)
+        if not os.path.exists(path):
+            return {}
+
+        raw = pq.read_schema(path).metadata or {}
+        return json.loads(raw.get(b'candle_store', b'{}'))
+
+    def _time_bounds(self, source, symbol, interval):
+        """Primer y último timestamp guardados, leídos de las estadísticas del Parquet"""
+        path = self.path(source, symbol, interval)
+        if not os.path.exists(path):
+            return None, None
+
+        parquet = pq.ParquetFile(path)
+        column = parquet.schema_arrow.get_field_index('timestamp')
+        first, last = None, None
+        for i in range(parquet.metadata.num_row_groups):
+            stats = parquet.metadata.row_group(i).column(column).statistics
+            if stats is None or not stats.has_min_max:
+                # Sin estadísticas: leer solo la columna de tiempo
+                ts = parquet.read(columns=['timestamp']).column('timestamp').to_pandas()
+                if ts.empty:
+                    return None, None
+                return self._to_utc(ts.iloc[0]), self._to_utc(ts.iloc[-1])
+            first = stats.min if first is None else min(first, stats.min)
+            last = stats.max if last is None else max(last, stats.max)
+
+        if first is None:
+            return None, None
+        return self._to_utc(first), self._to_utc(last)
+
+    def first_timestamp(self, source, symbol, interval):
+        """Timestamp (UTC) de la primera vela guardada o None"""
+        return self._time_bounds(source, symbol, interval)[0]
+
+    def last_timestamp(self, source, symbol, interval):
+        """Timestamp (UTC) de la última vela guardada o None"""
+        return self._time_bounds(source, symbol, interval)[1]
+
+    def read(self, source, symbol, interval, start=None, end=None, columns=None):
+        """
+        Leer un rango de velas
+
+        Args:
+            source: Fuente ('yfinance', 'kraken', ...)
+            symbol: Símbolo o par
+            interval: Intervalo ('1h', '60', ...)
+            start: Inicio inclusivo (datetime/str, UTC si no tiene zona)
+            end: Fin inclusivo
+            columns: Columnas a leer (None = todas)
+
+        Returns:
+            DataFrame indexado por tiempo (vacío si la serie no existe)
+        """
+        path = self.path(source, symbol, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        filters = []
+        if start is not None:
+            filters.append(('timestamp', '>=', self._to_utc(start)))
+        if end is not None:
+            filters.append(('timestamp', '<=', self._to_utc(end)))
+        if columns is not None:
+            columns = ['timestamp'] + [c for c in columns if c != 'timestamp']
+
+        table = pq.read_table(path, columns=columns, filters=filters or None)
+        df = table.to_pandas().set_index('timestamp')
+
+        meta = self.get_metadata(source, symbol, interval)
+        if meta.get('tz') and meta['tz'] != 'UTC':
+            df.index = df.index.tz_convert(meta['tz'])
+        df.index.name = meta.get('index_name')
+        return df
+
+    def write(self, source, symbol, interval, df, covered_from=None, metadata=None):
+        """
+        Fusionar velas nuevas con las guardadas
+
+        Las velas con el mismo timestamp se sustituyen por la versión nueva
+        (la última vela de una descarga puede estar aún formándose).
+
+        Args:
+            df: DataFrame indexado por tiempo
+            covered_from: Inicio del rango ya pedido a la fuente (evita
+                volver a pedir histórico que la fuente no tiene)
+            metadata: Valores extra a guardar con la serie (p.ej. cursores)
+
+        Returns:
+            Número de velas nuevas añadidas
+        """
+        path = self.path(source, symbol, interval)
+        if df is None or df.empty:
+            # Sin velas: solo se registra el rango ya pedido
+            if (covered_from is None and metadata is None) or not os.path.exists(path):
+                return 0
+            df = self.read(source, symbol, interval).iloc[:0]
+
+        meta = self.get_metadata(source, symbol, interval)
+
+        new = df.copy()
+        if new.index.tz is None:
+            new.index = new.index.tz_localize('UTC')
+        meta.setdefault('tz', str(new.index.tz))
+        meta.setdefault('index_name', new.index.name)
+        new.index = new.index.tz_convert('UTC')
+        new.index.name = 'timestamp'
+        new = new.reset_index()
+
+        if os.path.exists(path):
+            old = pq.read_table(path).to_pandas()
+            n_old = len(old)
+            merged = pd.concat([old, new], ignore_index=True)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            n_old = 0
+            merged = new
+
+        merged = (merged.drop_duplicates(subset='timestamp', keep='last')
+                        .sort_values('timestamp')
+                        .reset_index(drop=True))
+
+        if covered_from is not None:
+            covered_from = self._to_utc(covered_from)
+            previous = meta.get('covered_from')
+            if previous is None or covered_from < pd.Timestamp(previous):
+                meta['covered_from'] = covered_from.isoformat()
+        if metadata:
+            meta.update(metadata)
+
+        table = pa.Table.from_pandas(merged, preserve_index=False)
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'candle_store': json.dumps(meta).encode()
+        })
+
+        # Escritura atómica: un fallo a mitad no corrompe la serie
+        tmp_path = path + '.tmp'
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+
+        return len(merged) - n_old
+
+    def update(self, source, symbol, interval, fetch, start=None):
+        """
+        Traer de la fuente solo las velas que faltan y guardarlas
+
+        Args:
+            fetch: Función fetch(start, end) -> DataFrame. start=None pide el
+                histórico inicial completo; end=None significa "hasta ahora"
+            start: Inicio deseado del histórico (None = el que dé la fuente)
+
+        Returns:
+            Número de velas nuevas (0 si la fuente no respondió)
+        """
+        first_ts, last_ts = self._time_bounds(source, symbol, interval)
+        label = f"{source}/{symbol}/{interval}"
+        added = 0
+
+        try:
+            if last_ts is None:
+                fetched = fetch(None, None)
+                if fetched is None or fetched.empty:
+                    raise ValueError("la fuente no devolvió velas")
+                return self.write(source, symbol, interval, fetched, covered_from=start)
+
+            # Histórico anterior a lo guardado que aún no se ha pedido
+            covered = self.get_metadata(source, symbol, interval).get('covered_from')
+            covered = min(pd.Timestamp(covered), first_ts) if covered else first_ts
+            if start is not None and self._to_utc(start) < covered:
+                added += self.write(source, symbol, interval, fetch(self._to_utc(start), first_ts),
+                                    covered_from=start)
+
+            # Velas nuevas: desde la última guardada (se reemplaza si estaba formándose)
+            added += self.write(source, symbol, interval, fetch(last_ts, None))
+
+            if added:
+                logger.info(f"Candle store {label}: {added} velas nuevas")
+        except Exception as e:
+            if last_ts is None:
+                raise
+            logger.warning(f"Candle store {label}: sin actualizar ({e}), usando datos locales")
+
+        return added
+
+    @staticmethod
+    def _to_utc(value):
+        """Timestamp en UTC (los valores sin zona se interpretan como UTC)"""
+        ts = pd.Timestamp(value)
+        return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
@@ -0,0 +1,215 @@
+"""
+Data Quality Module
+Validación vectorizada de velas (orden, duplicados, huecos, NaN, OHLC) con
+política de reparación configurable e informe compacto
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class QualityPolicy:
+    """
+    Política de reparación (por defecto, la de backtest)
+
+    Cada problema admite 'error' para abortar en lugar de reparar.
+    """
+
+    UNSORTED = 'sort'          # 'sort' | 'error'
+    DUPLICATES = 'keep_last'   # 'keep_last' | 'keep_first' | 'error'
+    NAN = 'drop'               # 'drop' | 'ffill' | 'error'  (filas con NaN en OHLC o volumen)
+    OHLC = 'fix'               # 'fix' (high/low envuelven open/close) | 'drop' | 'error'
+    NEGATIVE_VOLUME = 'zero'   # 'zero' | 'drop' | 'error'
+    # 'report' (solo contar), 'fill' (velas planas con volumen 0 hasta MAX_FILL_BARS),
+    # 'truncate' (quedarse con el tramo final sin huecos) | 'error'
+    GAPS = 'report'
+    MAX_FILL_BARS = 3
+
+
+class LiveQualityPolicy(QualityPolicy):
+    """
+    Trading en vivo: las derivadas de volumen necesitan velas contiguas
+
+    Los huecos cortos se rellenan en lugar de truncar: con 'truncate' una
+    sola vela perdida deja menos velas que el lookback y el bot no opera
+    hasta que vuelven a acumularse.
+    """
+
+    GAPS = 'fill'
+    MAX_FILL_BARS = 3
+
+
+class DataQualityError(ValueError):
+    """Problema de calidad con política 'error'"""
+
+
+def _find_columns(df):
+    """Columnas OHLCV por nombre sin distinguir mayúsculas"""
+    by_lower = {str(col).lower(): col for col in df.columns}
+    return {name: by_lower.get(name) for name in ('open', 'high', 'low', 'close', 'volume')}
+
+
+def _apply(policy_value, count, problem):
+    """Devuelve la acción de la política, o lanza si es 'error' y hay problemas"""
+    if count and policy_value == 'error':
+        raise DataQualityError(f"{problem}: {count}")
+    return policy_value
+
+
+def validate_ohlcv(df, interval=None, policy=None):
+    """
+    Validar y reparar velas en una pasada vectorizada sobre el índice
+
+    Args:
+        df: Velas con índice temporal (Open/open, High/high, ...)
+        interval: Intervalo esperado (Timedelta, '1h', '15min' o minutos);
+            None = mediana de las diferencias
+        policy: QualityPolicy (o subclase)
+
+    Returns:
+        (DataFrame reparado, informe dict)
+    """
+    policy = policy or QualityPolicy
+    cols = _find_columns(df)
+    ohlc = [cols[name] for name in ('open', 'high', 'low', 'close')]
+    if any(col is None for col in ohlc):
+        raise DataQualityError(f"Faltan columnas OHLC: {df.columns.tolist()}")
+
+    report = {'rows_in': len(df)}
+    ts = df.index.as_unit('ns').asi8 if isinstance(df.index, pd.DatetimeIndex) else np.asarray(df.index, dtype='int64')
+
+    # Orden: una sola comparación vectorizada entre vecinos (cuenta inversiones)
+    steps = np.diff(ts)
+    report['out_of_order'] = int((steps < 0).sum())
+    if _apply(policy.UNSORTED, report['out_of_order'], "Velas desordenadas") == 'sort' and report['out_of_order']:
+        order = np.argsort(ts, kind='stable')
+        df, ts = df.iloc[order], ts[order]
+        steps = np.diff(ts)
+
+    # Duplicados (sobre el índice ya ordenado son vecinos con diferencia 0)
+    dup_next = np.r_[steps == 0, False]
+    report['duplicates'] = int(dup_next.sum())
+    action = _apply(policy.DUPLICATES, report['duplicates'], "Timestamps duplicados")
+    if report['duplicates']:
+        keep = ~np.r_[False, steps == 0] if action == 'keep_first' else ~dup_next
+        df, ts = df[keep], ts[keep]
+        steps = np.diff(ts)
+
+    # NaN en OHLC o volumen
+    checked = ohlc + ([cols['volume']] if cols['volume'] is not None else [])
+    nan_rows = np.isnan(df[checked].to_numpy(dtype=float)).any(axis=1)
+    report['nan_rows'] = int(nan_rows.sum())
+    action = _apply(policy.NAN, report['nan_rows'], "Filas con NaN")
+    if report['nan_rows']:
+        if action == 'ffill':
+            df = df.copy()
+            df[checked] = df[checked].ffill()
+            nan_rows = df[checked].isna().any(axis=1).to_numpy()
+        if nan_rows.any():
+            df, ts = df[~nan_rows], ts[~nan_rows]
+            steps = np.diff(ts)
+
+    # Consistencia OHLC: high >= max(open, close, low) y low <= min(open, close)
+    values = df[ohlc].to_numpy(dtype=float)
+    o, h, l, c = values.T if len(values) else (np.empty(0),) * 4
+    bad = (h < np.maximum(np.maximum(o, c), l)) | (l > np.minimum(o, c))
+    report['ohlc_inconsistent'] = int(bad.sum())
+    action = _apply(policy.OHLC, report['ohlc_inconsistent'], "Velas OHLC inconsistentes")
+    if report['ohlc_inconsistent']:
+        if action == 'fix':
+            df = df.copy()
+            df[cols['high']] = np.max(values, axis=1)
+            df[cols['low']] = np.min(values, axis=1)
+        else:
+            df, ts = df[~bad], ts[~bad]
+            steps = np.diff(ts)
+
+    # Volumen negativo
+    if cols['volume'] is not None:
+        negative = (df[cols['volume']].to_numpy(dtype=float) < 0)
+        report['negative_volume'] = int(negative.sum())
+        action = _apply(policy.NEGATIVE_VOLUME, report['negative_volume'], "Volumen negativo")
+        if report['negative_volume']:
+            if action == 'zero':
+                df = df.copy()
+                df.loc[negative, cols['volume']] = 0.0
+            else:
+                df, ts = df[~negative], ts[~negative]
+                steps = np.diff(ts)
+
+    # Huecos respecto al intervalo
+    step = _interval_ns(interval, steps)
+    missing = np.where(steps > step, steps // step - 1, 0) if step else np.zeros(len(steps), dtype='int64')
+    gap_at = np.flatnonzero(missing)
+    report['gaps'] = int(len(gap_at))
+    report['missing_bars'] = int(missing.sum())
+    report['largest_gap_bars'] = int(missing.max()) if len(missing) else 0
+    report['filled_bars'] = 0
+
+    action = _apply(policy.GAPS, report['gaps'], "Huecos en las velas")
+    if report['gaps'] and action == 'truncate':
+        df = df.iloc[gap_at[-1] + 1:].copy()
+    elif report['gaps'] and action == 'fill':
+        df, report['filled_bars'] = _fill_gaps(df, ts, missing, step, policy.MAX_FILL_BARS, cols)
+
+    report['rows_out'] = len(df)
+    report['ok'] = not any(report[key] for key in
+                           ('out_of_order', 'duplicates', 'nan_rows', 'ohlc_inconsistent', 'gaps')) \
+                   and not report.get('negative_volume')
+    return df, report
+
+
+def _interval_ns(interval, steps):
+    """Intervalo en nanosegundos (explícito o mediana de las diferencias)"""
+    if interval is None:
+        positive = steps[steps > 0]
+        return int(np.median(positive)) if len(positive) else 0
+    if isinstance(interval, (int, np.integer)) or str(interval).isdigit():
+        return int(interval) * 60 * 10**9
+    if isinstance(interval, str) and interval.endswith('m') and interval[:-1].isdigit():
+        return int(interval[:-1]) * 60 * 10**9
+    return pd.Timedelta(interval).value
+
+
+def _fill_gaps(df, ts, missing, step, max_fill, cols):
+    """Insertar velas planas (OHLC = cierre anterior, volumen 0) en huecos cortos"""
+    counts = np.where(missing <= max_fill, missing, 0)
+    total = int(counts.sum())
+    if not total:
+        return df, 0
+
+    # arange agrupado: posición dentro de cada hueco (1..k)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+    new_ts = np.repeat(ts[:-1], counts) + offsets * step
+    prev_close = np.repeat(df[cols['close']].to_numpy(dtype=float)[:-1], counts)
+
+    index = pd.DatetimeIndex(pd.to_datetime(new_ts, unit='ns', utc=True))
+    if df.index.tz is None:
+        index = index.tz_localize(None)
+    else:
+        index = index.tz_convert(df.index.tz)
+
+    filler = pd.DataFrame(index=index, columns=df.columns, dtype=float)
+    for name in ('open', 'high', 'low', 'close'):
+        filler[cols[name]] = prev_close
+    if cols['volume'] is not None:
+        filler[cols['volume']] = 0.0
+
+    merged = pd.concat([df, filler]).sort_index(kind='stable')
+    merged.index.name = df.index.name
+    return merged, total
+
+
+def format_quality_report(report):
+    """Resumen de una línea para logs"""
+    if report.get('ok'):
+        return f"calidad OK ({report['rows_out']} velas)"
+
+    issues = [f"{key}={report[key]}" for key in
+              ('out_of_order', 'duplicates', 'nan_rows', 'ohlc_inconsistent', 'negative_volume',
+               'gaps', 'missing_bars', 'filled_bars')
+              if report.get(key)]
+    return f"{report['rows_in']} → {report['rows_out']} velas | " + ", ".join(issues)
@@ -0,0 +1,285 @@
+"""
+Data Sources Module
+Fuentes de velas intercambiables (yfinance, Kraken, CSV, Parquet, binario,
+almacén local) que devuelven DataFrames normalizados con huella del dataset
+"""
+
+import os
+import re
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore, period_to_timedelta
+from data_quality import validate_ohlcv, format_quality_report
+
+logger = logging.getLogger(__name__)
+
+# Columnas normalizadas (convención del backtester)
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Intervalos estilo yfinance → minutos (Kraken usa minutos)
+INTERVAL_MINUTES = {
+    '1m': 1, '5m': 5, '15m': 15, '30m': 30,
+    '1h': 60, '60m': 60, '4h': 240, '1d': 1440, '1wk': 10080
+}
+
+
+def interval_to_minutes(interval):
+    """Convertir '1h' / '15m' / 60 en minutos"""
+    if isinstance(interval, (int, np.integer)) or str(interval).isdigit():
+        return int(interval)
+    if interval not in INTERVAL_MINUTES:
+        raise ValueError(f"Intervalo no soportado: {interval}")
+    return INTERVAL_MINUTES[interval]
+
+
+def normalize_ohlcv(df):
+    """
+    Normalizar un DataFrame de velas
+
+    Columnas Open/High/Low/Close/Volume en float (acepta cualquier
+    capitalización) e índice temporal 'timestamp' con zona horaria (UTC si
+    no la tenía). El orden y los duplicados los resuelve validate_ohlcv().
+    """
+    by_lower = {str(col).lower(): col for col in df.columns}
+    missing = [col for col in OHLCV_COLUMNS if col.lower() not in by_lower]
+    if missing:
+        raise ValueError(f"Columnas faltantes: {missing}")
+
+    out = pd.DataFrame({col: pd.to_numeric(df[by_lower[col.lower()]], errors='coerce').astype(float)
+                        for col in OHLCV_COLUMNS}, index=df.index)
+
+    if not isinstance(out.index, pd.DatetimeIndex):
+        out.index = pd.to_datetime(out.index, utc=True)
+    if out.index.tz is None:
+        out.index = out.index.tz_localize('UTC')
+    out.index = out.index.as_unit('ns')
+    out.index.name = 'timestamp'
+    return out
+
+
+def dataset_fingerprint(df):
+    """Huella del contenido OHLCV (independiente de la fuente y del formato)"""
+    hashed = pd.util.hash_pandas_object(df[OHLCV_COLUMNS], index=True).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def select_range(df, period=None, start=None, end=None):
+    """Recortar por start/end o, si no se dan, al último `period` hasta la última vela"""
+    if start is not None or end is not None:
+        return df.loc[start:end]
+
+    span = period_to_timedelta(period)
+    if span is None or df.empty:
+        return df
+    return df[df.index >= df.index[-1] - span]
+
+
+class DataSource:
+    """
+    Fuente de velas
+
+    Las subclases implementan _fetch(); load() normaliza, valida, recorta y
+    añade df.attrs['source'], df.attrs['fingerprint'] y df.attrs['quality'].
+    """
+
+    name = 'base'
+    quality_policy = None  # QualityPolicy de data_quality (None = por defecto)
+
+    def load(self, symbol, interval, period=None, start=None, end=None):
+        """
+        Cargar velas normalizadas
+
+        Args:
+            symbol: Símbolo o par
+            interval: Intervalo ('1h', '15m', ...)
+            period: Periodo estilo yfinance ('2y', '1mo', ...)
+            start: Inicio (inclusivo); tiene prioridad sobre period
+            end: Fin (inclusivo)
+        """
+        df = self._fetch(symbol, interval, period, start, end)
+        if df is None or df.empty:
+            raise ValueError(f"No data downloaded for {symbol}")
+
+        df, quality = validate_ohlcv(normalize_ohlcv(df), pd.Timedelta(minutes=interval_to_minutes(interval)),
+                                     self.quality_policy)
+        df = select_range(df, period, start, end)
+        if df.empty:
+            raise ValueError(f"Sin velas en el rango pedido para {symbol}")
+
+        df.attrs['source'] = self.describe(symbol, interval)
+        df.attrs['fingerprint'] = dataset_fingerprint(df)
+        df.attrs['quality'] = quality
+        logger.info(f"Dataset {df.attrs['source']}: {len(df)} velas, huella {df.attrs['fingerprint']}, "
+                    f"{format_quality_report(quality)}")
+        return df
+
+    def describe(self, symbol, interval):
+        return f"{self.name}:{symbol}/{interval}"
+
+    def _fetch(self, symbol, interval, period, start, end):
+        raise NotImplementedError
+
+
+class YFinanceSource(DataSource):
+    """yfinance, opcionalmente a través del almacén local (solo velas nuevas)"""
+
+    name = 'yfinance'
+
+    def __init__(self, store_dir=None):
+        self.store_dir = store_dir
+
+    def _fetch(self, symbol, interval, period, start, end):
+        import yfinance as yf
+
+        ticker = yf.Ticker(symbol)
+        if not self.store_dir:
+            if start is not None or end is not None:
+                return ticker.history(start=start, end=end, interval=interval)
+            return ticker.history(period=period, interval=interval)
+
+        def fetch(fetch_start, fetch_end):
+            if fetch_start is None:
+                return ticker.history(period=period or 'max', interval=interval)
+            return ticker.history(start=fetch_start, end=fetch_end, interval=interval)
+
+        store = CandleStore(self.store_dir)
+        span = period_to_timedelta(period)
+        requested_start = start or (pd.Timestamp.now(tz='UTC') - span if span is not None else None)
+        store.update('yfinance', symbol, interval, fetch, start=requested_start)
+        return store.read('yfinance', symbol, interval)
+
+
+class KrakenSource(DataSource):
+    """OHLC público de Kraken (como mucho las últimas 720 velas)"""
+
+    name = 'kraken'
+
+    def __init__(self, store_dir=None, trader=None):
+        self.store_dir = store_dir
+        self.trader = trader
+
+    def _fetch(self, symbol, interval, period, start, end):
+        if self.trader is None:
+            from kraken_trader import KrakenTrader
+            self.trader = KrakenTrader(None, None, candle_store_dir=self.store_dir)
+        return self.trader.get_ohlc_data(symbol, interval_to_minutes(interval))
+
+
+class StoreSource(DataSource):
+    """Lectura del almacén local sin red (reproducible mientras no se actualice)"""
+
+    name = 'store'
+
+    def __init__(self, store_dir='candle_store', source='yfinance'):
+        self.store = CandleStore(store_dir)
+        self.source = source
+
+    def describe(self, symbol, interval):
+        return f"store:{self.source}:{symbol}/{interval}"
+
+    def _fetch(self, symbol, interval, period, start, end):
+        return self.store.read(self.source, symbol, interval)
+
+
+class SyntheticSource(DataSource):
+    """
+    Mercado sintético reproducible (synthetic_data.generate_ohlcv)
+
+    El número de velas sale de period (o start/end) y el intervalo; sin red y
+    con la misma semilla siempre devuelve las mismas velas. Cada (símbolo,
+    intervalo) tiene su propia serie: la semilla del generador se deriva de
+    (seed, símbolo, intervalo).
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, seed=42, config=None):
+        self.seed = seed
+        self.config = config
+
+    def describe(self, symbol, interval):
+        return f"synthetic:{self.seed}:{symbol}/{interval}"
+
+    def series_seed(self, symbol, interval):
+        """Semilla estable de la serie (hash, no hash() de Python, que cambia entre procesos)"""
+        key = f"{self.seed}:{symbol}:{interval_to_minutes(interval)}".encode()
+        return int.from_bytes(hashlib.sha256(key).digest()[:8], 'big')
+
+    def _fetch(self, symbol, interval, period, start, end):
+        from synthetic_data import generate_ohlcv
+
+        step = pd.Timedelta(minutes=interval_to_minutes(interval))
+        if start is not None and end is not None:
+            n_bars = int((pd.Timestamp(end) - pd.Timestamp(start)) / step) + 1
+        else:
+            n_bars = int((period_to_timedelta(period or '2y')) / step)
+        return generate_ohlcv(n_bars, interval, seed=self.series_seed(symbol, interval), start=start,
+                              config=self.config)
+
+
+class FileSource(DataSource):
+    """
+    Fichero de velas (CSV, Parquet o binario de candle_binary)
+
+    La ruta admite {symbol} e {interval} para usar un fichero por símbolo.
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = path
+        self.fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        self.name = self.fmt
+
+    def resolve(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9._-]', '_', str(symbol))
+        return self.path.format(symbol=safe_symbol, interval=interval)
+
+    def describe(self, symbol, interval):
+        return f"{self.fmt}:{self.resolve(symbol, interval)}"
+
+    def _fetch(self, symbol, interval, period, start, end):
+        path = self.resolve(symbol, interval)
+
+        if self.fmt == 'csv':
+            return pd.read_csv(path, index_col=0, parse_dates=True, float_precision='round_trip')
+        if self.fmt == 'parquet':
+            df = pd.read_parquet(path)
+            return df.set_index('timestamp') if 'timestamp' in df.columns else df
+        if self.fmt in ('bin', 'binary'):
+            from candle_binary import BinaryCandleFile
+            return BinaryCandleFile(path).to_dataframe(start, end)
+
+        raise ValueError(f"Formato de fichero no soportado: {self.fmt}")
+
+
+def get_data_source(spec=None, store_dir=None):
+    """
+    Crear una fuente a partir de su especificación
+
+    Args:
+        spec: DataSource, 'yfinance', 'kraken', 'store[:fuente]', 'synthetic[:semilla]',
+              'csv:ruta', 'parquet:ruta', 'binary:ruta' o una ruta con extensión
+        store_dir: Almacén local para yfinance/kraken/store
+    """
+    if isinstance(spec, DataSource):
+        return spec
+
+    spec = spec or 'yfinance'
+    kind, _, arg = spec.partition(':')
+
+    if kind == 'yfinance':
+        return YFinanceSource(store_dir)
+    if kind == 'kraken':
+        return KrakenSource(store_dir)
+    if kind == 'synthetic':
+        return SyntheticSource(int(arg) if arg else 42)
+    if kind == 'store':
+        return StoreSource(store_dir or 'candle_store', arg or 'yfinance')
+    if kind in ('csv', 'parquet', 'binary', 'bin') and arg:
+        return FileSource(arg, kind)
+    if os.path.splitext(spec)[1]:
+        return FileSource(spec)
+
+    raise ValueError(f"Fuente de datos no reconocida: {spec}")
@@ -0,0 +1,209 @@
+"""
+HTTP Session Module
+Pool compartido de conexiones HTTP keep-alive (requests/urllib3) para Kraken
+y Telegram, con timeouts, reintentos en peticiones idempotentes y registro
+de reutilización de conexiones por llamada
+"""
+
+import re
+import time
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+
+class HttpConfig:
+    """Configuración por defecto del pool (configure() la sustituye)"""
+
+    POOL_SIZE = 10           # Conexiones keep-alive por host
+    POOL_HOSTS = 4           # Hosts con pool propio (Kraken, Telegram, ...)
+    CONNECT_TIMEOUT = 3.05   # Segundos para abrir la conexión (TCP + TLS)
+    READ_TIMEOUT = 15        # Segundos máximos esperando respuesta
+    RETRIES = 3              # Reintentos (solo GET/HEAD, o si no llegó a conectar)
+    RETRY_BACKOFF = 0.5      # Espera base entre reintentos (se duplica)
+    RETRY_STATUS = (502, 503, 504)
+
+
+# Conexiones nuevas abiertas por el hilo actual (para saber si una llamada reutilizó una)
+_local = threading.local()
+
+
+def _count_new_connection():
+    _local.new_connections = getattr(_local, 'new_connections', 0) + 1
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_new_connection()
+        return super()._new_conn()
+
+
+class HttpStats:
+    """Contadores de llamadas y conexiones por host (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._hosts = {}
+
+    def record(self, host, reused, elapsed):
+        with self._lock:
+            stats = self._hosts.setdefault(host, {'calls': 0, 'reused': 0, 'new': 0, 'seconds': 0.0})
+            stats['calls'] += 1
+            stats['reused' if reused else 'new'] += 1
+            stats['seconds'] += elapsed
+
+    def snapshot(self):
+        """Copia de los contadores: host → {calls, reused, new, seconds}"""
+        with self._lock:
+            return {host: dict(stats) for host, stats in self._hosts.items()}
+
+
+stats = HttpStats()
+
+
+# Segmento con el token en las URLs de la API de bots de Telegram (/bot<token>/método)
+_BOT_TOKEN = re.compile(r'/bot[^/]+')
+
+
+def redact_path(path):
+    """Ruta sin credenciales (el token de Telegram va en la URL), apta para logs"""
+    return _BOT_TOKEN.sub('/bot***', path)
+
+
+class _RedactFilter(logging.Filter):
+    """Redacta el token en los avisos propios de urllib3 (reintentos con la URL)"""
+
+    def filter(self, record):
+        record.msg = redact_path(record.getMessage())
+        record.args = ()
+        return True
+
+
+for _name in ('urllib3.connectionpool', 'urllib3.util.retry'):
+    logging.getLogger(_name).addFilter(_RedactFilter())
+
+
+def log_call(method, url, status, reused, elapsed):
+    """Registrar una llamada HTTP (también la usa el cliente aiohttp de kraken_async)"""
+    parts = urlsplit(url)
+    # Solo host y puerto: nunca usuario/contraseña de la URL ni la query
+    host = parts.hostname or ''
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    stats.record(host, reused, elapsed)
+    logger.info(f"HTTP {method} {host}{redact_path(parts.path)} → {status} en {elapsed * 1000:.0f} ms "
+                f"({'conexión reutilizada' if reused else 'conexión nueva'})")
+
+
+def format_http_stats(snapshot=None):
+    """Resumen de una línea por host para logs"""
+    snapshot = stats.snapshot() if snapshot is None else snapshot
+    if not snapshot:
+        return "sin llamadas HTTP"
+    return " | ".join(
+        f"{host}: {s['calls']} llamadas, {s['reused']} reutilizadas, {s['new']} conexiones nuevas, "
+        f"{s['seconds'] / s['calls'] * 1000:.0f} ms de media"
+        for host, s in snapshot.items()
+    )
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter con timeouts por defecto y registro de reutilización
+
+    Las llamadas sin timeout (krakenex pasa timeout=None) usan
+    (connect_timeout, read_timeout). Solo se reintentan GET/HEAD ante
+    errores de lectura o 502/503/504; una petición POST (AddOrder, envío a
+    Telegram) solo se reintenta si no llegó a abrirse la conexión, así que
+    nunca se envía dos veces.
+    """
+
+    def __init__(self, pool_size, pool_hosts, connect_timeout, read_timeout, retries, backoff, retry_status):
+        self.timeout = (connect_timeout, read_timeout)
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries,
+                      allowed_methods=frozenset({'GET', 'HEAD'}), status_forcelist=retry_status,
+                      backoff_factor=backoff, raise_on_status=False)
+        super().__init__(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        before = getattr(_local, 'new_connections', 0)
+        start = time.perf_counter()
+        response = super().send(request, timeout=timeout or self.timeout, **kwargs)
+        reused = getattr(_local, 'new_connections', 0) == before
+        log_call(request.method, request.url, response.status_code, reused, time.perf_counter() - start)
+        return response
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def configure(config=None, **overrides):
+    """
+    Configurar el pool compartido (antes de crear clientes)
+
+    Args:
+        config: Objeto con HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+            y HTTP_RETRIES (p.ej. ProductionConfig); los que falten se
+            quedan como en HttpConfig
+        **overrides: pool_size, connect_timeout, read_timeout, retries
+    """
+    global _adapter
+    for name in ('POOL_SIZE', 'CONNECT_TIMEOUT', 'READ_TIMEOUT', 'RETRIES'):
+        value = overrides.get(name.lower(), getattr(config, f'HTTP_{name}', None))
+        if value is not None:
+            setattr(HttpConfig, name, value)
+    with _adapter_lock:
+        _adapter = None
+
+
+def shared_adapter():
+    """Adapter (y pool de conexiones) común a todas las sesiones"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = PooledHTTPAdapter(HttpConfig.POOL_SIZE, HttpConfig.POOL_HOSTS,
+                                         HttpConfig.CONNECT_TIMEOUT, HttpConfig.READ_TIMEOUT,
+                                         HttpConfig.RETRIES, HttpConfig.RETRY_BACKOFF,
+                                         HttpConfig.RETRY_STATUS)
+        return _adapter
+
+
+def create_session(headers=None):
+    """
+    requests.Session sobre el pool compartido
+
+    Cada cliente (o hilo) tiene su Session, con sus cabeceras, pero las
+    conexiones keep-alive son las del adapter común, que sí es thread-safe.
+    """
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    adapter = shared_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
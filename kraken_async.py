@@ -0,0 +1,440 @@
+"""
+Kraken Async Module
+Cliente asyncio de Kraken (aiohttp) con los mismos métodos que KrakenTrader:
+firma las peticiones privadas, comparte un pool de conexiones y permite
+lanzar llamadas independientes a la vez con asyncio.gather
+"""
+
+import hmac
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import logging
+import contextlib
+import urllib.parse
+
+import aiohttp
+import pandas as pd
+
+from kraken_trader import (
+    KrakenTrader, OHLC_MAX_ROWS, PUBLIC_RATE_PER_SECOND, PUBLIC_BURST,
+    RATE_LIMIT_ERROR, RATE_LIMIT_RETRIES
+)
+from data_quality import LiveQualityPolicy
+from http_session import HttpConfig, log_call
+
+logger = logging.getLogger(__name__)
+
+API_VERSION = '0'
+
+
+def sign_request(secret, urlpath, nonce, postdata):
+    """
+    Cabecera API-Sign de Kraken
+
+    HMAC-SHA512 de urlpath + SHA256(nonce + postdata) con el secreto
+    decodificado de base64, codificado en base64.
+    """
+    message = urlpath.encode() + hashlib.sha256((str(nonce) + postdata).encode()).digest()
+    signature = hmac.new(base64.b64decode(secret), message, hashlib.sha512)
+    return base64.b64encode(signature.digest()).decode()
+
+
+def http_trace_config():
+    """Registro de reutilización de conexiones por llamada (mismas estadísticas que http_session)"""
+    async def on_request_start(session, ctx, params):
+        ctx.start = time.perf_counter()
+        ctx.reused = True
+
+    async def on_connection_create_end(session, ctx, params):
+        ctx.reused = False
+
+    async def on_request_end(session, ctx, params):
+        log_call(params.method, str(params.url), params.response.status, ctx.reused,
+                 time.perf_counter() - ctx.start)
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+
+class AsyncRateLimiter:
+    """Token bucket para corrutinas (mismo comportamiento que kraken_trader.RateLimiter)"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self):
+        """Esperar a que haya un token disponible y consumirlo"""
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncKrakenTrader(KrakenTrader):
+    """
+    Gestor de trading para Kraken Margin sobre asyncio
+
+    Los métodos de red son corrutinas con la misma firma y el mismo
+    resultado que en KrakenTrader; el cálculo de posición, la validación de
+    velas, el buffer OHLC y el almacén se heredan. Todas las peticiones
+    comparten una aiohttp.ClientSession (keep-alive, hasta pool_size
+    conexiones), que se crea en la primera llamada y se cierra con close()
+    o al salir de `async with`. Tamaño del pool y timeouts por defecto son
+    los de http_session.HttpConfig, como en el cliente síncrono.
+
+    Kraken exige nonces crecientes por API key: sin nonce_window las
+    peticiones privadas se envían de una en una, en orden de nonce, y solo
+    las públicas van en paralelo entre sí y con las privadas. Con una
+    ventana de nonce configurada en la key (nonce_window=True) también las
+    privadas van en paralelo.
+    """
+
+    def __init__(self, api_key, api_secret, leverage_min=2, leverage_max=5,
+                 candle_store_dir=None, quality_policy=LiveQualityPolicy, api_url=None,
+                 public_rate=PUBLIC_RATE_PER_SECOND, public_burst=PUBLIC_BURST,
+                 pool_size=None, timeout=None, nonce_window=False):
+        """
+        Args:
+            api_key .. public_burst: Como en KrakenTrader
+            pool_size: Conexiones simultáneas como máximo (None = HttpConfig.POOL_SIZE)
+            timeout: Segundos máximos por petición (None = HttpConfig.CONNECT_TIMEOUT
+                para conectar y HttpConfig.READ_TIMEOUT esperando respuesta)
+            nonce_window: La API key tiene ventana de nonce (privadas en paralelo)
+        """
+        super().__init__(api_key, api_secret, leverage_min, leverage_max, candle_store_dir,
+                         quality_policy, api_url, public_rate, public_burst)
+        self.key = api_key
+        self.secret = api_secret
+        self.uri = self.api.uri
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.nonce_window = nonce_window
+        self.public_limiter = AsyncRateLimiter(public_rate, public_burst)
+
+        self._session = None
+        self._private_lock = None
+        self._last_nonce = 0
+
+    # ------------------------------------------------------------------
+    # Sesión y peticiones
+    # ------------------------------------------------------------------
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Cerrar el pool de conexiones"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size or HttpConfig.POOL_SIZE,
+                                             keepalive_timeout=30)
+            if self.timeout is None:
+                timeout = aiohttp.ClientTimeout(sock_connect=HttpConfig.CONNECT_TIMEOUT,
+                                                sock_read=HttpConfig.READ_TIMEOUT)
+            else:
+                timeout = aiohttp.ClientTimeout(total=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                                  trace_configs=[http_trace_config()])
+            self._private_lock = asyncio.Lock()
+        return self._session
+
+    def _nonce(self):
+        """Nonce estrictamente creciente aunque se pidan varios en el mismo milisegundo"""
+        self._last_nonce = max(int(1000 * time.time()), self._last_nonce + 1)
+        return self._last_nonce
+
+    async def _request(self, method, urlpath, params=None, body=None, headers=None):
+        """
+        Returns:
+            (respuesta JSON, segundos de la petición, bytes recibidos)
+        """
+        session = self._get_session()
+        start = time.perf_counter()
+        async with session.request(method, self.uri + urlpath, params=params, data=body,
+                                   headers=headers) as response:
+            response.raise_for_status()
+            content = await response.read()
+        request_time = time.perf_counter() - start
+        return json.loads(content), request_time, len(content)
+
+    async def _query_public(self, method, params, api=None):
+        """
+        Llamada a un endpoint público respetando el límite de peticiones
+
+        Returns:
+            (respuesta JSON, segundos de la petición, bytes recibidos)
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            await self.public_limiter.acquire()
+            res, request_time, n_bytes = await self._request('GET', f'/{API_VERSION}/public/{method}', params)
+
+            if RATE_LIMIT_ERROR not in res.get('error', []) or attempt == RATE_LIMIT_RETRIES:
+                return res, request_time, n_bytes
+            logger.warning(f"Rate limit de Kraken en {method} {params.get('pair')}, reintento {attempt + 1}")
+            await asyncio.sleep(2 ** attempt)
+
+    async def _query_private(self, method, data=None):
+        """Llamada firmada a un endpoint privado (mismo esquema que krakenex)"""
+        if not self.key or not self.secret:
+            raise ValueError("Faltan las credenciales de Kraken (api_key/api_secret)")
+
+        urlpath = f'/{API_VERSION}/private/{method}'
+        self._get_session()
+        guard = contextlib.nullcontext() if self.nonce_window else self._private_lock
+        async with guard:
+            data = dict(data or {})
+            data['nonce'] = self._nonce()
+            postdata = urllib.parse.urlencode(data)
+            headers = {
+                'API-Key': self.key,
+                'API-Sign': sign_request(self.secret, urlpath, data['nonce'], postdata),
+                'Content-Type': 'application/x-www-form-urlencoded; charset=utf-8'
+            }
+            res, _, _ = await self._request('POST', urlpath, body=postdata, headers=headers)
+        return res
+
+    async def _query_private_result(self, method, data=None):
+        """Resultado de un endpoint privado (lanza si Kraken devuelve error)"""
+        res = await self._query_private(method, data)
+        if res.get('error'):
+            raise ValueError(f"Kraken {method}: {res['error']}")
+        return res['result']
+
+    # ------------------------------------------------------------------
+    # Cuenta y mercado
+    # ------------------------------------------------------------------
+
+    async def get_balance(self):
+        """Obtener balance de la cuenta"""
+        try:
+            result = await self._query_private_result('Balance')
+            balance = pd.DataFrame(index=['vol'], data=result).T
+            if not balance.empty:
+                balance['vol'] = balance['vol'].astype(float)
+            return balance
+        except Exception as e:
+            logger.error(f"Error obteniendo balance: {e}")
+            return None
+
+    async def get_tradable_balance(self, currency='USD'):
+        """Obtener balance disponible para trading en margin"""
+        try:
+            result = await self._query_private_result('TradeBalance', {'asset': currency})
+            return float(result['eb'])  # Equivalent balance
+        except Exception as e:
+            logger.error(f"Error obteniendo balance tradable: {e}")
+            return 0.0
+
+    async def get_ticker(self, pair='XETHZUSD'):
+        """Obtener precio actual"""
+        try:
+            res, _, _ = await self._query_public('Ticker', {'pair': pair})
+            if res.get('error'):
+                raise ValueError(res['error'])
+            return self._parse_ticker(next(iter(res['result'].values())))
+        except Exception as e:
+            logger.error(f"Error obteniendo ticker: {e}")
+            return None
+
+    async def get_ohlc_data(self, pair='XETHZUSD', interval=15, window=OHLC_MAX_ROWS):
+        """Obtener datos OHLC (ver KrakenTrader.get_ohlc_data)"""
+        try:
+            return self._validated_ohlc(await self._update_ohlc(pair, interval), pair, interval, window)
+        except Exception as e:
+            logger.error(f"Error obteniendo OHLC: {e}", exc_info=True)
+            return None
+
+    async def get_ohlc_bulk(self, pairs, intervals=(15,), window=OHLC_MAX_ROWS):
+        """
+        Obtener OHLC de varios pares e intervalos a la vez
+
+        Las peticiones salen en paralelo por el pool compartido, limitadas
+        por public_rate/public_burst.
+
+        Returns:
+            Dict {(par, intervalo): DataFrame validado o None si falló}
+        """
+        jobs = [(pair, interval) for pair in pairs for interval in intervals]
+        start = time.perf_counter()
+
+        async def run(job):
+            pair, interval = job
+            try:
+                buffer = await self._update_ohlc(pair, interval)
+                return job, self._validated_ohlc(buffer, pair, interval, window)
+            except Exception as e:
+                logger.error(f"Error obteniendo OHLC {pair}/{interval}m: {e}")
+                return job, None
+
+        results = dict(await asyncio.gather(*(run(job) for job in jobs)))
+
+        failed = sum(df is None for df in results.values())
+        logger.info(f"OHLC masivo: {len(jobs) - failed}/{len(jobs)} series en "
+                    f"{time.perf_counter() - start:.2f}s")
+        return results
+
+    async def _update_ohlc(self, pair, interval, api=None):
+        """Actualizar las velas de (par, intervalo) desde el cursor guardado"""
+        buffer, cursor = self._ohlc_cursor(pair, interval)
+        fetched, last = await self._fetch_ohlc(pair, interval, since=cursor)
+        return self._store_ohlc(pair, interval, buffer, cursor, fetched, last)
+
+    async def _fetch_ohlc(self, pair, interval, since=None, api=None):
+        """
+        Descargar velas OHLC de Kraken (endpoint público OHLC)
+
+        Returns:
+            (DataFrame en orden cronológico con índice 'dtime' en UTC, cursor last)
+        """
+        params = {'pair': pair, 'interval': interval}
+        if since is not None:
+            params['since'] = since
+
+        res, request_time, n_bytes = await self._query_public('OHLC', params)
+        return self._parse_ohlc(res, pair, interval, since, request_time, n_bytes)
+
+    async def get_trades_page(self, pair, since=None):
+        """
+        Una página de operaciones del endpoint público Trades (máx. 1000)
+
+        Returns:
+            (filas [precio, volumen, tiempo, lado, tipo, misc, id], cursor last)
+        """
+        params = {'pair': pair}
+        if since is not None:
+            params['since'] = since
+
+        res, request_time, _ = await self._query_public('Trades', params)
+        if res.get('error'):
+            raise ValueError(f"Kraken Trades: {res['error']}")
+
+        result = res['result']
+        last = result.pop('last')
+        rows = next(iter(result.values()), [])
+        logger.debug(f"Trades {pair}: {len(rows)} operaciones desde {since}, petición {request_time*1000:.0f} ms")
+        return rows, last
+
+    # ------------------------------------------------------------------
+    # Órdenes y posiciones
+    # ------------------------------------------------------------------
+
+    async def get_pair_info(self, pair):
+        """Información del par (AssetPairs), en caché; None si falla"""
+        if pair not in self.pair_info:
+            try:
+                res, _, _ = await self._query_public('AssetPairs', {'pair': pair})
+                if res.get('error'):
+                    raise ValueError(res['error'])
+                self.pair_info[pair] = pd.Series(next(iter(res['result'].values())))
+            except Exception as e:
+                logger.error(f"Error obteniendo información de {pair}: {e}")
+                return None
+        return self.pair_info[pair]
+
+    async def calculate_position_size(self, balance, risk_percent, stop_loss_points,
+                                      current_price, pair='XETHZUSD'):
+        """Calcular tamaño de posición óptimo (ver KrakenTrader.calculate_position_size)"""
+        try:
+            info = await self.get_pair_info(pair)
+            if info is None:
+                return None
+            return self._position_size(info, balance, risk_percent, stop_loss_points, current_price)
+        except Exception as e:
+            logger.error(f"Error calculando posición: {e}")
+            return None
+
+    async def place_margin_order(self, pair, side, size, leverage=2,
+                                 stop_loss=None, take_profit=None):
+        """Colocar orden en margin (ver KrakenTrader.place_margin_order)"""
+        try:
+            order_params = self._margin_order_params(pair, side, size, leverage, stop_loss, take_profit)
+            return self._order_result(await self._query_private('AddOrder', order_params))
+        except Exception as e:
+            logger.error(f"Error colocando orden: {e}")
+            return None
+
+    async def get_open_positions(self):
+        """Obtener posiciones abiertas (dict txid → posición, como pykrakenapi)"""
+        try:
+            return await self._query_private_result('OpenPositions')
+        except Exception as e:
+            logger.error(f"Error obteniendo posiciones: {e}")
+            return {}
+
+    async def get_open_orders(self):
+        """Obtener órdenes abiertas"""
+        try:
+            result = await self._query_private_result('OpenOrders')
+            return pd.DataFrame(result['open']).T
+        except Exception as e:
+            logger.error(f"Error obteniendo órdenes: {e}")
+            return pd.DataFrame()
+
+    async def cancel_order(self, txid):
+        """Cancelar una orden"""
+        try:
+            response = await self._query_private('CancelOrder', {'txid': txid})
+            return len(response.get('error', [])) == 0
+        except Exception as e:
+            logger.error(f"Error cancelando orden: {e}")
+            return False
+
+    async def close_position(self, pair, position_type='long', positions=None):
+        """
+        Cerrar una posición
+
+        Args:
+            positions: Posiciones abiertas ya descargadas en este ciclo (None = pedirlas)
+        """
+        try:
+            if positions is None:
+                positions = await self.get_open_positions()
+            order_params = self._close_order_params(positions, pair, position_type)
+
+            if order_params is None:
+                return True
+
+            response = await self._query_private('AddOrder', order_params)
+
+            if response.get('error'):
+                logger.error(f"Error cerrando posición: {response['error']}")
+                return False
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error cerrando posición: {e}")
+            return False
+
+    async def update_trailing_stop(self, txid, new_stop_price):
+        """Actualizar trailing stop de una orden (cancelando la actual, como KrakenTrader)"""
+        try:
+            if not await self.cancel_order(txid):
+                return False
+
+            logger.warning("Trailing stop actualizado (cancelando orden anterior)")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error actualizando trailing stop: {e}")
+            return False
@@ -0,0 +1,623 @@
+"""
+Kraken Mock Module
+Servidores locales que imitan la API pública de Kraken (REST con el mismo
+formato JSON y latencia configurable; WebSocket v2 que reproduce una
+grabación) para pruebas y benchmarks sin red
+
+Uso:
+    python kraken_mock.py [pares] [latencia_s]   # benchmarks secuencial vs masivo y ciclo sync vs async
+"""
+
+import sys
+import hmac
+import json
+import time
+import zlib
+import base64
+import hashlib
+import asyncio
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger(__name__)
+
+OHLC_MAX_ROWS = 720
+TRADES_PAGE_SIZE = 1000
+
+
+def mock_ohlc_rows(pair, interval, end_ts, n_rows=OHLC_MAX_ROWS):
+    """
+    Velas deterministas de un par (mismo timestamp = misma vela en cualquier llamada)
+
+    Returns:
+        Filas con el formato de Kraken [time, open, high, low, close, vwap, volume, count]
+        terminando en la vela que contiene end_ts (en formación)
+    """
+    step = interval * 60
+    seed = zlib.crc32(pair.encode()) % 1000
+    k = np.arange(end_ts // step - n_rows + 1, end_ts // step + 1, dtype=np.int64)
+
+    # Precio suave por senos + ruido pseudoaleatorio reproducible a partir de k
+    noise = ((k * 2654435761 + seed * 97) % 2**32) / 2**32 - 0.5
+    base = 1.0 + seed / 100
+    close = base * np.exp(0.05 * np.sin(k / 50 + seed) + 0.01 * np.sin(k / 7) + 0.002 * noise)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + 0.001 * np.abs(noise))
+    low = np.minimum(open_, close) * (1 - 0.001 * np.abs(noise))
+    volume = 1000 * (1.5 + noise)
+    count = (50 * (1.5 + noise)).astype(int)
+
+    return [[int(t * step), f"{o:.6f}", f"{h:.6f}", f"{l:.6f}", f"{c:.6f}", f"{(h + l + c) / 3:.6f}",
+             f"{v:.8f}", int(n)]
+            for t, o, h, l, c, v, n in zip(k, open_, high, low, close, volume, count)]
+
+
+def make_trade_tape(path, pair='XXRPZUSD', start='2024-01-01', end='2024-01-03', trades_per_minute=5,
+                    seed=42, page_size=TRADES_PAGE_SIZE):
+    """
+    Generar una grabación sintética de Trades (JSONL, una página por línea,
+    con el mismo formato que record_trades)
+
+    Returns:
+        Número de operaciones
+    """
+    rng = np.random.default_rng(seed)
+    start_s = pd.Timestamp(start, tz='UTC').timestamp()
+    end_s = pd.Timestamp(end, tz='UTC').timestamp()
+
+    n = rng.poisson((end_s - start_s) / 60 * trades_per_minute)
+    times = np.sort(rng.uniform(start_s, end_s, n))
+    prices = 0.5 * np.exp(np.cumsum(rng.normal(0, 0.0005, n)))
+    volumes = rng.lognormal(5, 1, n)
+    sides = rng.choice(['b', 's'], n)
+
+    with open(path, 'w') as f:
+        for first in range(0, n, page_size):
+            rows = [[f"{p:.6f}", f"{v:.8f}", round(float(t), 6), side, 'l', '', first + i + 1]
+                    for i, (p, v, t, side) in enumerate(zip(prices[first:first + page_size],
+                                                            volumes[first:first + page_size],
+                                                            times[first:first + page_size],
+                                                            sides[first:first + page_size]))]
+            f.write(json.dumps({'pair': pair, 'rows': rows, 'last': str(int(rows[-1][2] * 1e9))}) + "\n")
+    return n
+
+
+def record_trades(path, pair='XXRPZUSD', since=None, pages=10, trader=None):
+    """Grabar páginas reales del endpoint Trades (para reproducirlas con KrakenMockServer)"""
+    if trader is None:
+        from kraken_trader import KrakenTrader
+        trader = KrakenTrader(None, None)
+
+    with open(path, 'w') as f:
+        for _ in range(pages):
+            rows, last = trader.get_trades_page(pair, since)
+            if not rows:
+                break
+            f.write(json.dumps({'pair': pair, 'rows': rows, 'last': last}) + "\n")
+            since = last
+    return path
+
+
+class KrakenMockServer:
+    """
+    Servidor local con los endpoints de Kraken
+
+    Responde a /0/public/OHLC con velas deterministas (mock_ohlc_rows),
+    aplicando `since` y el cursor `last` como Kraken, a /0/public/Trades
+    paginando una grabación de operaciones (record_trades / make_trade_tape),
+    a Ticker/AssetPairs, y a los endpoints privados que usa el bot (Balance,
+    TradeBalance, OpenPositions, OpenOrders, AddOrder, CancelOrder) con una
+    cuenta simulada. Si se da api_secret, las peticiones privadas se
+    rechazan con firma inválida o nonce repetido/atrasado como en Kraken.
+    Opcionalmente aplica un límite de peticiones y responde
+    'EAPI:Rate limit exceeded'.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, rate_limit=None, trades=None,
+                 api_key=None, api_secret=None, balance=10000.0):
+        """
+        Args:
+            host: Interfaz donde escuchar
+            port: Puerto (0 = libre)
+            latency: Segundos de espera por petición
+            rate_limit: (peticiones/s, ráfaga) a partir de los cuales se responde
+                con error de rate limit (None = sin límite)
+            trades: Grabación de Trades (JSONL de páginas) a servir
+            api_key: API key esperada en las peticiones privadas (None = no se comprueba)
+            api_secret: Secreto (base64) con el que se verifica API-Sign
+            balance: Balance inicial en USD de la cuenta simulada
+        """
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.trades = self._load_trades(trades) if trades else {}
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.balance = balance
+        self.positions = {}
+        self.orders = {}
+        self.requests = 0
+        self.rate_limited = 0
+        self.private_requests = 0
+        self.rejected = 0
+        self._last_nonce = 0
+        self._lock = threading.Lock()
+        self._tokens = rate_limit[1] if rate_limit else 0
+        self._updated = time.monotonic()
+
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive: los clientes reutilizan la conexión
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                mock._handle(self, url.path, {k: v[-1] for k, v in parse_qs(url.query).items()})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+                params = {k: v[-1] for k, v in parse_qs(body, keep_blank_values=True).items()}
+                mock._handle(self, urlparse(self.path).path, params, body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _allow(self):
+        """Token bucket del servidor"""
+        with self._lock:
+            self.requests += 1
+            if not self.rate_limit:
+                return True
+            rate, burst = self.rate_limit
+            now = time.monotonic()
+            self._tokens = min(burst, self._tokens + (now - self._updated) * rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.rate_limited += 1
+            return False
+
+    def _handle(self, handler, path, params, raw_body=None):
+        time.sleep(self.latency)
+
+        if not self._allow():
+            body = {'error': ['EAPI:Rate limit exceeded']}
+        elif path == '/0/public/OHLC':
+            body = self._ohlc(params)
+        elif path == '/0/public/Trades':
+            body = self._trades(params)
+        elif path == '/0/public/Ticker':
+            body = self._ticker(params)
+        elif path == '/0/public/AssetPairs':
+            body = self._asset_pairs(params)
+        elif path.startswith('/0/private/'):
+            body = self._private(handler, path, params, raw_body or '')
+        else:
+            body = {'error': [f'EGeneral:Unknown method {path}']}
+
+        payload = json.dumps(body).encode()
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _ohlc(self, params):
+        pair = params.get('pair', 'XXRPZUSD')
+        interval = int(params.get('interval', 1))
+        rows = mock_ohlc_rows(pair, interval, int(time.time()))
+
+        since = params.get('since')
+        if since is not None:
+            rows = [row for row in rows if row[0] >= int(since)]
+
+        # `last` = última vela cerrada (la última fila está en formación)
+        last = rows[-2][0] if len(rows) > 1 else rows[-1][0]
+        return {'error': [], 'result': {pair: rows, 'last': last}}
+
+    def _ticker(self, params):
+        pair = params.get('pair', 'XXRPZUSD')
+        close = mock_ohlc_rows(pair, 1, int(time.time()), n_rows=1)[0][4]
+        price = float(close)
+        return {'error': [], 'result': {pair: {
+            'a': [f"{price * 1.0001:.6f}", '1', '1.000'],
+            'b': [f"{price * 0.9999:.6f}", '1', '1.000'],
+            'c': [close, '10.0'],
+        }}}
+
+    @staticmethod
+    def _asset_pairs(params):
+        pair = params.get('pair', 'XXRPZUSD')
+        return {'error': [], 'result': {pair: {'altname': pair, 'lot_decimals': 8, 'pair_decimals': 5,
+                                               'ordermin': '10', 'leverage_buy': [2, 3, 4, 5],
+                                               'leverage_sell': [2, 3, 4, 5]}}}
+
+    # ------------------------------------------------------------------
+    # Endpoints privados (cuenta simulada)
+    # ------------------------------------------------------------------
+
+    def _check_auth(self, handler, path, params, raw_body):
+        """Error de autenticación como el de Kraken, o None si la petición es válida"""
+        if 'nonce' not in params:
+            return 'EAPI:Invalid nonce'
+        if self.api_secret is None:
+            return None
+        if self.api_key is not None and handler.headers.get('API-Key') != self.api_key:
+            return 'EAPI:Invalid key'
+
+        message = path.encode() + hashlib.sha256((params['nonce'] + raw_body).encode()).digest()
+        expected = base64.b64encode(hmac.new(base64.b64decode(self.api_secret), message, hashlib.sha512).digest())
+        if not hmac.compare_digest(expected.decode(), handler.headers.get('API-Sign', '')):
+            return 'EAPI:Invalid signature'
+
+        # Sin ventana de nonce: cada nonce tiene que ser mayor que el anterior
+        nonce = int(params['nonce'])
+        if nonce <= self._last_nonce:
+            return 'EAPI:Invalid nonce'
+        self._last_nonce = nonce
+        return None
+
+    def _private(self, handler, path, params, raw_body):
+        with self._lock:
+            self.private_requests += 1
+            error = self._check_auth(handler, path, params, raw_body)
+            if error:
+                self.rejected += 1
+                return {'error': [error]}
+
+            method = path.rsplit('/', 1)[-1]
+            if method == 'Balance':
+                return {'error': [], 'result': {'ZUSD': f"{self.balance:.4f}"}}
+            if method == 'TradeBalance':
+                return {'error': [], 'result': {'eb': f"{self.balance:.4f}", 'tb': f"{self.balance:.4f}",
+                                                'm': '0.0000', 'n': '0.0000'}}
+            if method == 'OpenPositions':
+                return {'error': [], 'result': dict(self.positions)}
+            if method == 'OpenOrders':
+                return {'error': [], 'result': {'open': dict(self.orders)}}
+            if method == 'AddOrder':
+                return self._add_order(params)
+            if method == 'CancelOrder':
+                if self.orders.pop(params.get('txid'), None) is None:
+                    return {'error': ['EOrder:Unknown order']}
+                return {'error': [], 'result': {'count': 1}}
+            return {'error': [f'EGeneral:Unknown method {path}']}
+
+    def _add_order(self, params):
+        """Orden a mercado: abre una posición, o cierra la del par si va en sentido contrario"""
+        txid = f"O{len(self.orders) + len(self.positions) + 1:05d}-MOCK"
+        pair, side, volume = params['pair'], params['type'], params['volume']
+        descr = {'order': f"{side} {volume} {pair} @ market"}
+
+        closing = [key for key, pos in self.positions.items()
+                   if pos['pair'] == pair and pos['type'] != side]
+        if params.get('leverage') == 'none' and closing:
+            del self.positions[closing[0]]
+        elif params.get('validate') not in ('True', 'true'):
+            self.positions[f"T{txid[1:]}"] = {'ordertxid': txid, 'pair': pair, 'type': side,
+                                             'ordertype': 'market', 'vol': volume, 'vol_closed': '0',
+                                             'time': time.time()}
+        return {'error': [], 'result': {'txid': [txid], 'descr': descr}}
+
+    @staticmethod
+    def _load_trades(path):
+        """Páginas grabadas → por par, operaciones únicas ordenadas y sus tiempos en ns"""
+        by_pair = {}
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    page = json.loads(line)
+                    by_pair.setdefault(page['pair'], {}).update({row[6]: row for row in page['rows']})
+
+        tapes = {}
+        for pair, rows in by_pair.items():
+            rows = sorted(rows.values(), key=lambda row: row[2])
+            tapes[pair] = (rows, np.array([int(round(row[2] * 1e9)) for row in rows], dtype=np.int64))
+        return tapes
+
+    def _trades(self, params):
+        pair = params.get('pair')
+        if pair not in self.trades:
+            return {'error': ['EQuery:Unknown asset pair']}
+
+        rows, times_ns = self.trades[pair]
+        since = int(params.get('since', 0))
+        # Se interpreta como segundos si no parece un timestamp en ns (como Kraken)
+        if since < 10**12:
+            since *= 10**9
+        first = np.searchsorted(times_ns, since, side='right')
+        count = min(int(params.get('count', TRADES_PAGE_SIZE)), TRADES_PAGE_SIZE)
+        page = rows[first:first + count]
+
+        last = str(times_ns[first + len(page) - 1]) if page else str(since)
+        return {'error': [], 'result': {pair: page, 'last': last}}
+
+
+# ============================================================================
+# WEBSOCKET (CANAL OHLC v2)
+# ============================================================================
+
+def _ws_item(symbol, interval, row):
+    """Fila REST [time, open, ...] → elemento del canal ohlc v2"""
+    begin = pd.Timestamp(row[0], unit='s', tz='UTC')
+    return {
+        'symbol': symbol,
+        'open': float(row[1]), 'high': float(row[2]), 'low': float(row[3]), 'close': float(row[4]),
+        'vwap': float(row[5]), 'volume': float(row[6]), 'trades': int(row[7]),
+        'interval_begin': begin.strftime('%Y-%m-%dT%H:%M:%S.%f000Z'),
+        'interval': interval,
+        'timestamp': (begin + pd.Timedelta(minutes=interval)).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+    }
+
+
+def make_ohlc_recording(path, symbol='XRP/USD', interval=1, n_bars=10, updates_per_bar=3,
+                        history=50, end_ts=None, rest_pair='XXRPZUSD', seconds_per_update=0.05):
+    """
+    Generar una grabación sintética del canal ohlc (JSONL: {"t": segundos, "msg": {...}})
+
+    Las velas son las de mock_ohlc_rows(rest_pair), así que coinciden con lo
+    que devuelve KrakenMockServer por REST al rellenar huecos. La última vela
+    de la grabación es la que contiene end_ts (por defecto, ahora).
+    """
+    end_ts = int(end_ts or time.time())
+    rows = mock_ohlc_rows(rest_pair, interval, end_ts, n_rows=history + n_bars)
+    t = 0.0
+
+    with open(path, 'w') as f:
+        snapshot = [_ws_item(symbol, interval, row) for row in rows[:history + 1]]
+        f.write(json.dumps({'t': t, 'msg': {'channel': 'ohlc', 'type': 'snapshot', 'data': snapshot}}) + "\n")
+
+        for row in rows[history:]:
+            # Actualizaciones parciales de la vela hasta llegar a sus valores finales
+            for step in range(1, updates_per_bar + 1):
+                if step == updates_per_bar:
+                    partial = row
+                else:
+                    frac = step / updates_per_bar
+                    open_ = float(row[1])
+                    close = open_ + (float(row[4]) - open_) * frac
+                    partial = [row[0], open_, max(open_, close), min(open_, close), close, row[5],
+                               float(row[6]) * frac, max(1, int(row[7] * frac))]
+                t += seconds_per_update
+                msg = {'channel': 'ohlc', 'type': 'update', 'data': [_ws_item(symbol, interval, partial)]}
+                f.write(json.dumps({'t': t, 'msg': msg}) + "\n")
+
+    return path
+
+
+def record_ws(path, symbol='XRP/USD', interval=1, duration=300, url='wss://ws.kraken.com/v2'):
+    """Grabar el canal ohlc real durante `duration` segundos (para reproducirlo después)"""
+    from websockets.asyncio.client import connect
+
+    async def record():
+        start = time.monotonic()
+        async with connect(url) as ws:
+            await ws.send(json.dumps({'method': 'subscribe', 'params': {
+                'channel': 'ohlc', 'symbol': [symbol], 'interval': interval, 'snapshot': True}}))
+            with open(path, 'w') as f:
+                while time.monotonic() - start < duration:
+                    try:
+                        raw = await asyncio.wait_for(ws.recv(), timeout=duration)
+                    except asyncio.TimeoutError:
+                        break
+                    msg = json.loads(raw)
+                    if msg.get('channel') == 'ohlc':
+                        f.write(json.dumps({'t': time.monotonic() - start, 'msg': msg}) + "\n")
+
+    asyncio.run(record())
+    return path
+
+
+class KrakenWSMockServer:
+    """
+    WebSocket local que reproduce una grabación del canal ohlc
+
+    Tras la suscripción (con el mismo ack que Kraken) envía los mensajes
+    grabados respetando sus tiempos (divididos por `speed`). La posición de
+    reproducción se conserva entre conexiones; drop_after corta la conexión
+    cada N mensajes y skip_on_reconnect descarta mensajes como si se hubieran
+    perdido durante la desconexión.
+    """
+
+    def __init__(self, recording, host='127.0.0.1', port=0, speed=1.0, drop_after=None,
+                 skip_on_reconnect=0):
+        with open(recording) as f:
+            self.messages = [json.loads(line) for line in f if line.strip()]
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.drop_after = drop_after
+        self.skip_on_reconnect = skip_on_reconnect
+        self.position = 0
+        self.connections = 0
+        self.finished = threading.Event()
+        self._ready = threading.Event()
+        self._loop = None
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+            self._thread.join(10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    async def _serve(self):
+        from websockets.asyncio.server import serve
+
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        async with serve(self._handler, self.host, self.port) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            self._ready.set()
+            await self._stop.wait()
+
+    async def _handler(self, ws):
+        request = json.loads(await ws.recv())
+        params = request.get('params', {})
+        await ws.send(json.dumps({
+            'method': 'subscribe', 'success': True,
+            'result': {'channel': params.get('channel'), 'symbol': (params.get('symbol') or [''])[0],
+                       'interval': params.get('interval'), 'snapshot': params.get('snapshot', True)}
+        }))
+
+        self.connections += 1
+        if self.connections > 1:
+            self.position += self.skip_on_reconnect
+
+        sent = 0
+        while self.position < len(self.messages):
+            if self.drop_after is not None and sent >= self.drop_after:
+                await ws.close(1011, 'mock drop')
+                return
+
+            entry = self.messages[self.position]
+            if self.position > 0:
+                delay = (entry['t'] - self.messages[self.position - 1]['t']) / self.speed
+                await asyncio.sleep(max(0.0, delay))
+            await ws.send(json.dumps(entry['msg']))
+            self.position += 1
+            sent += 1
+
+        self.finished.set()
+        await ws.wait_closed()
+
+
+# ============================================================================
+# BENCHMARKS (SECUENCIAL VS MASIVO, CICLO SÍNCRONO VS ASYNC)
+# ============================================================================
+
+def benchmark_bulk(n_pairs=20, latency=0.2, intervals=(15,)):
+    """Comparar get_ohlc_data par a par con get_ohlc_bulk contra el servidor local"""
+    from kraken_trader import KrakenTrader
+
+    pairs = [f"MOCK{i:02d}USD" for i in range(n_pairs)]
+
+    with KrakenMockServer(latency=latency) as server:
+        # Límite holgado: aquí se mide la concurrencia, no el rate limit real
+        trader = KrakenTrader(None, None, api_url=server.url, public_rate=50, public_burst=50)
+        start = time.perf_counter()
+        for pair in pairs:
+            for interval in intervals:
+                trader.get_ohlc_data(pair, interval)
+        serial = time.perf_counter() - start
+
+        trader = KrakenTrader(None, None, api_url=server.url, public_rate=50, public_burst=50)
+        start = time.perf_counter()
+        results = trader.get_ohlc_bulk(pairs, intervals)
+        bulk = time.perf_counter() - start
+
+    ok = sum(df is not None for df in results.values())
+    print(f"\n📊 {len(results)} series, latencia {latency * 1000:.0f} ms")
+    print(f"   Secuencial: {serial:.2f}s")
+    print(f"   Masivo:     {bulk:.2f}s ({ok} correctas, x{serial / bulk:.1f})")
+    return serial, bulk
+
+
+def benchmark_cycle(latency=0.2, n_cycles=3):
+    """
+    Llamadas a Kraken de un ciclo que abre posición: cliente síncrono (una
+    tras otra) frente a AsyncKrakenTrader (velas, balance, posiciones e
+    información del par a la vez, después la orden)
+
+    El limitador propio de pykrakenapi (una pública por segundo, contador de
+    privadas) dormiría 5 s en cuanto dos ciclos caen en el mismo segundo y
+    se mediría la espera, no las llamadas: se desactiva el contador y los
+    ciclos síncronos se separan 1 s fuera del tiempo medido.
+    """
+    from pykrakenapi import KrakenAPI
+    from kraken_trader import KrakenTrader
+    from kraken_async import AsyncKrakenTrader
+
+    key, secret = 'mock-key', base64.b64encode(b'mock-secret').decode()
+    pair, interval = 'XXRPZUSD', 60
+    args = dict(api_url=None, public_rate=50, public_burst=50)
+
+    with KrakenMockServer(latency=latency, api_key=key, api_secret=secret) as server:
+        args['api_url'] = server.url
+
+        trader = KrakenTrader(key, secret, **args)
+        trader.k = KrakenAPI(trader.api, tier='None', retry=0, crl_sleep=0)
+        serial = 0.0
+        for i in range(n_cycles):
+            if i:
+                time.sleep(1.0)
+            start = time.perf_counter()
+            trader.get_ohlc_data(pair, interval)
+            balance = trader.get_tradable_balance()
+            trader.get_open_positions()
+            trader.pair_info.clear()
+            size = trader.calculate_position_size(balance, 0.05, 200, 0.5, pair)
+            trader.place_margin_order(pair, 'buy', size['size'], size['leverage'], 0.49, 0.51)
+            serial += time.perf_counter() - start
+        serial /= n_cycles
+
+        async def run_async():
+            async with AsyncKrakenTrader(key, secret, **args) as client:
+                start = time.perf_counter()
+                for _ in range(n_cycles):
+                    client.pair_info.clear()
+                    _, balance, _, _ = await asyncio.gather(
+                        client.get_ohlc_data(pair, interval), client.get_tradable_balance(),
+                        client.get_open_positions(), client.get_pair_info(pair))
+                    size = await client.calculate_position_size(balance, 0.05, 200, 0.5, pair)
+                    await client.place_margin_order(pair, 'buy', size['size'], size['leverage'], 0.49, 0.51)
+                return (time.perf_counter() - start) / n_cycles
+
+        concurrent = asyncio.run(run_async())
+        rejected = server.rejected
+
+    print(f"\n📊 Ciclo con apertura de posición, latencia {latency * 1000:.0f} ms")
+    print(f"   Síncrono: {serial:.2f}s")
+    print(f"   Async:    {concurrent:.2f}s (x{serial / concurrent:.1f}, {rejected} peticiones rechazadas)")
+    return serial, concurrent
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    benchmark_bulk(n_pairs, latency)
+    benchmark_cycle(latency)
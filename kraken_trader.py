@@ -7,16 +7,64 @@ import krakenex
 from pykrakenapi import KrakenAPI
 import pandas as pd
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal, ROUND_DOWN
 import logging
 
+from candle_store import CandleStore
+from candle_buffer import CandleRingBuffer
+from data_quality import LiveQualityPolicy, validate_ohlcv, format_quality_report
+from http_session import create_session
+
 logger = logging.getLogger(__name__)
 
+# Columnas del endpoint OHLC de Kraken y máximo de velas por respuesta
+OHLC_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+OHLC_MAX_ROWS = 720
+
+# Límite de los endpoints públicos (~1 petición/s por IP, con algo de ráfaga)
+PUBLIC_RATE_PER_SECOND = 1.0
+PUBLIC_BURST = 3
+RATE_LIMIT_ERROR = 'EAPI:Rate limit exceeded'
+RATE_LIMIT_RETRIES = 3
+
+
+class RateLimiter:
+    """Token bucket compartido entre hilos"""
+    
+    def __init__(self, rate, burst=1):
+        """
+        Args:
+            rate: Peticiones por segundo sostenidas
+            burst: Peticiones que se pueden hacer seguidas sin esperar
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Esperar a que haya un token disponible y consumirlo"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
 
 class KrakenTrader:
     """Gestor de trading para Kraken Margin"""
     
-    def __init__(self, api_key, api_secret, leverage_min=2, leverage_max=5):
+    def __init__(self, api_key, api_secret, leverage_min=2, leverage_max=5,
+                 candle_store_dir=None, quality_policy=LiveQualityPolicy, api_url=None,
+                 public_rate=PUBLIC_RATE_PER_SECOND, public_burst=PUBLIC_BURST):
         """
         Inicializar conexión con Kraken
         
@@ -25,8 +73,16 @@ class KrakenTrader:
             api_secret: API secret de Kraken
             leverage_min: Apalancamiento mínimo (para evitar comisiones)
             leverage_max: Apalancamiento máximo permitido
+            candle_store_dir: Directorio del almacén de velas (None = solo memoria)
+            quality_policy: Política de reparación de velas (data_quality)
+            api_url: URL base de la API (None = Kraken; p.ej. kraken_mock en pruebas)
+            public_rate: Peticiones/s a endpoints públicos (compartido entre hilos)
+            public_burst: Ráfaga permitida a endpoints públicos
         """
         self.api = krakenex.API(key=api_key, secret=api_secret)
+        self.api.session = create_session(self.api.session.headers)
+        if api_url:
+            self.api.uri = api_url.rstrip('/')
         self.k = KrakenAPI(self.api)
         self.leverage_min = leverage_min
         self.leverage_max = leverage_max
@@ -34,6 +90,19 @@ class KrakenTrader:
         # Información del par
         self.pair_info = {}
         
+        # Buffer circular de velas OHLC y cursor `last` por (par, intervalo)
+        self._ohlc_buffers = {}
+        self._ohlc_cursors = {}
+        self.candle_store = CandleStore(candle_store_dir) if candle_store_dir else None
+        
+        # Validación de velas e informe de la última descarga
+        self.quality_policy = quality_policy
+        self.last_quality_report = None
+        
+        # Endpoints públicos: límite compartido y un cliente por hilo en descargas masivas
+        self.public_limiter = RateLimiter(public_rate, public_burst)
+        self._thread_api = threading.local()
+        
     def get_balance(self):
         """Obtener balance de la cuenta"""
         try:
@@ -47,7 +116,7 @@ class KrakenTrader:
         """Obtener balance disponible para trading en margin"""
         try:
             balance = self.k.get_trade_balance(asset=currency)
-            return float(balance['eb'])  # Equivalent balance
+            return float(balance.loc['eb'].iloc[0])  # Equivalent balance (filas = campos de TradeBalance)
         except Exception as e:
             logger.error(f"Error obteniendo balance tradable: {e}")
             return 0.0
@@ -56,66 +125,275 @@ class KrakenTrader:
         """Obtener precio actual"""
         try:
             ticker = self.k.get_ticker_information(pair)
-            return {
-                'ask': float(ticker['a'][0][0]),  # Precio ask
-                'bid': float(ticker['b'][0][0]),  # Precio bid
-                'last': float(ticker['c'][0][0])  # Último precio
-            }
+            return self._parse_ticker(ticker.iloc[0])
         except Exception as e:
             logger.error(f"Error obteniendo ticker: {e}")
             return None
     
-    def get_ohlc_data(self, pair='XETHZUSD', interval=15):
+    @staticmethod
+    def _parse_ticker(ticker):
+        """Campos a/b/c de Ticker → precios ask/bid/last"""
+        return {
+            'ask': float(ticker['a'][0]),  # Precio ask
+            'bid': float(ticker['b'][0]),  # Precio bid
+            'last': float(ticker['c'][0])  # Último precio
+        }
+    
+    def get_ohlc_data(self, pair='XETHZUSD', interval=15, window=OHLC_MAX_ROWS):
         """
         Obtener datos OHLC
         
+        La primera llamada descarga la ventana completa; las siguientes piden
+        solo las velas posteriores al cursor `last` de Kraken y sustituyen la
+        vela que aún se está formando. Velas y cursor se guardan en memoria y,
+        si hay candle_store_dir, en disco (para ejecuciones por cron).
+        
         Args:
             pair: Par de trading
             interval: Intervalo en minutos (1, 5, 15, 30, 60, 240, 1440)
+            window: Velas a devolver (orden cronológico, la última en formación)
         """
         try:
-            ohlc, last = self.k.get_ohlc_data(pair, interval=interval)
-            
-            # Verificar que los datos son válidos
-            if ohlc.empty:
-                logger.error("DataFrame OHLC vacío")
-                return None
-            
-            # Asegurar nombres de columnas consistentes (minúsculas)
-            ohlc.columns = [col.lower() for col in ohlc.columns]
-            
-            # Log para debug
-            logger.info(f"OHLC descargado: {len(ohlc)} filas, columnas: {ohlc.columns.tolist()}")
-            
-            # Verificar columnas requeridas
-            required_cols = ['open', 'high', 'low', 'close', 'volume']
-            missing_cols = [col for col in required_cols if col not in ohlc.columns]
-            
-            if missing_cols:
-                logger.error(f"Columnas faltantes: {missing_cols}")
-                return None
-            
-            # Convertir a numérico y limpiar
-            for col in required_cols:
-                ohlc[col] = pd.to_numeric(ohlc[col], errors='coerce')
-            
-            # Eliminar filas con NaN en columnas críticas
-            initial_len = len(ohlc)
-            ohlc = ohlc.dropna(subset=['close', 'high', 'low'])
-            
-            if len(ohlc) < initial_len:
-                logger.warning(f"Eliminadas {initial_len - len(ohlc)} filas con NaN")
-            
-            if len(ohlc) < 50:
-                logger.error(f"Datos insuficientes después de limpieza: {len(ohlc)} filas")
-                return None
-            
-            return ohlc
-            
+            return self._validated_ohlc(self._update_ohlc(pair, interval), pair, interval, window)
         except Exception as e:
             logger.error(f"Error obteniendo OHLC: {e}", exc_info=True)
             return None
     
+    def _validated_ohlc(self, buffer, pair, interval, window):
+        """Últimas `window` velas del buffer, validadas y reparadas (None si no son suficientes)"""
+        ohlc = buffer.to_dataframe(window)
+        # Verificar columnas requeridas
+        required_cols = ['open', 'high', 'low', 'close', 'volume']
+        missing_cols = [col for col in required_cols if col not in ohlc.columns]
+        
+        if missing_cols:
+            logger.error(f"Columnas faltantes: {missing_cols}")
+            return None
+        
+        # Validar y reparar (con la política en vivo, huecos cortos rellenados)
+        ohlc, report = validate_ohlcv(ohlc, interval, self.quality_policy)
+        self.last_quality_report = report
+        
+        if ohlc.empty:
+            logger.error("DataFrame OHLC vacío")
+            return None
+        
+        if report['ok']:
+            logger.info(f"OHLC {pair}/{interval}m descargado: {len(ohlc)} filas, {format_quality_report(report)}")
+        else:
+            logger.warning(f"OHLC {pair}/{interval}m descargado: {len(ohlc)} filas, {format_quality_report(report)}")
+        
+        if len(ohlc) < 50:
+            logger.error(f"OHLC {pair}/{interval}m: datos insuficientes después de limpieza: {len(ohlc)} filas")
+            return None
+        
+        return ohlc
+    
+    def get_ohlc_bulk(self, pairs, intervals=(15,), window=OHLC_MAX_ROWS, max_workers=8):
+        """
+        Obtener OHLC de varios pares e intervalos en paralelo
+        
+        Cada (par, intervalo) se actualiza como en get_ohlc_data (incremental,
+        caché en memoria y en disco) en un pool de hilos, con un cliente HTTP
+        por hilo. Las peticiones respetan el límite de los endpoints públicos
+        (public_rate/public_burst); las respuestas se parsean en los hilos,
+        solapadas con las peticiones en vuelo.
+        
+        Args:
+            pairs: Lista de pares
+            intervals: Intervalos en minutos
+            window: Velas a devolver por serie
+            max_workers: Peticiones simultáneas como máximo
+            
+        Returns:
+            Dict {(par, intervalo): DataFrame validado o None si falló}
+        """
+        jobs = [(pair, interval) for pair in pairs for interval in intervals]
+        start = time.perf_counter()
+        
+        def run(job):
+            pair, interval = job
+            try:
+                buffer = self._update_ohlc(pair, interval, api=self._worker_api())
+                return job, self._validated_ohlc(buffer, pair, interval, window)
+            except Exception as e:
+                logger.error(f"Error obteniendo OHLC {pair}/{interval}m: {e}")
+                return job, None
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(jobs)) or 1) as executor:
+            results = dict(executor.map(run, jobs))
+        
+        failed = sum(df is None for df in results.values())
+        logger.info(f"OHLC masivo: {len(jobs) - failed}/{len(jobs)} series en "
+                    f"{time.perf_counter() - start:.2f}s")
+        return results
+    
+    def _worker_api(self):
+        """
+        Cliente krakenex propio del hilo (requests.Session no es thread-safe);
+        las conexiones salen del pool compartido
+        """
+        api = getattr(self._thread_api, 'api', None)
+        if api is None:
+            api = krakenex.API()
+            api.session = create_session(self.api.session.headers)
+            api.uri = self.api.uri
+            self._thread_api.api = api
+        return api
+    
+    def _update_ohlc(self, pair, interval, api=None):
+        """
+        Actualizar las velas de (par, intervalo) desde el cursor guardado
+        
+        Las velas nuevas se añaden al buffer circular en el sitio (la vela en
+        formación se sobrescribe), sin reconstruir el histórico.
+        
+        Returns:
+            CandleRingBuffer de la serie (sin validar)
+        """
+        buffer, cursor = self._ohlc_cursor(pair, interval)
+        fetched, last = self._fetch_ohlc(pair, interval, since=cursor, api=api)
+        return self._store_ohlc(pair, interval, buffer, cursor, fetched, last)
+    
+    def _ohlc_cursor(self, pair, interval):
+        """Buffer y cursor desde el que pedir velas (None = ventana completa)"""
+        buffer, cursor = self._load_ohlc_cache(pair, interval)
+        
+        # Cursor demasiado antiguo: Kraken solo devuelve las últimas 720 velas
+        if cursor is not None and time.time() - cursor > OHLC_MAX_ROWS * interval * 60:
+            cursor = None
+        return buffer, cursor
+    
+    def _store_ohlc(self, pair, interval, buffer, cursor, fetched, last):
+        """Añadir las velas descargadas al buffer (y al almacén) y avanzar el cursor"""
+        if cursor is None:
+            # Ventana completa: lo anterior ya no es contiguo con lo descargado
+            buffer = self._ohlc_buffers[(pair, interval)] = CandleRingBuffer(OHLC_MAX_ROWS)
+        buffer.extend(fetched)
+        self._ohlc_cursors[(pair, interval)] = last
+        
+        if self.candle_store is not None:
+            self.candle_store.write('kraken', pair, interval, fetched, metadata={'last': last})
+        
+        return buffer
+    
+    def ohlc_buffer(self, pair, interval):
+        """Buffer circular de velas de (par, intervalo) ya descargadas (None si no hay)"""
+        return self._ohlc_buffers.get((pair, interval))
+    
+    def _query_public(self, method, params, api=None):
+        """
+        Llamada a un endpoint público respetando el límite de peticiones
+        
+        Los errores de rate limit de Kraken se reintentan con espera exponencial.
+        
+        Returns:
+            (respuesta JSON, segundos de la petición)
+        """
+        api = api or self.api
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.public_limiter.acquire()
+            start = time.perf_counter()
+            res = api.query_public(method, params)
+            request_time = time.perf_counter() - start
+            
+            if RATE_LIMIT_ERROR not in res.get('error', []) or attempt == RATE_LIMIT_RETRIES:
+                return res, request_time
+            logger.warning(f"Rate limit de Kraken en {method} {params.get('pair')}, reintento {attempt + 1}")
+            time.sleep(2 ** attempt)
+    
+    def get_trades_page(self, pair, since=None):
+        """
+        Una página de operaciones del endpoint público Trades (máx. 1000)
+        
+        Args:
+            pair: Par de trading
+            since: Cursor (timestamp en nanosegundos, como el `last` devuelto)
+            
+        Returns:
+            (filas [precio, volumen, tiempo, lado, tipo, misc, id], cursor last)
+        """
+        params = {'pair': pair}
+        if since is not None:
+            params['since'] = since
+        
+        res, request_time = self._query_public('Trades', params)
+        if res.get('error'):
+            raise ValueError(f"Kraken Trades: {res['error']}")
+        
+        result = res['result']
+        last = result.pop('last')
+        rows = next(iter(result.values()), [])
+        logger.debug(f"Trades {pair}: {len(rows)} operaciones desde {since}, petición {request_time*1000:.0f} ms")
+        return rows, last
+    
+    def _fetch_ohlc(self, pair, interval, since=None, api=None):
+        """
+        Descargar velas OHLC de Kraken (endpoint público OHLC)
+        
+        Args:
+            api: Cliente krakenex a usar (por defecto self.api)
+        
+        Returns:
+            (DataFrame en orden cronológico con índice 'dtime' en UTC, cursor last)
+        """
+        api = api or self.api
+        params = {'pair': pair, 'interval': interval}
+        if since is not None:
+            params['since'] = since
+        
+        res, request_time = self._query_public('OHLC', params, api)
+        n_bytes = len(api.response.content) if getattr(api, 'response', None) is not None else 0
+        return self._parse_ohlc(res, pair, interval, since, request_time, n_bytes)
+    
+    @staticmethod
+    def _parse_ohlc(res, pair, interval, since, request_time, n_bytes):
+        """Respuesta JSON de OHLC → (DataFrame con índice 'dtime' en UTC, cursor last)"""
+        if res.get('error'):
+            raise ValueError(f"Kraken OHLC: {res['error']}")
+        
+        start = time.perf_counter()
+        result = res['result']
+        last = int(result.pop('last'))
+        rows = next(iter(result.values()))
+        
+        ohlc = pd.DataFrame(rows, columns=OHLC_COLUMNS)
+        ohlc['time'] = ohlc['time'].astype(int)
+        ohlc['count'] = ohlc['count'].astype(int)
+        for col in OHLC_COLUMNS[1:-1]:
+            ohlc[col] = pd.to_numeric(ohlc[col], errors='coerce').astype(float)
+        ohlc.index = pd.to_datetime(ohlc['time'], unit='s')
+        ohlc.index.name = 'dtime'
+        parse_time = time.perf_counter() - start
+        
+        logger.info(f"OHLC {pair}/{interval}m: {len(ohlc)} velas "
+                    f"({'desde ' + str(since) if since is not None else 'ventana completa'}), "
+                    f"{n_bytes:,} bytes, petición {request_time*1000:.0f} ms, parseo {parse_time*1000:.1f} ms")
+        
+        return ohlc, last
+    
+    def _load_ohlc_cache(self, pair, interval):
+        """Buffer de velas y cursor guardados (memoria primero, luego disco)"""
+        key = (pair, interval)
+        if key in self._ohlc_buffers:
+            return self._ohlc_buffers[key], self._ohlc_cursors.get(key)
+        
+        buffer = self._ohlc_buffers[key] = CandleRingBuffer(OHLC_MAX_ROWS)
+        if self.candle_store is None:
+            return buffer, None
+        
+        last = self.candle_store.get_metadata('kraken', pair, interval).get('last')
+        if last is None:
+            return buffer, None
+        
+        # Solo hace falta la ventana que Kraken puede devolver
+        start = pd.Timestamp(last, unit='s', tz='UTC') - pd.Timedelta(minutes=OHLC_MAX_ROWS * interval)
+        cached = self.candle_store.read('kraken', pair, interval, start=start)
+        if cached.empty:
+            return buffer, None
+        buffer.extend(cached)
+        return buffer, last
+    
     def calculate_position_size(self, balance, risk_percent, stop_loss_points, 
                                 current_price, pair='XETHZUSD'):
         """
@@ -133,56 +411,59 @@ class KrakenTrader:
                 pair_data = self.k.get_tradable_asset_pairs(pair=pair)
                 self.pair_info[pair] = pair_data.iloc[0]
             
-            info = self.pair_info[pair]
-            
-            # Mínimo de orden
-            min_order = float(info.get('ordermin', 0.001))
-            
-            # Calcular tamaño basado en riesgo
-            risk_amount = balance * risk_percent
-            stop_loss_decimal = stop_loss_points * 0.0001  # Para forex
-            
-            # Tamaño sin apalancamiento
-            base_size = risk_amount / (stop_loss_decimal * current_price)
+            return self._position_size(self.pair_info[pair], balance, risk_percent,
+                                       stop_loss_points, current_price)
             
+        except Exception as e:
+            logger.error(f"Error calculando posición: {e}")
+            return None
+    
+    def _position_size(self, info, balance, risk_percent, stop_loss_points, current_price):
+        """Tamaño y apalancamiento a partir de la información del par (AssetPairs)"""
+        # Mínimo de orden
+        min_order = float(info.get('ordermin', 0.001))
+        
+        # Calcular tamaño basado en riesgo
+        risk_amount = balance * risk_percent
+        stop_loss_decimal = stop_loss_points * 0.0001  # Para forex
+        
+        # Tamaño sin apalancamiento
+        base_size = risk_amount / (stop_loss_decimal * current_price)
+        
+        # Calcular apalancamiento necesario
+        max_size_no_leverage = balance / current_price
+        
+        if base_size <= max_size_no_leverage:
+            # No necesitamos apalancamiento
+            leverage = 1
+            position_size = base_size
+        else:
             # Calcular apalancamiento necesario
-            max_size_no_leverage = balance / current_price
+            required_leverage = base_size / max_size_no_leverage
             
-            if base_size <= max_size_no_leverage:
-                # No necesitamos apalancamiento
-                leverage = 1
-                position_size = base_size
+            # Ajustar al rango permitido
+            if required_leverage < self.leverage_min:
+                leverage = self.leverage_min
             else:
-                # Calcular apalancamiento necesario
-                required_leverage = base_size / max_size_no_leverage
-                
-                # Ajustar al rango permitido
-                if required_leverage < self.leverage_min:
-                    leverage = self.leverage_min
-                else:
-                    leverage = min(int(required_leverage + 0.5), self.leverage_max)
-                
-                # Recalcular tamaño con apalancamiento
-                position_size = min(base_size, max_size_no_leverage * leverage)
-            
-            # Asegurar que cumple con el mínimo
-            position_size = max(position_size, min_order)
-            
-            # Redondear según decimales permitidos
-            decimals = int(info.get('lot_decimals', 8))
-            position_size = float(Decimal(str(position_size)).quantize(
-                Decimal(10) ** -decimals, rounding=ROUND_DOWN))
+                leverage = min(int(required_leverage + 0.5), self.leverage_max)
             
-            return {
-                'size': position_size,
-                'leverage': leverage,
-                'cost': position_size * current_price,
-                'margin_required': (position_size * current_price) / leverage
-            }
-            
-        except Exception as e:
-            logger.error(f"Error calculando posición: {e}")
-            return None
+            # Recalcular tamaño con apalancamiento
+            position_size = min(base_size, max_size_no_leverage * leverage)
+        
+        # Asegurar que cumple con el mínimo
+        position_size = max(position_size, min_order)
+        
+        # Redondear según decimales permitidos
+        decimals = int(info.get('lot_decimals', 8))
+        position_size = float(Decimal(str(position_size)).quantize(
+            Decimal(10) ** -decimals, rounding=ROUND_DOWN))
+        
+        return {
+            'size': position_size,
+            'leverage': leverage,
+            'cost': position_size * current_price,
+            'margin_required': (position_size * current_price) / leverage
+        }
     
     def place_margin_order(self, pair, side, size, leverage=2, 
                           stop_loss=None, take_profit=None):
@@ -198,47 +479,58 @@ class KrakenTrader:
             take_profit: Precio de take profit
         """
         try:
-            # Construir parámetros de orden
-            order_params = {
-                'pair': pair,
-                'type': side,
-                'ordertype': 'market',
-                'volume': str(size),
-                'leverage': str(leverage),
-                'validate': False  # Cambiar a True para testear sin ejecutar
-            }
-            
-            # Agregar stop loss si existe
-            if stop_loss:
-                order_params['close[ordertype]'] = 'stop-loss'
-                order_params['close[price]'] = str(stop_loss)
-            
-            # Agregar take profit si existe
-            if take_profit:
-                if stop_loss:
-                    # Si ya hay SL, usar otro campo
-                    order_params['close[ordertype2]'] = 'take-profit'
-                    order_params['close[price2]'] = str(take_profit)
-                else:
-                    order_params['close[ordertype]'] = 'take-profit'
-                    order_params['close[price]'] = str(take_profit)
+            order_params = self._margin_order_params(pair, side, size, leverage, stop_loss, take_profit)
             
             # Ejecutar orden
             response = self.api.query_private('AddOrder', order_params)
-            
-            if response.get('error'):
-                logger.error(f"Error en orden: {response['error']}")
-                return None
-            
-            return {
-                'txid': response['result']['txid'][0],
-                'description': response['result']['descr']
-            }
+            return self._order_result(response)
             
         except Exception as e:
             logger.error(f"Error colocando orden: {e}")
             return None
     
+    @staticmethod
+    def _margin_order_params(pair, side, size, leverage, stop_loss, take_profit):
+        """Parámetros de AddOrder para una orden a mercado con SL/TP"""
+        # Construir parámetros de orden
+        order_params = {
+            'pair': pair,
+            'type': side,
+            'ordertype': 'market',
+            'volume': str(size),
+            'leverage': str(leverage),
+            'validate': False  # Cambiar a True para testear sin ejecutar
+        }
+        
+        # Agregar stop loss si existe
+        if stop_loss:
+            order_params['close[ordertype]'] = 'stop-loss'
+            order_params['close[price]'] = str(stop_loss)
+        
+        # Agregar take profit si existe
+        if take_profit:
+            if stop_loss:
+                # Si ya hay SL, usar otro campo
+                order_params['close[ordertype2]'] = 'take-profit'
+                order_params['close[price2]'] = str(take_profit)
+            else:
+                order_params['close[ordertype]'] = 'take-profit'
+                order_params['close[price]'] = str(take_profit)
+        
+        return order_params
+    
+    @staticmethod
+    def _order_result(response):
+        """Respuesta de AddOrder → txid y descripción (None si hubo error)"""
+        if response.get('error'):
+            logger.error(f"Error en orden: {response['error']}")
+            return None
+        
+        return {
+            'txid': response['result']['txid'][0],
+            'description': response['result']['descr']
+        }
+    
     def get_open_positions(self):
         """Obtener posiciones abiertas"""
         try:
@@ -266,33 +558,22 @@ class KrakenTrader:
             logger.error(f"Error cancelando orden: {e}")
             return False
     
-    def close_position(self, pair, position_type='long'):
-        """Cerrar una posición"""
+    def close_position(self, pair, position_type='long', positions=None):
+        """
+        Cerrar una posición
+        
+        Args:
+            positions: Posiciones abiertas ya descargadas en este ciclo (None = pedirlas)
+        """
         try:
             # Obtener posición actual
-            positions = self.get_open_positions()
-            
-            if positions.empty:
-                return True
-            
-            # Filtrar por par
-            pos = positions[positions.index.str.contains(pair)]
+            if positions is None:
+                positions = self.get_open_positions()
+            order_params = self._close_order_params(positions, pair, position_type)
             
-            if pos.empty:
+            if order_params is None:
                 return True
             
-            # Cerrar posición
-            size = abs(float(pos['vol'].iloc[0]))
-            side = 'sell' if position_type == 'long' else 'buy'
-            
-            order_params = {
-                'pair': pair,
-                'type': side,
-                'ordertype': 'market',
-                'volume': str(size),
-                'leverage': 'none'  # Cerrar sin leverage
-            }
-            
             response = self.api.query_private('AddOrder', order_params)
             
             if response.get('error'):
@@ -305,6 +586,37 @@ class KrakenTrader:
             logger.error(f"Error cerrando posición: {e}")
             return False
     
+    @staticmethod
+    def _close_order_params(positions, pair, position_type):
+        """
+        Parámetros de AddOrder para cerrar la posición del par (None si no hay)
+        
+        Args:
+            positions: Resultado de OpenPositions (dict txid → posición)
+        """
+        if positions is None or len(positions) == 0:
+            return None
+        if isinstance(positions, pd.DataFrame):
+            positions = positions.T.to_dict()
+        
+        # Filtrar por par
+        pos = [p for p in positions.values() if pair in str(p.get('pair', ''))]
+        
+        if not pos:
+            return None
+        
+        # Cerrar posición
+        size = abs(float(pos[0]['vol']))
+        side = 'sell' if position_type == 'long' else 'buy'
+        
+        return {
+            'pair': pair,
+            'type': side,
+            'ordertype': 'market',
+            'volume': str(size),
+            'leverage': 'none'  # Cerrar sin leverage
+        }
+    
     def update_trailing_stop(self, txid, new_stop_price):
         """Actualizar trailing stop de una orden"""
         try:
@@ -5,6 +5,9 @@ Ejecuta la estrategia de volumen + OHLC en producción
 
 import os
 import sys
+import time
+import asyncio
+import inspect
 import logging
 from datetime import datetime
 import pandas as pd
@@ -12,7 +15,11 @@ import numpy as np
 import ta
 
 from kraken_trader import KrakenTrader
+from kraken_async import AsyncKrakenTrader
+from candle_feed import KrakenCandleFeed
+from data_quality import validate_ohlcv, format_quality_report
 from telegram_notifier import TelegramNotifier
+import http_session
 from state_manager import StateManager
 
 # Configurar logging
@@ -46,7 +53,26 @@ class ProductionConfig:
     SYMBOL = 'XRP-USD'
     KRAKEN_PAIR = 'XXRPZUSD'  # Formato Kraken
     INTERVAL = 60  # minutos
-    LOOKBACK_PERIODS = 200  # Cuántas velas históricas cargar
+    LOOKBACK_PERIODS = None  # Velas a calcular (None = mínimo según indicadores activos, ver required_lookback)
+    LOOKBACK_TOLERANCE = 1e-4  # Error relativo admitido en los indicadores de la última vela
+    CANDLE_STORE_DIR = 'candle_store'  # Velas y cursor OHLC entre ejecuciones (None = solo memoria)
+    KRAKEN_PUBLIC_RATE = 1.0           # Peticiones/s a endpoints públicos (OHLC)
+    KRAKEN_PUBLIC_BURST = 3            # Ráfaga permitida (descargas de varios pares)
+    # Cliente: 'async' (aiohttp, velas/balance/posiciones a la vez en cada ciclo) o 'sync' (krakenex)
+    KRAKEN_CLIENT = 'async'
+    KRAKEN_NONCE_WINDOW = False        # True si la API key tiene ventana de nonce (privadas en paralelo)
+    
+    # HTTP (pool keep-alive compartido por Kraken y Telegram, ver http_session)
+    HTTP_POOL_SIZE = 10                # Conexiones keep-alive por host
+    HTTP_CONNECT_TIMEOUT = 3.05        # Segundos para abrir conexión (TCP + TLS)
+    HTTP_READ_TIMEOUT = 15             # Segundos esperando respuesta
+    HTTP_RETRIES = 3                   # Reintentos solo en peticiones idempotentes (GET)
+    
+    # Modo de ejecución: 'cron' (un ciclo por ejecución, velas por REST) o
+    # 'stream' (proceso continuo, un ciclo al cerrar cada vela por WebSocket)
+    FEED_MODE = 'cron'
+    KRAKEN_WS_URL = 'wss://ws.kraken.com/v2'
+    KRAKEN_WS_SYMBOL = 'XRP/USD'       # Formato WebSocket v2
     
     # Estrategia (igual que backtest)
     VOLUME_SMOOTH_PERIODS = 4
@@ -102,23 +128,113 @@ class ProductionConfig:
 # FUNCIONES DE ANÁLISIS TÉCNICO
 # ============================================================================
 
-def calculate_volume_derivatives(df, config):
-    """Calcular derivadas de volumen"""
-    df = df.copy()
+def _wilder_bars(window, tolerance, chained=False):
+    """
+    Velas para que el valor inicial de un suavizado de Wilder (factor 1 - 1/window)
+    pese menos que tolerance; chained = dos suavizados encadenados (ADX sobre +DI/-DI)
+    """
+    decay = 1 - 1 / window
+    # El valor inicial (media de las primeras velas) puede alejarse varias veces
+    # del valor convergido: margen de un orden de magnitud
+    target = tolerance / 10
+    bars = int(np.ceil(np.log(target) / np.log(decay)))
+    if chained:
+        # El error de dos suavizados encadenados decae como (1 + k/window) * decay^k
+        while (1 + bars / window) * decay ** bars > target:
+            bars += 1
+    return bars
+
+
+def required_lookback(config, tolerance=None):
+    """
+    Velas mínimas para que los indicadores de la última vela coincidan con los
+    calculados sobre todo el histórico
+    
+    Las ventanas fijas (medias móviles, diferencias) son exactas con su
+    longitud; los suavizados recursivos de Wilder (ATR, ADX, RSI) necesitan
+    además las velas para que su valor inicial quede por debajo de la
+    tolerancia. Solo cuentan los indicadores que usa la configuración.
+    
+    Args:
+        config: ProductionConfig (o subclase)
+        tolerance: Error relativo admitido (None = config.LOOKBACK_TOLERANCE)
+    
+    Returns:
+        Número de velas
+    """
+    tolerance = tolerance or config.LOOKBACK_TOLERANCE
+    needs = {
+        # Media de VOLUME_SMOOTH_PERIODS + 2 diferencias + las velas de aceleración consecutiva
+        'volume': config.VOLUME_SMOOTH_PERIODS + 2 + config.ACCEL_BARS_REQUIRED,
+        # Siempre calculadas: SMA_50 y ATR (stop loss)
+        'SMA_50': 50,
+        'ATR': 14 + _wilder_bars(14, tolerance),
+    }
+    if config.USE_ADX:
+        needs['ADX'] = 2 * 14 + _wilder_bars(14, tolerance, chained=True)
+    if config.USE_RSI_FILTER:
+        needs['RSI'] = 1 + _wilder_bars(14, tolerance)
+    if config.USE_BB_FILTER:
+        needs['BB'] = 20
+    if config.USE_PRICE_MA:
+        needs['SMA_20'] = 20
+    if config.USE_OBV:
+        needs['OBV'] = 2
     
-    # Asegurar que 'volume' existe y es numérico
+    # +1: la última vela (en formación) no cuenta para el calentamiento
+    return max(needs.values()) + 1
+
+
+def _clean_volume(df):
+    """Volumen numérico (sintético a partir del rango si no hay volumen real)"""
     if 'volume' not in df.columns:
         logger.error(f"Columna 'volume' no encontrada. Columnas: {df.columns.tolist()}")
         raise ValueError("Columna 'volume' requerida")
     
-    df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
-    df['volume'] = df['volume'].ffill().fillna(0)
+    volume = pd.to_numeric(df['volume'], errors='coerce').ffill().fillna(0)
     
     # Si todo el volumen es 0, crear volumen sintético
-    if df['volume'].sum() == 0 or df['volume'].mean() < 1:
+    if volume.sum() == 0 or volume.mean() < 1:
         logger.warning("Volumen insuficiente, sintetizando...")
-        price_range = df['high'] - df['low']
-        df['volume'] = price_range * 100000  # Volumen sintético simple
+        volume = (df['high'] - df['low']) * 100000  # Volumen sintético simple
+    return volume
+
+
+def get_volume_norm_stats(df, config):
+    """
+    Media y desviación de las derivadas de volumen (normalización de
+    calculate_volume_derivatives)
+    
+    La normalización depende de la muestra, no es un calentamiento: se calcula
+    sobre todo el histórico disponible aunque los indicadores se calculen solo
+    sobre las últimas required_lookback velas.
+    """
+    smoothed = _clean_volume(df).rolling(window=config.VOLUME_SMOOTH_PERIODS, min_periods=1).mean()
+    return _derivative_stats(smoothed.diff(), smoothed.diff().diff())
+
+
+def _derivative_stats(first, second):
+    return {
+        'vol_1st_mean': first.mean(),
+        'vol_1st_std': first.std(),
+        'vol_2nd_mean': second.mean(),
+        'vol_2nd_std': second.std()
+    }
+
+
+def calculate_volume_derivatives(df, config, copy=True, norm_stats=None):
+    """
+    Calcular derivadas de volumen
+    
+    Args:
+        copy: False si df ya es una copia propia (p.ej. recién sacada del buffer de velas)
+        norm_stats: Normalización (get_volume_norm_stats) calculada sobre un
+            histórico más largo que df; None = sobre df
+    """
+    if copy:
+        df = df.copy()
+    
+    df['volume'] = _clean_volume(df)
     
     df['Volume_Smoothed'] = df['volume'].rolling(
         window=config.VOLUME_SMOOTH_PERIODS, 
@@ -128,8 +244,9 @@ def calculate_volume_derivatives(df, config):
     df['Vol_1st_Der'] = df['Volume_Smoothed'].diff()
     df['Vol_2nd_Der'] = df['Vol_1st_Der'].diff()
     
-    df['Vol_1st_Der_Norm'] = (df['Vol_1st_Der'] - df['Vol_1st_Der'].mean()) / (df['Vol_1st_Der'].std() + 1e-10)
-    df['Vol_2nd_Der_Norm'] = (df['Vol_2nd_Der'] - df['Vol_2nd_Der'].mean()) / (df['Vol_2nd_Der'].std() + 1e-10)
+    stats = norm_stats or _derivative_stats(df['Vol_1st_Der'], df['Vol_2nd_Der'])
+    df['Vol_1st_Der_Norm'] = (df['Vol_1st_Der'] - stats['vol_1st_mean']) / (stats['vol_1st_std'] + 1e-10)
+    df['Vol_2nd_Der_Norm'] = (df['Vol_2nd_Der'] - stats['vol_2nd_mean']) / (stats['vol_2nd_std'] + 1e-10)
     
     df['Accel_Positive'] = (
         (df['Vol_1st_Der_Norm'] > 0.1) & 
@@ -156,9 +273,10 @@ def calculate_volume_derivatives(df, config):
     return df
 
 
-def add_technical_indicators(df):
+def add_technical_indicators(df, copy=True):
     """Agregar indicadores técnicos"""
-    df = df.copy()
+    if copy:
+        df = df.copy()
     
     # Asegurar nombres de columnas correctos (pykrakenapi usa minúsculas)
     # Renombrar si es necesario
@@ -330,13 +448,23 @@ class LiveTrader:
     def __init__(self, config):
         self.config = config
         
+        # Pool HTTP compartido: antes de crear los clientes
+        http_session.configure(config)
+        
         # Inicializar módulos
-        self.kraken = KrakenTrader(
-            config.KRAKEN_API_KEY,
-            config.KRAKEN_API_SECRET,
+        kraken_args = dict(
             leverage_min=config.LEVERAGE_MIN,
-            leverage_max=config.LEVERAGE_MAX
+            leverage_max=config.LEVERAGE_MAX,
+            candle_store_dir=config.CANDLE_STORE_DIR,
+            public_rate=config.KRAKEN_PUBLIC_RATE,
+            public_burst=config.KRAKEN_PUBLIC_BURST
         )
+        self.async_client = config.KRAKEN_CLIENT == 'async'
+        if self.async_client:
+            self.kraken = AsyncKrakenTrader(config.KRAKEN_API_KEY, config.KRAKEN_API_SECRET,
+                                            nonce_window=config.KRAKEN_NONCE_WINDOW, **kraken_args)
+        else:
+            self.kraken = KrakenTrader(config.KRAKEN_API_KEY, config.KRAKEN_API_SECRET, **kraken_args)
         
         self.telegram = TelegramNotifier(
             config.TELEGRAM_BOT_TOKEN,
@@ -345,10 +473,80 @@ class LiveTrader:
         
         self.state = StateManager()
         
-        logger.info("LiveTrader inicializado")
+        # Velas sobre las que se calculan los indicadores en cada ciclo
+        self.lookback = config.LOOKBACK_PERIODS or required_lookback(config)
+        
+        # Datos de cuenta descargados al empezar el ciclo (balance, posiciones)
+        self.cycle = {}
+        
+        logger.info(f"LiveTrader inicializado (lookback {self.lookback} velas)")
+    
+    def run(self, df=None, norm_stats=None):
+        """
+        Ejecutar ciclo de trading
+        
+        Args:
+            df: Últimas self.lookback velas ya disponibles (modo stream); None = descargarlas por REST
+            norm_stats: Normalización del volumen sobre el histórico completo (get_volume_norm_stats)
+        """
+        async def cycle():
+            try:
+                await self.run_async(df, norm_stats)
+            finally:
+                if self.async_client:
+                    # Cada run() tiene su bucle de eventos: el pool dura lo que el ciclo
+                    await self.kraken.close()
+        
+        asyncio.run(cycle())
+    
+    def _run_kraken(self, method, *args, **kwargs):
+        """Llamada suelta a Kraken fuera de un ciclo (con el cliente async, en su propio bucle)"""
+        if not self.async_client:
+            return getattr(self.kraken, method)(*args, **kwargs)
+        
+        async def call():
+            try:
+                return await self._kraken(method, *args, **kwargs)
+            finally:
+                await self.kraken.close()
+        
+        return asyncio.run(call())
+    
+    async def _kraken(self, method, *args, **kwargs):
+        """Llamada a Kraken con el cliente configurado (corrutina si es el async)"""
+        result = getattr(self.kraken, method)(*args, **kwargs)
+        return await result if inspect.isawaitable(result) else result
     
-    def run(self):
-        """Ejecutar ciclo de trading"""
+    async def _prefetch(self, df):
+        """
+        Descargas independientes del inicio del ciclo
+        
+        Con el cliente async, velas, balance, posiciones e información del par
+        se piden a la vez (una latencia en lugar de cuatro); con el síncrono
+        solo se descargan las velas y el resto se pide cuando hace falta.
+        """
+        fetch_ohlc = df is None
+        if fetch_ohlc:
+            logger.info("Descargando datos de mercado...")
+        ohlc = self._kraken('get_ohlc_data', pair=self.config.KRAKEN_PAIR,
+                            interval=self.config.INTERVAL, window=self.lookback) if fetch_ohlc else None
+        
+        if not self.async_client:
+            return await ohlc if fetch_ohlc else df
+        
+        start = time.perf_counter()
+        calls = [self.kraken.get_tradable_balance(), self.kraken.get_open_positions(),
+                 self.kraken.get_pair_info(self.config.KRAKEN_PAIR)]
+        results = await asyncio.gather(*([ohlc] if fetch_ohlc else []), *calls)
+        if fetch_ohlc:
+            df, results = results[0], results[1:]
+        self.cycle['balance'], self.cycle['positions'], _ = results
+        logger.info(f"Datos de mercado y cuenta en {(time.perf_counter() - start) * 1000:.0f} ms")
+        return df
+    
+    async def run_async(self, df=None, norm_stats=None):
+        """Ciclo de trading (ver run)"""
+        self.cycle = {}
         try:
             logger.info("="*80)
             logger.info(f"Iniciando ciclo de trading: {datetime.now()}")
@@ -365,13 +563,14 @@ class LiveTrader:
                 return
             
             # Obtener datos
-            logger.info("Descargando datos de mercado...")
-            df = self.kraken.get_ohlc_data(
-                pair=self.config.KRAKEN_PAIR,
-                interval=self.config.INTERVAL
-            )
-            
-            if df is None or len(df) < 100:
+            fetched = df is None
+            df = await self._prefetch(df)
+            if fetched:
+                history = self.kraken.ohlc_buffer(self.config.KRAKEN_PAIR, self.config.INTERVAL)
+                if df is not None and history is not None:
+                    norm_stats = get_volume_norm_stats(history.to_dataframe(), self.config)
+            
+            if df is None or len(df) < self.lookback:
                 logger.error("No se pudieron obtener datos suficientes")
                 self.telegram.notify_error("Error obteniendo datos de mercado")
                 return
@@ -380,19 +579,18 @@ class LiveTrader:
             logger.info(f"Columnas: {df.columns.tolist()}")
             logger.info(f"Últimas 3 velas:\n{df.tail(3)}")
             
-            # Verificar que hay datos válidos
-            if df['close'].isnull().any():
-                logger.warning("Hay valores nulos en close, limpiando...")
-                df = df.dropna(subset=['close', 'high', 'low', 'open', 'volume'])
-                logger.info(f"Después de limpieza: {len(df)} velas")
+            # Las velas ya vienen validadas y reparadas (data_quality)
+            if self.kraken.last_quality_report:
+                logger.info(f"Calidad de datos: {format_quality_report(self.kraken.last_quality_report)}")
             
             # Calcular indicadores
             logger.info("Calculando indicadores...")
-            df = calculate_volume_derivatives(df, self.config)
-            df = add_technical_indicators(df)
+            # df es propio (construido desde el buffer de velas): sin copias intermedias
+            df = calculate_volume_derivatives(df, self.config, copy=False, norm_stats=norm_stats)
+            df = add_technical_indicators(df, copy=False)
             
             # Actualizar posiciones existentes
-            self.update_open_positions(df)
+            await self.update_open_positions(df)
             
             # Generar señal
             signal, indicators = generate_signal(df, self.config)
@@ -409,7 +607,7 @@ class LiveTrader:
                 
                 # Verificar si podemos abrir posición
                 if self.can_open_position(signal):
-                    self.open_position(signal, current_price, atr)
+                    await self.open_position(signal, current_price, atr)
             
             # Incrementar contador de barras
             self.state.increment_bars_open()
@@ -419,6 +617,67 @@ class LiveTrader:
         except Exception as e:
             logger.error(f"Error en ciclo de trading: {e}", exc_info=True)
             self.telegram.notify_error(f"Error en ciclo: {str(e)}")
+        
+        finally:
+            logger.info(f"HTTP del ciclo: {http_session.format_http_stats()}")
+            http_session.stats.reset()
+    
+    def run_streaming(self):
+        """
+        Proceso continuo: un ciclo de trading en cuanto cierra cada vela
+        
+        El histórico inicial sale de REST; después las velas llegan por el
+        WebSocket (KrakenCandleFeed), que reconecta y rellena huecos solo.
+        """
+        history = self._run_kraken(
+            'get_ohlc_data',
+            pair=self.config.KRAKEN_PAIR,
+            interval=self.config.INTERVAL
+        )
+        
+        # El feed rellena huecos desde su propio bucle de eventos: con el
+        # cliente async, un cliente síncrono aparte para esas descargas
+        rest_trader = self.kraken
+        if self.async_client:
+            rest_trader = KrakenTrader(None, None, public_rate=self.config.KRAKEN_PUBLIC_RATE,
+                                       public_burst=self.config.KRAKEN_PUBLIC_BURST)
+            rest_trader.api.uri = self.kraken.uri
+        
+        self.feed = KrakenCandleFeed(
+            self.config.KRAKEN_WS_SYMBOL,
+            self.config.INTERVAL,
+            on_bar_close=self.on_bar_close,
+            url=self.config.KRAKEN_WS_URL,
+            rest_trader=rest_trader,
+            rest_pair=self.config.KRAKEN_PAIR
+        )
+        if history is not None:
+            self.feed.seed(history)
+        
+        logger.info(f"Modo stream: {self.config.KRAKEN_WS_SYMBOL} {self.config.INTERVAL}m "
+                    f"({len(self.feed.closed)} velas de histórico)")
+        self.feed.run()
+    
+    def on_bar_close(self, bar, backfilled=False):
+        """
+        Callback del feed: ciclo de trading con las velas cerradas
+        
+        Las velas recuperadas por REST tras un corte (backfilled) solo cuentan
+        para las posiciones abiertas: operar con ellas sería hacerlo con
+        precios atrasados, así que el ciclo se ejecuta solo con la más reciente.
+        """
+        if backfilled:
+            logger.info(f"Vela recuperada {pd.Timestamp(bar['time'], unit='s')}: close {bar['close']} (sin ciclo)")
+            self.state.increment_bars_open()
+            return
+        
+        logger.info(f"Vela cerrada {pd.Timestamp(bar['time'], unit='s')}: close {bar['close']}")
+        
+        history = self.feed.to_dataframe()
+        df, report = validate_ohlcv(history.iloc[-self.lookback:], self.config.INTERVAL,
+                                    self.kraken.quality_policy)
+        self.kraken.last_quality_report = report
+        self.run(df, get_volume_norm_stats(history, self.config))
     
     def can_open_position(self, signal):
         """Verificar si podemos abrir una nueva posición"""
@@ -440,13 +699,15 @@ class LiveTrader:
         
         return True
     
-    def open_position(self, signal, current_price, atr):
+    async def open_position(self, signal, current_price, atr):
         """Abrir nueva posición"""
         try:
             logger.info("Abriendo posición...")
             
-            # Obtener balance
-            balance = self.kraken.get_tradable_balance()
+            # Obtener balance (ya descargado al empezar el ciclo con el cliente async)
+            balance = self.cycle.get('balance')
+            if balance is None:
+                balance = await self._kraken('get_tradable_balance')
             logger.info(f"Balance disponible: ${balance:.2f}")
             
             if balance < 10:
@@ -457,7 +718,8 @@ class LiveTrader:
             # Calcular tamaño de posición
             stop_loss_points = self.config.ATR_STOP_MULTIPLIER * atr / 0.0001
             
-            position_calc = self.kraken.calculate_position_size(
+            position_calc = await self._kraken(
+                'calculate_position_size',
                 balance=balance,
                 risk_percent=self.config.RISK_PER_TRADE,
                 stop_loss_points=stop_loss_points,
@@ -486,7 +748,8 @@ class LiveTrader:
             # Colocar orden en Kraken
             side = 'buy' if signal > 0 else 'sell'
             
-            order_result = self.kraken.place_margin_order(
+            order_result = await self._kraken(
+                'place_margin_order',
                 pair=self.config.KRAKEN_PAIR,
                 side=side,
                 size=position_calc['size'],
@@ -533,7 +796,7 @@ class LiveTrader:
             logger.error(f"Error abriendo posición: {e}", exc_info=True)
             self.telegram.notify_error(f"Error abriendo posición: {str(e)}")
     
-    def update_open_positions(self, df):
+    async def update_open_positions(self, df):
         """Actualizar posiciones abiertas"""
         positions = self.state.get_all_positions()
         
@@ -547,11 +810,11 @@ class LiveTrader:
         
         for position_id, position in list(positions.items()):
             try:
-                self.update_single_position(position_id, position, current_price, high, low, atr)
+                await self.update_single_position(position_id, position, current_price, high, low, atr)
             except Exception as e:
                 logger.error(f"Error actualizando posición {position_id}: {e}")
     
-    def update_single_position(self, position_id, position, current_price, high, low, atr):
+    async def update_single_position(self, position_id, position, current_price, high, low, atr):
         """Actualizar una posición individual"""
         
         # Calcular P&L actual
@@ -568,7 +831,7 @@ class LiveTrader:
         # Verificar profit close
         if profit_points >= self.config.PROFIT_CLOSE:
             logger.info(f"Profit target alcanzado para {position_id}")
-            self.close_position(position_id, current_price, 'profit_target')
+            await self.close_position(position_id, current_price, 'profit_target')
             return
         
         # Trailing stop
@@ -578,23 +841,23 @@ class LiveTrader:
         # Verificar SL/TP con high/low
         if position['direction'] == 'long':
             if low <= position['stop_loss']:
-                self.close_position(position_id, position['stop_loss'], 'stop_loss')
+                await self.close_position(position_id, position['stop_loss'], 'stop_loss')
                 return
             elif high >= position['take_profit']:
-                self.close_position(position_id, position['take_profit'], 'take_profit')
+                await self.close_position(position_id, position['take_profit'], 'take_profit')
                 return
         else:
             if high >= position['stop_loss']:
-                self.close_position(position_id, position['stop_loss'], 'stop_loss')
+                await self.close_position(position_id, position['stop_loss'], 'stop_loss')
                 return
             elif low <= position['take_profit']:
-                self.close_position(position_id, position['take_profit'], 'take_profit')
+                await self.close_position(position_id, position['take_profit'], 'take_profit')
                 return
         
         # Time limit
         if position['bars_open'] >= self.config.MAX_BARS_IN_TRADE:
             logger.info(f"Time limit alcanzado para {position_id}")
-            self.close_position(position_id, current_price, 'time_limit')
+            await self.close_position(position_id, current_price, 'time_limit')
             return
     
     def handle_trailing_stop(self, position_id, position, profit_points, current_price):
@@ -631,7 +894,7 @@ class LiveTrader:
                         self.telegram.notify_trailing_stop_update(position_id, new_sl, pnl)
                         logger.info(f"Trailing stop actualizado: ${new_sl:.2f}")
     
-    def close_position(self, position_id, exit_price, reason):
+    async def close_position(self, position_id, exit_price, reason):
         """Cerrar posición"""
         try:
             position = self.state.get_position(position_id)
@@ -648,11 +911,15 @@ class LiveTrader:
             
             return_pct = (pnl / (position['entry_price'] * position['size'])) * 100
             
-            # Cerrar en Kraken
-            success = self.kraken.close_position(
+            # Cerrar en Kraken (con las posiciones descargadas al empezar el ciclo, si las hay)
+            success = await self._kraken(
+                'close_position',
                 pair=self.config.KRAKEN_PAIR,
-                position_type=position['direction']
+                position_type=position['direction'],
+                positions=self.cycle.pop('positions', None)
             )
+            # El balance del inicio del ciclo ya no vale
+            self.cycle.pop('balance', None)
             
             if not success:
                 logger.error(f"Error cerrando posición en Kraken: {position_id}")
@@ -681,7 +948,7 @@ class LiveTrader:
                 'return_pct': return_pct,
                 'reason': reason,
                 'duration': duration,
-                'balance': self.kraken.get_tradable_balance()
+                'balance': await self._kraken('get_tradable_balance')
             }
             
             self.telegram.notify_order_closed(close_details)
@@ -718,7 +985,10 @@ def main():
     trader = LiveTrader(config)
     
     # Ejecutar
-    trader.run()
+    if config.FEED_MODE == 'stream':
+        trader.run_streaming()
+    else:
+        trader.run()
 
 
 if __name__ == "__main__":
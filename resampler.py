@@ -0,0 +1,174 @@
+"""
+Resampler Module
+Velas de timeframes superiores derivadas de las velas más finas guardadas
+"""
+
+import os
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+
+from data_sources import INTERVAL_MINUTES
+
+logger = logging.getLogger(__name__)
+
+NS_PER_MINUTE = 60 * 10**9
+# El epoch (1970-01-01) es jueves: las velas semanales empiezan el lunes siguiente
+WEEK_ORIGIN_NS = 4 * 1440 * NS_PER_MINUTE
+
+
+def rule_to_ns(rule):
+    """Duración de un intervalo ('15m', '4h', '1d', '1wk', 60) en nanosegundos"""
+    if isinstance(rule, (int, np.integer)) or str(rule).isdigit():
+        return int(rule) * NS_PER_MINUTE
+    if rule in INTERVAL_MINUTES:
+        return INTERVAL_MINUTES[rule] * NS_PER_MINUTE
+    return pd.Timedelta(rule).value
+
+
+def _find_column(df, name):
+    """Columna por nombre sin distinguir mayúsculas (None si no existe)"""
+    for col in df.columns:
+        if str(col).lower() == name:
+            return col
+    return None
+
+
+def resample_ohlcv(df, rule, align='utc', session_tz='America/New_York', session_start='17:00',
+                   drop_partial=False):
+    """
+    Agregar velas a un timeframe superior
+
+    OHLC = primera/máximo/mínimo/última, volumen y count sumados, vwap
+    ponderado por volumen. Los límites de cada vela se calculan de forma
+    vectorizada (división entera de los timestamps) y se agregan con reduceat.
+
+    Args:
+        df: Velas ordenadas con índice temporal (Open/open, ...; vwap y count opcionales)
+        rule: Timeframe destino ('15m', '4h', '1d', '1wk', minutos)
+        align: 'utc' (velas alineadas a medianoche UTC) o 'session' (al inicio
+            de sesión session_start en session_tz, p.ej. 17:00 Nueva York para forex)
+        drop_partial: Descartar la última vela si aún no está completa
+
+    Returns:
+        DataFrame con las mismas columnas OHLCV (y vwap/count), etiquetado por
+        el inicio de cada vela, en la zona horaria original
+    """
+    rule_ns = rule_to_ns(rule)
+    columns = {name: _find_column(df, name) for name in ('open', 'high', 'low', 'close', 'volume', 'vwap', 'count')}
+    if any(columns[name] is None for name in ('open', 'high', 'low', 'close')):
+        raise ValueError("Faltan columnas OHLC para el resampleo")
+
+    if df.empty:
+        return df[[col for col in columns.values() if col is not None]].copy()
+
+    index = df.index if df.index.tz is not None else df.index.tz_localize('UTC')
+
+    if align == 'utc':
+        wall_ns = index.tz_convert('UTC').tz_localize(None).as_unit('ns').asi8
+        offset_ns = 0
+    elif align == 'session':
+        wall_ns = index.tz_convert(session_tz).tz_localize(None).as_unit('ns').asi8
+        offset_ns = pd.Timedelta(f"{session_start}:00").value
+    else:
+        raise ValueError(f"Alineación no soportada: {align}")
+
+    if rule_ns % (7 * 1440 * NS_PER_MINUTE) == 0:
+        offset_ns += WEEK_ORIGIN_NS
+
+    codes = np.floor_divide(wall_ns - offset_ns, rule_ns)
+    n = len(codes)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], n]
+
+    values = lambda name: df[columns[name]].to_numpy(dtype=float)
+    out = {
+        columns['open']: values('open')[starts],
+        columns['high']: np.fmax.reduceat(values('high'), starts),
+        columns['low']: np.fmin.reduceat(values('low'), starts),
+        columns['close']: values('close')[ends - 1],
+    }
+
+    if columns['volume'] is not None:
+        volume = np.nan_to_num(values('volume'))
+        out[columns['volume']] = np.add.reduceat(volume, starts)
+
+        if columns['vwap'] is not None:
+            # vwap ponderado por volumen; sin volumen, el cierre de la vela agregada
+            notional = np.add.reduceat(np.nan_to_num(values('vwap')) * volume, starts)
+            total = out[columns['volume']]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[columns['vwap']] = np.where(total > 0, notional / total, out[columns['close']])
+
+    if columns['count'] is not None:
+        out[columns['count']] = np.add.reduceat(np.nan_to_num(values('count')), starts).astype(np.int64)
+
+    # Etiqueta = inicio de la vela en hora de pared, devuelto a la zona original
+    labels = pd.DatetimeIndex(pd.to_datetime(codes[starts] * rule_ns + offset_ns, unit='ns'))
+    if align == 'session':
+        labels = labels.tz_localize(session_tz, ambiguous=True, nonexistent='shift_forward')
+    else:
+        labels = labels.tz_localize('UTC')
+    labels = labels.tz_convert(index.tz)
+    if df.index.tz is None:
+        labels = labels.tz_localize(None)
+    labels.name = df.index.name
+
+    result = pd.DataFrame(out, index=labels)[[col for col in df.columns if col in out]]
+
+    if drop_partial:
+        # Completa si ya terminó el tiempo de la vela tras la última vela base
+        base_ns = np.median(np.diff(wall_ns)) if n > 1 else rule_ns
+        bin_end = (codes[-1] + 1) * rule_ns + offset_ns
+        if wall_ns[-1] + base_ns < bin_end:
+            result = result.iloc[:-1]
+
+    return result
+
+
+class Resampler:
+    """
+    Resampleo con caché en memoria y, opcionalmente, en disco (Parquet)
+
+    La clave combina la huella de las velas base con el timeframe y la
+    alineación, así que un dataset nuevo nunca reutiliza resultados viejos.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir: Directorio de caché en disco (None = solo memoria)
+        """
+        self.cache_dir = cache_dir
+        self._memory = {}
+
+    @staticmethod
+    def _base_fingerprint(df):
+        base_columns = [col for col in df.columns
+                        if str(col).lower() in ('open', 'high', 'low', 'close', 'volume', 'vwap', 'count')]
+        hashed = pd.util.hash_pandas_object(df[base_columns], index=True).values
+        return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+    def resample(self, df, rule, align='utc', session_tz='America/New_York', session_start='17:00',
+                 drop_partial=False):
+        """Igual que resample_ohlcv, reutilizando resultados ya calculados"""
+        params = f"{rule}|{align}|{session_tz if align == 'session' else ''}|" \
+                 f"{session_start if align == 'session' else ''}|{drop_partial}"
+        key = hashlib.sha256(f"{self._base_fingerprint(df)}|{params}".encode()).hexdigest()[:16]
+
+        if key in self._memory:
+            return self._memory[key].copy()
+
+        path = os.path.join(self.cache_dir, f"{key}.parquet") if self.cache_dir else None
+        if path and os.path.exists(path):
+            result = pd.read_parquet(path)
+        else:
+            result = resample_ohlcv(df, rule, align, session_tz, session_start, drop_partial)
+            if path:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                result.to_parquet(path)
+            logger.info(f"Resampleo a {rule} ({align}): {len(df)} → {len(result)} velas")
+
+        self._memory[key] = result
+        return result.copy()
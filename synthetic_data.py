@@ -0,0 +1,190 @@
+"""
+Synthetic Data Module
+Generador de mercados OHLCV sintéticos y reproducibles (semilla) para
+benchmarks de escala y pruebas de estrés
+"""
+
+import logging
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class SyntheticConfig:
+    """Parámetros del generador"""
+
+    # Regímenes: (deriva anual, multiplicador de volatilidad, multiplicador de volumen)
+    REGIMES = {
+        'calm': (0.00, 0.6, 0.8),
+        'bull': (0.80, 1.0, 1.1),
+        'bear': (-0.80, 1.3, 1.3),
+        'volatile': (0.00, 2.5, 1.8),
+    }
+    REGIME_MEAN_DAYS = 20              # Duración media de un régimen (geométrica)
+
+    ANNUAL_VOLATILITY = 0.60           # Volatilidad base anualizada
+    VOL_PERSISTENCE = 0.98             # AR(1) del log de la volatilidad (clustering)
+    VOL_OF_VOL = 0.15                  # Ruido del log de la volatilidad
+    TAIL_DF = 4                        # Grados de libertad t-Student (colas gruesas)
+    MEAN_REVERSION_YEARS = 2.0         # Reversión lenta del log-precio (None = paseo puro)
+
+    # Flash crashes: caída instantánea y recuperación parcial exponencial
+    CRASH_RATE = 0.5                   # Crashes por año
+    CRASH_SIZE = (0.05, 0.20)          # Caída (fracción del precio)
+    CRASH_RECOVERY = 0.7               # Fracción que se recupera
+    CRASH_RECOVERY_BARS = 20           # Constante de tiempo de la recuperación
+
+    # Volumen (estacionalidad horaria como time_factor de download_forex_data)
+    BASE_VOLUME = 100000
+    HOUR_FACTORS = {(8, 12): 1.5, (13, 17): 2.0, (17, 22): 1.3}
+    WEEKEND_FACTOR = 0.6
+    VOLUME_VOL_CORRELATION = 0.5       # Peso de |retorno|/sigma en el volumen
+    ZERO_VOLUME_PROBABILITY = 0.0      # Inicio de tramo sin volumen, por vela
+    ZERO_VOLUME_BARS = (24, 240)       # Longitud de los tramos sin volumen
+
+    START_PRICE = 0.5
+    START = '2020-01-01'
+
+
+def ar1(noise, phi, x0=0.0, block=256):
+    """
+    Proceso AR(1) x_t = phi * x_{t-1} + noise_t, vectorizado por bloques
+
+    Dentro de cada bloque la solución es una suma acumulada escalada por
+    potencias de phi; solo el arrastre entre bloques es secuencial. Con |phi|
+    pequeño el bloque se acorta para que phi ** block no se vaya a 0 (y
+    noise / phi ** k a infinito).
+    """
+    n = len(noise)
+    if n == 0:
+        return np.empty(0)
+    if phi == 0:
+        return np.array(noise, dtype=float)
+
+    # |phi| ** (block - 1) >= 1e-250: las divisiones no desbordan
+    log_phi = np.log10(abs(phi))
+    if log_phi < 0:
+        block = max(1, min(block, 1 + int(250 / -log_phi)))
+
+    pad = (-n) % block
+    e = np.concatenate([noise, np.zeros(pad)]).reshape(-1, block)
+    steps = np.arange(block)
+    powers = phi ** steps
+
+    # Solución de cada bloque con estado inicial 0
+    local = np.cumsum(e / powers, axis=1) * powers
+
+    carry = np.empty(len(e))
+    state = x0
+    decay = phi ** block
+    for b, end in enumerate(local[:, -1]):
+        carry[b] = state
+        state = end + decay * state
+
+    return (local + carry[:, None] * (powers * phi)).ravel()[:n]
+
+
+def _regime_path(n_bars, regimes, mean_bars, rng):
+    """Índice de régimen por vela (cadena de Markov con duraciones geométricas)"""
+    n_regimes = len(regimes)
+    n_segments = max(1, int(n_bars / mean_bars * 1.5) + 10)
+
+    lengths = rng.geometric(1.0 / mean_bars, size=n_segments)
+    while lengths.sum() < n_bars:
+        lengths = np.concatenate([lengths, rng.geometric(1.0 / mean_bars, size=n_segments)])
+
+    # Cada cambio salta a un régimen distinto del actual
+    jumps = rng.integers(1, n_regimes, size=len(lengths)) if n_regimes > 1 else np.zeros(len(lengths), int)
+    states = (rng.integers(n_regimes) + np.cumsum(jumps)) % n_regimes
+
+    return np.repeat(states, lengths)[:n_bars]
+
+
+def generate_ohlcv(n_bars, interval='1h', seed=42, start=None, config=None, return_regimes=False):
+    """
+    Generar velas OHLCV sintéticas
+
+    Paseo log-normal con regímenes (deriva/volatilidad/volumen), volatilidad con clustering
+    (log-volatilidad AR(1)), innovaciones t-Student, flash crashes y volumen
+    con estacionalidad horaria/semanal correlacionado con |retorno|.
+
+    Args:
+        n_bars: Número de velas
+        interval: Intervalo ('1m', '15m', '1h', ... o minutos)
+        seed: Semilla (misma semilla y parámetros = mismas velas)
+        start: Primera vela (por defecto SyntheticConfig.START)
+        config: SyntheticConfig (o subclase con otros parámetros)
+        return_regimes: Devolver también el régimen de cada vela
+
+    Returns:
+        DataFrame Open/High/Low/Close/Volume con índice UTC
+        (o tupla (DataFrame, Series de régimen) si return_regimes)
+    """
+    from data_sources import interval_to_minutes
+
+    cfg = config or SyntheticConfig
+    rng = np.random.default_rng(seed)
+    minutes = interval_to_minutes(interval)
+    dt = minutes / (365 * 1440)
+
+    index = pd.date_range(start or cfg.START, periods=n_bars, freq=f"{minutes}min", tz='UTC')
+
+    names = list(cfg.REGIMES)
+    drift, vol_mult, volume_mult = (np.array(values) for values in zip(*cfg.REGIMES.values()))
+    regimes = _regime_path(n_bars, names, max(1.0, cfg.REGIME_MEAN_DAYS * 1440 / minutes), rng)
+
+    # Volatilidad con clustering y dependiente del régimen
+    log_vol = ar1(rng.normal(0, cfg.VOL_OF_VOL, n_bars), cfg.VOL_PERSISTENCE)
+    log_vol -= cfg.VOL_OF_VOL**2 / (2 * (1 - cfg.VOL_PERSISTENCE**2))
+    sigma = cfg.ANNUAL_VOLATILITY * np.sqrt(dt) * np.exp(log_vol) * vol_mult[regimes]
+
+    # Innovaciones t-Student con varianza unitaria; la deriva se aplica al log del
+    # precio (sin el término -sigma²/2) para que la mediana no decaiga en series largas
+    shocks = rng.standard_t(cfg.TAIL_DF, n_bars) * np.sqrt((cfg.TAIL_DF - 2) / cfg.TAIL_DF)
+    returns = drift[regimes] * dt + sigma * shocks
+
+    # Flash crashes: salto negativo que se recupera parcialmente
+    crashes = np.zeros(n_bars)
+    crash_bars = np.flatnonzero(rng.random(n_bars) < cfg.CRASH_RATE * dt)
+    crashes[crash_bars] = np.log1p(-rng.uniform(*cfg.CRASH_SIZE, len(crash_bars)))
+    recovering = ar1(crashes, np.exp(-1.0 / cfg.CRASH_RECOVERY_BARS))
+    if cfg.MEAN_REVERSION_YEARS:
+        # Mantiene el nivel de precios acotado en series de muchos años
+        walk = ar1(returns + crashes * (1 - cfg.CRASH_RECOVERY), np.exp(-dt / cfg.MEAN_REVERSION_YEARS))
+    else:
+        walk = np.cumsum(returns + crashes * (1 - cfg.CRASH_RECOVERY))
+    log_close = np.log(cfg.START_PRICE) + walk + recovering * cfg.CRASH_RECOVERY
+
+    close = np.exp(log_close)
+    open_ = np.r_[cfg.START_PRICE, close[:-1]] * np.exp(rng.normal(0, 0.1, n_bars) * sigma)
+    wick = np.abs(rng.normal(0, 1, (2, n_bars))) * sigma * 0.5
+    high = np.maximum(open_, close) * np.exp(wick[0])
+    low = np.minimum(open_, close) * np.exp(-wick[1])
+
+    # Volumen: estacionalidad + régimen + correlación con el tamaño del movimiento
+    hour = index.hour.values
+    time_factor = np.ones(n_bars)
+    for (first, last), factor in cfg.HOUR_FACTORS.items():
+        time_factor[(hour >= first) & (hour < last)] = factor
+    time_factor[index.dayofweek.values >= 5] *= cfg.WEEKEND_FACTOR
+
+    surprise = np.abs(np.diff(log_close, prepend=np.log(cfg.START_PRICE))) / sigma
+    volume = (cfg.BASE_VOLUME * time_factor * volume_mult[regimes]
+              * (1 + cfg.VOLUME_VOL_CORRELATION * surprise)
+              * rng.lognormal(0, 0.3, n_bars))
+
+    if cfg.ZERO_VOLUME_PROBABILITY > 0:
+        starts = np.flatnonzero(rng.random(n_bars) < cfg.ZERO_VOLUME_PROBABILITY)
+        lengths = rng.integers(*cfg.ZERO_VOLUME_BARS, len(starts))
+        mark = np.zeros(n_bars + 1)
+        np.add.at(mark, starts, 1)
+        np.add.at(mark, np.minimum(starts + lengths, n_bars), -1)
+        volume[np.cumsum(mark[:-1]) > 0] = 0.0
+
+    df = pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+    df.index.name = 'timestamp'
+
+    if return_regimes:
+        return df, pd.Series(pd.Categorical.from_codes(regimes, names), index=index, name='regime')
+    return df
@@ -3,27 +3,31 @@ Telegram Notification Module
 Envío de notificaciones de trading a Telegram
 """
 
-import requests
 import logging
 from datetime import datetime
 
+from http_session import create_session, redact_path
+
 logger = logging.getLogger(__name__)
 
 
 class TelegramNotifier:
     """Gestor de notificaciones a Telegram"""
     
-    def __init__(self, bot_token, chat_id):
+    def __init__(self, bot_token, chat_id, api_url='https://api.telegram.org'):
         """
         Inicializar notificador
         
         Args:
             bot_token: Token del bot de Telegram
             chat_id: ID del chat donde enviar mensajes
+            api_url: URL base de la API de bots
         """
         self.bot_token = bot_token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self.base_url = f"{api_url.rstrip('/')}/bot{bot_token}"
+        # Sesión sobre el pool compartido: los mensajes reutilizan la conexión TLS
+        self.session = create_session()
         
     def send_message(self, text, parse_mode='HTML'):
         """
@@ -41,7 +45,7 @@ class TelegramNotifier:
                 'parse_mode': parse_mode
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.session.post(url, json=payload)
             
             if response.status_code != 200:
                 logger.error(f"Error enviando mensaje a Telegram: {response.text}")
@@ -50,7 +54,8 @@ class TelegramNotifier:
             return True
             
         except Exception as e:
-            logger.error(f"Error enviando notificación: {e}")
+            # Los errores de requests incluyen la URL, con el token del bot
+            logger.error(f"Error enviando notificación: {redact_path(str(e))}")
             return False
     
     def notify_startup(self, config):
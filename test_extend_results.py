@@ -0,0 +1,111 @@
+"""
+Script de test de la re-optimización incremental (extend_results)
+Comprueba que extender todas las combinaciones con velas nuevas da el mismo
+ranking que repetir los backtests sobre el histórico completo, incluidas las
+combinaciones que solo alcanzan MIN_TRADES_REQUIRED con las velas nuevas
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Backtesting & Optimizing'))
+
+from Optimizing import (
+    OptimizationConfig, StrategyOptimizer, Backtester, add_technical_indicators,
+    calculate_volume_derivatives, get_volume_norm_stats, generate_signals
+)
+from synthetic_data import generate_ohlcv
+
+N_OLD = 2000
+N_NEW = 400
+METRICS = ['total_return', 'total_trades', 'win_rate', 'profit_factor', 'max_drawdown',
+           'sharpe_ratio', 'final_capital']
+
+
+class ExtendConfig(OptimizationConfig):
+    """Grid pequeño con estado guardado"""
+    PARAMS_TO_OPTIMIZE = {
+        **OptimizationConfig.PARAMS_TO_OPTIMIZE,
+        'MIN_CONFIRMATIONS_RATIO': [0.25, 0.5, 0.25],
+    }
+    BOOLEAN_PARAMS = {**OptimizationConfig.BOOLEAN_PARAMS, 'USE_OBV': [True]}
+    MIN_TRADES_REQUIRED = 12
+    SAVE_BACKTEST_STATE = True
+    N_JOBS = 1
+
+
+def param_key(optimizer, result):
+    return tuple(result[name] for name in optimizer.get_param_space())
+
+
+def full_run_results(optimizer, old, full):
+    """Ranking de un grid completo sobre todas las velas (con la normalización del histórico original)"""
+    cfg = optimizer.opt_config
+    ind_old = add_technical_indicators(old)
+    ind_full = add_technical_indicators(full)
+
+    ranked = {}
+    for params in optimizer.generate_param_combinations():
+        config = optimizer.create_config_from_params(params)
+        norm_stats = get_volume_norm_stats(calculate_volume_derivatives(ind_old, config))
+        df = generate_signals(calculate_volume_derivatives(ind_full, config, norm_stats), config)
+        results = Backtester(config, optimizer.create_early_stop_rules(cfg.MIN_TRADES_REQUIRED)).run(df)
+        if results['stop_reason'] is None and results['total_trades'] >= cfg.MIN_TRADES_REQUIRED:
+            ranked[tuple(params[name] for name in optimizer.get_param_space())] = results
+    return ranked
+
+
+def main():
+    print("\n" + "="*60)
+    print("EXTEND_RESULTS FRENTE A UN GRID COMPLETO")
+    print("="*60)
+
+    full = generate_ohlcv(N_OLD + N_NEW, '1h', seed=7)
+    old = full.iloc[:N_OLD]
+
+    optimizer = StrategyOptimizer(ExtendConfig())
+    optimizer.data = add_technical_indicators(old)
+    optimizer.results = optimizer._optimize_grid(optimizer.data)
+    before = {param_key(optimizer, r) for r in optimizer.results}
+
+    extended = optimizer.extend_results(full.iloc[N_OLD:])
+    after = {param_key(optimizer, r): r for r in extended}
+    reference = full_run_results(optimizer, old, full)
+
+    crossed = set(after) - before
+    print(f"\n   Combinaciones evaluadas: {len(optimizer.state_results)}")
+    print(f"   Válidas antes/después de extender: {len(before)} / {len(after)} "
+          f"({len(crossed)} alcanzan el mínimo de trades con las velas nuevas)")
+
+    ok = True
+    if set(after) != set(reference):
+        print(f"   ❌ Conjunto válido distinto: {len(set(after) ^ set(reference))} combinaciones")
+        ok = False
+    if not crossed:
+        print("   ❌ Ninguna combinación cruza el mínimo de trades: el test no cubre el caso")
+        ok = False
+
+    mismatches = [
+        key for key in set(after) & set(reference)
+        if not all(np.isclose(after[key][m], reference[key][m], rtol=1e-8, atol=1e-9) for m in METRICS)
+    ]
+    if mismatches:
+        print(f"   ❌ {len(mismatches)} combinaciones con métricas distintas")
+        ok = False
+
+    # Se comparan los Sharpe del top-N: parámetros sin efecto (p.ej. ADX_THRESHOLD sin USE_ADX)
+    # dan combinaciones empatadas cuyo orden relativo es arbitrario
+    top_n = ExtendConfig.TOP_N_RESULTS
+    top_extended = optimizer.get_top_configs(top_n=top_n)['sharpe_ratio'].values
+    top_reference = sorted((r['sharpe_ratio'] for r in reference.values()), reverse=True)[:top_n]
+    if not np.allclose(top_extended, top_reference, rtol=1e-8, atol=1e-9):
+        print(f"   ❌ Top-{top_n} distinto del grid completo")
+        ok = False
+
+    print(f"\n{'✅' if ok else '❌'} extend_results {'coincide' if ok else 'NO coincide'} con el grid completo")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,104 @@
+"""
+Script de test del pool HTTP compartido (http_session)
+Comprueba que los mensajes a Telegram reutilizan la conexión y que el token
+del bot no aparece en los logs (trading.log se sube como artifact)
+"""
+
+import io
+import sys
+import json
+import socket
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_session
+from telegram_notifier import TelegramNotifier
+
+BOT_TOKEN = '123456:SECRET-TOKEN'
+
+
+class TelegramHandler(BaseHTTPRequestHandler):
+    """API de bots mínima: sendMessage responde ok"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def free_port():
+    """Puerto local sin servidor (para provocar un error de conexión)"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    """Ejecutar todos los tests"""
+    print("\n" + "🧪" * 30)
+    print("BOT DE TRADING - TEST DEL POOL HTTP")
+    print("🧪" * 30)
+
+    # Capturar todo lo que se loguea, como lo haría trading.log
+    output = io.StringIO()
+    handler = logging.StreamHandler(output)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    # Con reintentos, urllib3 avisa de cada uno con la URL (y el token)
+    http_session.configure(retries=1)
+    http_session.stats.reset()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), TelegramHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        notifier = TelegramNotifier(BOT_TOKEN, 1, api_url=f"http://127.0.0.1:{server.server_address[1]}")
+        sent = all(notifier.send_message(f"mensaje {i}") for i in range(3))
+        # Error de conexión: la excepción de requests incluye la URL
+        failing = TelegramNotifier(BOT_TOKEN, 1, api_url=f"http://127.0.0.1:{free_port()}")
+        failed = not failing.send_message("sin servidor")
+    finally:
+        server.shutdown()
+        server.server_close()
+        root.removeHandler(handler)
+
+    stats = http_session.stats.snapshot()
+    calls = sum(s['calls'] for s in stats.values())
+    reused = sum(s['reused'] for s in stats.values())
+    log = output.getvalue()
+
+    results = [
+        (sent, "Mensajes enviados"),
+        (failed, "Error de conexión detectado"),
+        (reused >= 2, f"Conexión reutilizada ({reused}/{calls} llamadas)"),
+        ('Retrying' in log, "Reintento de conexión registrado"),
+        (BOT_TOKEN not in log and 'SECRET-TOKEN' not in log, "Token del bot ausente de los logs"),
+        ('/bot***/sendMessage' in log, "Ruta redactada en los logs"),
+    ]
+    print()
+    for ok, name in results:
+        print(f"{'✅' if ok else '❌'} {name}")
+
+    all_ok = all(ok for ok, _ in results)
+    print("\n" + "="*60)
+    if all_ok:
+        print("✅ TODOS LOS TESTS PASARON")
+    else:
+        print("❌ ALGUNOS TESTS FALLARON")
+    print("="*60 + "\n")
+
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
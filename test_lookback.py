@@ -0,0 +1,122 @@
+"""
+Script de test del lookback mínimo (required_lookback)
+Comprueba que los indicadores de la última vela calculados solo sobre el
+lookback coinciden con los del histórico completo (720 velas de Kraken)
+"""
+
+import sys
+import numpy as np
+
+from live_trading import (
+    ProductionConfig, required_lookback, get_volume_norm_stats,
+    calculate_volume_derivatives, add_technical_indicators, generate_signal
+)
+from synthetic_data import generate_ohlcv
+
+FULL_HISTORY = 720
+N_CHECKS = 25
+
+# ADX de ta deja la última vela a 0: se compara la anterior
+ADX_INDICATORS = ['ADX', 'ADX_pos', 'ADX_neg']
+
+
+class AllFiltersConfig(ProductionConfig):
+    """Todos los indicadores activos (el lookback más exigente)"""
+    USE_ADX = True
+    USE_OBV = True
+    USE_PRICE_MA = True
+    USE_RSI_FILTER = True
+    USE_BB_FILTER = True
+
+
+def used_indicators(config):
+    """Indicadores que usa la configuración (los que cubre required_lookback)"""
+    columns = ['Vol_1st_Der_Norm', 'Vol_2nd_Der_Norm', 'SMA_50', 'ATR']
+    if config.USE_ADX:
+        columns += ADX_INDICATORS
+    if config.USE_RSI_FILTER:
+        columns.append('RSI')
+    if config.USE_BB_FILTER:
+        columns += ['BB_upper', 'BB_lower']
+    if config.USE_PRICE_MA:
+        columns.append('SMA_20')
+    return columns
+
+
+def compute(df, config, norm_stats):
+    df = calculate_volume_derivatives(df, config, norm_stats=norm_stats)
+    return add_technical_indicators(df, copy=False)
+
+
+def relative_error(value, reference):
+    return abs(value - reference) / max(abs(reference), 1e-12)
+
+
+def check_config(name, config, candles):
+    """Comparar lookback vs histórico completo en N_CHECKS ventanas"""
+    print("\n" + "="*60)
+    print(f"LOOKBACK: {name}")
+    print("="*60)
+
+    tolerance = config.LOOKBACK_TOLERANCE
+    lookback = required_lookback(config)
+    print(f"\n🔍 Lookback mínimo: {lookback} velas (tolerancia {tolerance:g}, histórico {FULL_HISTORY})")
+
+    worst = {}
+    signals_ok = 0
+    ends = np.linspace(FULL_HISTORY, len(candles), N_CHECKS, dtype=int)
+    for end in ends:
+        full = candles.iloc[end - FULL_HISTORY:end]
+        norm_stats = get_volume_norm_stats(full, config)
+        reference = compute(full, config, norm_stats)
+        short = compute(full.iloc[-lookback:], config, norm_stats)
+
+        for col in used_indicators(config):
+            row = -2 if col in ADX_INDICATORS else -1
+            error = relative_error(short[col].iloc[row], reference[col].iloc[row])
+            worst[col] = max(worst.get(col, 0), error)
+        if config.USE_OBV:
+            # OBV es acumulado: solo se usa su variación
+            obv_error = relative_error(short['OBV'].diff().iloc[-1], reference['OBV'].diff().iloc[-1])
+            worst['OBV (diff)'] = max(worst.get('OBV (diff)', 0), obv_error)
+
+        signals_ok += generate_signal(short, config)[0] == generate_signal(reference, config)[0]
+
+    all_ok = True
+    for col, error in worst.items():
+        ok = error <= tolerance
+        all_ok &= ok
+        print(f"{'✅' if ok else '❌'} {col}: error relativo máximo {error:.2e}")
+
+    signals_match = signals_ok == len(ends)
+    print(f"{'✅' if signals_match else '❌'} Señal igual en {signals_ok}/{len(ends)} ventanas")
+
+    return all_ok and signals_match
+
+
+def main():
+    """Ejecutar todos los tests"""
+    print("\n" + "🧪" * 30)
+    print("BOT DE TRADING - TEST DE LOOKBACK")
+    print("🧪" * 30)
+
+    candles = generate_ohlcv(FULL_HISTORY * 4, interval=ProductionConfig.INTERVAL, seed=7)
+    candles.columns = [col.lower() for col in candles.columns]
+
+    results = [
+        check_config("Configuración de producción", ProductionConfig, candles),
+        check_config("Todos los filtros activos", AllFiltersConfig, candles)
+    ]
+
+    print("\n" + "="*60)
+    if all(results):
+        print("✅ TODOS LOS TESTS PASARON")
+    else:
+        print("❌ ALGUNOS TESTS FALLARON")
+    print("="*60 + "\n")
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
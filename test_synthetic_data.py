@@ -0,0 +1,81 @@
+"""
+Script de test del generador sintético (synthetic_data)
+Comprueba que ar1 coincide con la recurrencia secuencial para cualquier phi
+(incluidos 0 y valores pequeños) y que el generador no produce NaN con
+parámetros extremos
+"""
+
+import sys
+import numpy as np
+
+from synthetic_data import SyntheticConfig, ar1, generate_ohlcv
+
+PHIS = [0.0, 0.05, -0.05, 1e-300, 0.5, -0.7, 0.98, 1.0]
+
+
+def ar1_reference(noise, phi, x0=0.0):
+    """x_t = phi * x_{t-1} + noise_t, vela a vela"""
+    out = np.empty(len(noise))
+    state = x0
+    for t, e in enumerate(noise):
+        state = phi * state + e
+        out[t] = state
+    return out
+
+
+def check_ar1():
+    print("\n" + "="*60)
+    print("AR(1) VECTORIZADO")
+    print("="*60 + "\n")
+
+    rng = np.random.default_rng(3)
+    noise = rng.normal(size=2000)
+    all_ok = True
+    for phi in PHIS:
+        result = ar1(noise, phi, x0=0.3)
+        reference = ar1_reference(noise, phi, x0=0.3)
+        error = np.max(np.abs(result - reference))
+        ok = bool(np.isfinite(result).all()) and error < 1e-8
+        all_ok &= ok
+        print(f"{'✅' if ok else '❌'} phi={phi:g}: error máximo {error:.2e}")
+    return all_ok
+
+
+class ExtremeConfig(SyntheticConfig):
+    """Persistencia casi nula y recuperación de crashes en menos de una vela"""
+    VOL_PERSISTENCE = 0.05
+    CRASH_RECOVERY_BARS = 0.2
+    CRASH_RATE = 50
+
+
+def check_extreme_config():
+    print("\n" + "="*60)
+    print("GENERADOR CON PARÁMETROS EXTREMOS")
+    print("="*60 + "\n")
+
+    df = generate_ohlcv(5000, interval='1h', seed=1, config=ExtremeConfig)
+    ok = bool(np.isfinite(df.to_numpy(dtype=float)).all())
+    print(f"{'✅' if ok else '❌'} {len(df)} velas sin NaN/inf")
+    return ok
+
+
+def main():
+    """Ejecutar todos los tests"""
+    print("\n" + "🧪" * 30)
+    print("BOT DE TRADING - TEST DEL GENERADOR SINTÉTICO")
+    print("🧪" * 30)
+
+    results = [check_ar1(), check_extreme_config()]
+
+    print("\n" + "="*60)
+    if all(results):
+        print("✅ TODOS LOS TESTS PASARON")
+    else:
+        print("❌ ALGUNOS TESTS FALLARON")
+    print("="*60 + "\n")
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
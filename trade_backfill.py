@@ -0,0 +1,283 @@
+"""
+Trade Backfill Module
+Histórico profundo de Kraken a partir de las operaciones (endpoint público
+Trades con cursor since), agregadas en velas OHLCV+vwap+count de cualquier
+intervalo y guardadas en el almacén local
+
+El endpoint OHLC solo devuelve las últimas 720 velas; las operaciones se
+pueden paginar desde cualquier fecha.
+
+Uso:
+    python trade_backfill.py PAR INTERVALO_MIN INICIO [FIN]
+    python trade_backfill.py XXRPZUSD 60 2024-01-01
+"""
+
+import sys
+import time
+import logging
+import numpy as np
+import pandas as pd
+
+from candle_store import CandleStore
+
+logger = logging.getLogger(__name__)
+
+# Mismas columnas que las velas del endpoint OHLC (kraken_trader.OHLC_COLUMNS)
+CANDLE_COLUMNS = ['time', 'open', 'high', 'low', 'close', 'vwap', 'volume', 'count']
+CURSOR_KEY = 'trades_cursor'
+
+
+def parse_trades(rows):
+    """
+    Filas de Trades [precio, volumen, tiempo, lado, tipo, misc, id] → arrays
+
+    Returns:
+        (tiempos en segundos float, precios, volúmenes)
+    """
+    if not rows:
+        empty = np.empty(0)
+        return empty, empty, empty
+    prices = np.array([row[0] for row in rows], dtype=float)
+    volumes = np.array([row[1] for row in rows], dtype=float)
+    times = np.array([row[2] for row in rows], dtype=float)
+    return times, prices, volumes
+
+
+class TradeCandleBuilder:
+    """
+    Agregación incremental de operaciones en velas
+
+    Cada página se agrega de forma vectorizada (reduceat por vela); la última
+    vela de la página queda pendiente hasta ver una operación posterior, así
+    que add_trades() solo devuelve velas completas. Los intervalos sin
+    operaciones se rellenan con velas planas (cierre anterior, volumen 0) para
+    que la serie sea contigua como la que usa el bot en vivo.
+    """
+
+    def __init__(self, interval, fill_empty=True, last_bin=None, last_close=None):
+        """
+        Args:
+            interval: Intervalo en minutos
+            fill_empty: Rellenar intervalos sin operaciones
+            last_bin: Última vela ya emitida (índice de intervalo), para continuar una serie
+            last_close: Cierre de esa vela
+        """
+        self.step = interval * 60
+        self.fill_empty = fill_empty
+        self.last_bin = last_bin
+        self.last_close = last_close
+        self.pending = None  # [bin, open, high, low, close, notional, volume, count]
+
+    def add_trades(self, times, prices, volumes):
+        """
+        Añadir operaciones en orden cronológico
+
+        Returns:
+            DataFrame de velas completas (puede estar vacío)
+        """
+        if not len(times):
+            return self._frame(np.empty((0, 8)))
+
+        bins = np.floor_divide(times, self.step).astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+        ends = np.r_[starts[1:], len(bins)]
+
+        page = np.column_stack([
+            bins[starts],
+            prices[starts],
+            np.fmax.reduceat(prices, starts),
+            np.fmin.reduceat(prices, starts),
+            prices[ends - 1],
+            np.add.reduceat(prices * volumes, starts),
+            np.add.reduceat(volumes, starts),
+            ends - starts,
+        ]).astype(float)
+
+        if self.pending is not None:
+            if page[0, 0] == self.pending[0]:
+                page[0] = self._merge(self.pending, page[0])
+            elif page[0, 0] > self.pending[0]:
+                page = np.vstack([self.pending, page])
+            else:
+                # Operaciones anteriores a la vela pendiente (página repetida): se ignoran
+                page = page[page[:, 0] >= self.pending[0]]
+                if len(page) and page[0, 0] == self.pending[0]:
+                    page[0] = self._merge(self.pending, page[0])
+
+        if not len(page):
+            return self._frame(np.empty((0, 8)))
+
+        self.pending = page[-1]
+        return self._emit(page[:-1])
+
+    def finish(self, until=None):
+        """
+        Cerrar la vela pendiente si ya terminó
+
+        Args:
+            until: Se consideran vistas todas las operaciones anteriores a este
+                instante (segundos); None = cerrar siempre
+        """
+        if self.pending is None:
+            return self._frame(np.empty((0, 8)))
+        if until is not None and (self.pending[0] + 1) * self.step > until:
+            return self._frame(np.empty((0, 8)))
+
+        done, self.pending = self.pending[None, :], None
+        return self._emit(done)
+
+    @staticmethod
+    def _merge(first, second):
+        """Unir dos agregados de la misma vela (first antes que second)"""
+        return np.array([first[0], first[1], max(first[2], second[2]), min(first[3], second[3]),
+                         second[4], first[5] + second[5], first[6] + second[6], first[7] + second[7]])
+
+    def _emit(self, candles):
+        """Velas completas, con los intervalos vacíos rellenados, como DataFrame"""
+        if self.fill_empty and len(candles):
+            first = self.last_bin + 1 if self.last_bin is not None else int(candles[0, 0])
+            full = np.arange(first, int(candles[-1, 0]) + 1)
+            if len(full) != len(candles):
+                pos = np.searchsorted(full, candles[:, 0].astype(np.int64))
+                filled = np.zeros((len(full), 8))
+                filled[:, 0] = full
+                filled[pos] = candles
+
+                # Cierre anterior arrastrado a las velas vacías
+                has = np.zeros(len(full), dtype=bool)
+                has[pos] = True
+                source = np.where(has, np.arange(len(full)), -1)
+                np.maximum.accumulate(source, out=source)
+                prev_close = np.where(source >= 0, filled[np.maximum(source, 0), 4],
+                                      self.last_close if self.last_close is not None else np.nan)
+                empty = ~has
+                filled[empty, 1:5] = prev_close[empty, None]
+                candles = filled[~np.isnan(filled[:, 4])]
+
+        if len(candles):
+            self.last_bin = int(candles[-1, 0])
+            self.last_close = candles[-1, 4]
+        return self._frame(candles)
+
+    def _frame(self, candles):
+        volume = candles[:, 6]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            vwap = np.where(volume > 0, candles[:, 5] / volume, candles[:, 4])
+        times = candles[:, 0].astype(np.int64) * self.step
+
+        df = pd.DataFrame({
+            'time': times,
+            'open': candles[:, 1],
+            'high': candles[:, 2],
+            'low': candles[:, 3],
+            'close': candles[:, 4],
+            'vwap': vwap,
+            'volume': volume,
+            'count': candles[:, 7].astype(np.int64),
+        }, columns=CANDLE_COLUMNS)
+        df.index = pd.to_datetime(times, unit='s')
+        df.index.name = 'dtime'
+        return df
+
+
+def backfill_trades(trader, pair, interval, start, end=None, store_dir='candle_store', source='kraken',
+                    flush_pages=50, max_pages=None, fill_empty=True):
+    """
+    Construir velas desde las operaciones y añadirlas al almacén
+
+    El cursor de reanudación (metadato 'trades_cursor', en ns) es el final de
+    la última vela guardada: una ejecución interrumpida continúa desde ahí y
+    vuelve a agregar la vela que estaba a medias.
+
+    Args:
+        trader: KrakenTrader (límite de peticiones compartido)
+        pair: Par de Kraken ('XXRPZUSD')
+        interval: Intervalo en minutos
+        start: Inicio del histórico (datetime/str)
+        end: Fin (None = hasta alcanzar el presente)
+        store_dir: Almacén de velas
+        source: Serie del almacén (por defecto la misma que el OHLC de Kraken)
+        flush_pages: Páginas entre escrituras (cada escritura reescribe el Parquet)
+        max_pages: Límite de páginas en esta ejecución (None = sin límite)
+        fill_empty: Rellenar intervalos sin operaciones
+
+    Returns:
+        Dict con páginas, operaciones, velas escritas y cursor final
+    """
+    store = CandleStore(store_dir)
+    start_ns = CandleStore._to_utc(start).value
+    end_s = CandleStore._to_utc(end).value / 1e9 if end is not None else None
+
+    since, last_bin, last_close = start_ns - 1, None, None
+    cursor = store.get_metadata(source, pair, interval).get(CURSOR_KEY)
+    if cursor is not None and int(cursor) > start_ns:
+        # since es exclusivo: -1 ns incluye una operación justo en el límite de la vela
+        since = int(cursor) - 1
+        previous = store.read(source, pair, interval, end=pd.Timestamp(since, unit='ns', tz='UTC'))
+        if not previous.empty:
+            last_bin = int(previous['time'].iloc[-1]) // (interval * 60)
+            last_close = float(previous['close'].iloc[-1])
+        logger.info(f"Reanudando backfill de {pair}/{interval}m desde {pd.Timestamp(since, unit='ns')}")
+
+    builder = TradeCandleBuilder(interval, fill_empty, last_bin, last_close)
+    stats = {'pages': 0, 'trades': 0, 'candles': 0, 'cursor': since}
+    batch = []
+    started = time.perf_counter()
+
+    def flush(final=False):
+        candles = pd.concat(batch) if batch else None
+        batch.clear()
+        if candles is None or candles.empty:
+            return
+        # Cursor = final de la última vela completa guardada
+        stats['cursor'] = int(candles['time'].iloc[-1] + interval * 60) * 10**9
+        store.write(source, pair, interval, candles, covered_from=pd.Timestamp(start_ns, unit='ns', tz='UTC'),
+                    metadata={CURSOR_KEY: stats['cursor']})
+        stats['candles'] += len(candles)
+        logger.info(f"Backfill {pair}/{interval}m: {stats['candles']} velas, {stats['trades']:,} operaciones, "
+                    f"hasta {candles.index[-1]}{' (fin)' if final else ''}")
+
+    while max_pages is None or stats['pages'] < max_pages:
+        rows, last = trader.get_trades_page(pair, since)
+        stats['pages'] += 1
+        times, prices, volumes = parse_trades(rows)
+
+        reached_end = end_s is not None and len(times) and times[-1] >= end_s
+        if end_s is not None:
+            keep = times < end_s
+            times, prices, volumes = times[keep], prices[keep], volumes[keep]
+
+        stats['trades'] += len(times)
+        batch.append(builder.add_trades(times, prices, volumes))
+
+        caught_up = not rows or int(last) <= int(since)
+        if reached_end:
+            batch.append(builder.finish(until=end_s))
+        elif caught_up:
+            # Presente alcanzado: la vela pendiente solo se guarda si ya terminó
+            batch.append(builder.finish(until=time.time()))
+        if reached_end or caught_up:
+            flush(final=True)
+            break
+
+        since = last
+        if stats['pages'] % flush_pages == 0:
+            flush()
+    else:
+        flush()
+
+    logger.info(f"Backfill {pair}/{interval}m: {stats['pages']} páginas en {time.perf_counter() - started:.1f}s")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    if len(sys.argv) < 4:
+        print(__doc__)
+        sys.exit(1)
+
+    from kraken_trader import KrakenTrader
+
+    pair, interval, start = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    end = sys.argv[4] if len(sys.argv) > 4 else None
+    print(backfill_trades(KrakenTrader(None, None), pair, interval, start, end))